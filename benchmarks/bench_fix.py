@@ -0,0 +1,90 @@
+"""
+Benchmark the end-of-run fix-up of an extended ontology: the whole ontology in
+one _fix_ontology call against the incremental fix-up of the parts the extension
+changed. The fake model's latency grows with the prompt, so the full fix-up slows
+down as the ontology grows. Medians are appended to a JSON lines file together
+with the current commit.
+
+Usage:
+    python -m benchmarks.bench_fix --sizes 500 2000 8000 --added 10 --token-latency 0.05
+"""
+import os
+import copy
+import json
+import time
+import argparse
+import statistics
+from graphrag_sdk import Ontology
+from src.ontology.ontology_diff import fingerprint
+from src.ontology.ontology_merger import OntologyMerger
+from src.steps.concurrent_ontology_step import ConcurrentCreateOntologyStep
+from benchmarks.bench_ontology_merge import synthetic_parts
+from benchmarks.bench_pipeline import git_commit, previous_run
+from benchmarks.fake_model import FakeGenerativeModel
+
+def fix_time(step: ConcurrentCreateOntologyStep, ontology: Ontology, baseline: dict, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        # The fix-up extends the ontology in place
+        target = copy.deepcopy(ontology)
+        start = time.perf_counter()
+        step._fix_changes(target, baseline)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000],
+                        help="Partial ontologies merged into the fixed ontology")
+    parser.add_argument("--added", type=int, default=10, help="Partial ontologies merged by the extension")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.05, help="Seconds per 1000 prompt tokens")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="benchmarks/results/fix.jsonl")
+    args = parser.parse_args()
+
+    model = FakeGenerativeModel(latency=args.latency, jitter=0.0, token_latency=args.token_latency, labels=100000)
+    results = {}
+    for size in args.sizes:
+        parts = synthetic_parts(size + args.added, labels=size)
+        fixed = OntologyMerger().add_all(parts[:size]).ontology
+        baseline = fingerprint(fixed)
+        extended = OntologyMerger(fixed).add_all(parts[size:]).ontology
+
+        stats = {}
+        for mode in ("full", "incremental"):
+            step = ConcurrentCreateOntologyStep(
+                sources=[], ontology=Ontology(), model=model,
+                config={"max_input_tokens": 500000, "max_output_tokens": 8192,
+                        "fix_mode": mode, "fix_workers": args.workers}
+            )
+            stats[mode] = {"seconds": fix_time(step, extended, baseline, args.repeats)}
+            stats[mode]["calls"] = step.metrics.report()["counters"]["fix_calls_total"] // args.repeats
+        results[str(size)] = {"entities": len(extended.entities), "relations": len(extended.relations), **stats}
+
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "sizes": results
+    }
+    previous = previous_run(args.output, report["params"])
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as file:
+        file.write(json.dumps(report) + "\n")
+
+    for size, stats in results.items():
+        change = ""
+        if previous is not None and size in previous["sizes"]:
+            change = f" | {stats['incremental']['seconds'] / previous['sizes'][size]['incremental']['seconds'] - 1:+.1%} vs {previous['commit']}"
+        print(
+            f"{stats['entities']:>6} entities: full {stats['full']['seconds']:7.2f}s ({stats['full']['calls']} call) | "
+            f"incremental {stats['incremental']['seconds']:7.2f}s ({stats['incremental']['calls']} calls){change}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the import time of the package entry points. Each module is imported
+in fresh interpreters with -X importtime, and the median cumulative time is
+appended to a JSON lines file together with the current commit.
+
+Usage:
+    python -m benchmarks.bench_import --repeats 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from benchmarks.bench_pipeline import git_commit, previous_run
+
+# Modules imported by main.py, serve.py and the loading and extraction processes
+ENTRY_MODULES = [
+    "src.ontology.ontology_hub",
+    "src.steps.concurrent_ontology_step",
+    "src.sources.unstructured_source",
+    "src.loaders.unstructured_loader"
+]
+
+def import_time(module: str) -> tuple:
+    """
+    Import a module in a fresh interpreter.
+
+    Args:
+        module (str): Module to import
+
+    Returns:
+        tuple: Cumulative import time of the module in seconds, and its
+            three slowest direct and indirect imports as (name, seconds) pairs
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    # Lines read "import time: <self us> | <cumulative us> | <indented name>"
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(cumulative) / 1e6))
+    total = next(seconds for name, seconds in reversed(timings) if name == module)
+    # A name can be listed more than once, e.g. by nested imports of the same package; keep the longest
+    others = {}
+    for name, seconds in timings:
+        if name != module:
+            others[name] = max(seconds, others.get(name, 0.0))
+    slowest = sorted(others.items(), key=lambda t: t[1], reverse=True)[:3]
+    return total, slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=ENTRY_MODULES)
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--output", default="benchmarks/results/imports.jsonl")
+    args = parser.parse_args()
+
+    modules = {}
+    for module in args.modules:
+        runs = [import_time(module) for _ in range(args.repeats)]
+        modules[module] = {
+            "seconds": statistics.median(total for total, _ in runs),
+            "slowest": runs[-1][1]
+        }
+
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"modules": args.modules, "repeats": args.repeats},
+        "modules": modules
+    }
+    previous = previous_run(args.output, report["params"])
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as file:
+        file.write(json.dumps(report) + "\n")
+
+    for module, stats in modules.items():
+        change = ""
+        if previous is not None and module in previous["modules"]:
+            change = f" | {stats['seconds'] / previous['modules'][module]['seconds'] - 1:+.1%} vs {previous['commit']}"
+        slowest = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in stats["slowest"])
+        print(f"{module:>36}: {stats['seconds'] * 1000:7.0f} ms{change} | slowest: {slowest}")
+
+
+if __name__ == "__main__":
+    main()
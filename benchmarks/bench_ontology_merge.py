@@ -0,0 +1,94 @@
+"""
+Benchmark the sequential merge_with fold against OntologyMerger and the tree reduction.
+
+Usage:
+    python -m benchmarks.bench_ontology_merge --sizes 1000 10000 --workers 4
+"""
+import time
+import copy
+import random
+import argparse
+from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.relation import Relation
+from graphrag_sdk.attribute import Attribute, AttributeType
+from src.ontology.ontology_merger import OntologyMerger, merge_ontologies
+
+def synthetic_parts(count: int, labels: int, seed: int = 0) -> list:
+    """
+    Build partial ontologies shaped like single-document extraction results.
+
+    Args:
+        count (int): Number of partial ontologies
+        labels (int): Size of the entity and relation label vocabulary
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        list: Partial ontologies
+    """
+    rng = random.Random(seed)
+
+    def attributes():
+        return [
+            Attribute(f"attr{rng.randint(0, 30)}", AttributeType.STRING, False, False)
+            for _ in range(rng.randint(1, 5))
+        ]
+
+    parts = []
+    for _ in range(count):
+        names = [f"Entity{rng.randint(0, labels)}" for _ in range(rng.randint(5, 15))]
+        parts.append(Ontology(
+            [Entity(name, attributes()) for name in names],
+            [
+                Relation(f"REL{rng.randint(0, labels)}", rng.choice(names), rng.choice(names), attributes())
+                for _ in range(rng.randint(5, 15))
+            ]
+        ))
+    return parts
+
+
+def timed(function, parts) -> tuple:
+    # Every strategy mutates its inputs, so each one gets a private copy
+    parts = copy.deepcopy(parts)
+    start = time.perf_counter()
+    result = function(parts)
+    return time.perf_counter() - start, result.to_json()
+
+
+def fold(parts):
+    ontology = Ontology()
+    for part in parts:
+        ontology = ontology.merge_with(part)
+    return ontology
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--labels", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--skip-fold-above", type=int, default=None,
+                        help="Skip the quadratic fold for larger sizes")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        parts = synthetic_parts(size, args.labels)
+        indexed_time, indexed = timed(lambda p: OntologyMerger().add_all(p).ontology, parts)
+        tree_time, tree = timed(lambda p: merge_ontologies(p, workers=args.workers), parts)
+        assert tree == indexed, "Tree reduction diverged from the indexed merge"
+
+        if args.skip_fold_above is None or size <= args.skip_fold_above:
+            fold_time, folded = timed(fold, parts)
+            assert folded == indexed, "Indexed merge diverged from merge_with"
+            fold_report = f"{fold_time:8.3f}s"
+        else:
+            fold_report = "skipped"
+
+        print(
+            f"{size:>6} parts | merge_with fold: {fold_report} | "
+            f"indexed: {indexed_time:8.3f}s | tree ({args.workers} workers): {tree_time:8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
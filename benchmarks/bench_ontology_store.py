@@ -0,0 +1,117 @@
+"""
+Benchmark saving and loading a large ontology as JSON against the compact
+formats of ontology_store, and label lookups with OntologyIndex against list
+scans. Medians are appended to a JSON lines file together with the current commit.
+
+Usage:
+    python -m benchmarks.bench_ontology_store --parts 20000 --labels 20000
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from graphrag_sdk import Ontology
+from src.ontology.ontology_merger import OntologyMerger
+from src.ontology.ontology_index import OntologyIndex
+from src.ontology.ontology_store import JSON_LINES, MSGPACK, default_encoding, load_ontology, save_ontology
+from benchmarks.bench_ontology_merge import synthetic_parts
+from benchmarks.bench_pipeline import git_commit, previous_run
+
+def save_json(ontology: Ontology, path: str) -> None:
+    # Same as OntologyHub.save_json, without the manifest
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(json.dumps(ontology.to_json(), indent=2))
+
+
+def load_json(path: str) -> Ontology:
+    with open(path, "r", encoding="utf-8") as file:
+        return Ontology.from_json(json.loads(file.read()))
+
+
+def median_time(function, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parts", type=int, default=20000, help="Partial ontologies merged into the benchmarked one")
+    parser.add_argument("--labels", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--output", default="benchmarks/results/ontology_store.jsonl")
+    args = parser.parse_args()
+
+    ontology = OntologyMerger().add_all(synthetic_parts(args.parts, args.labels)).ontology
+    expected = ontology.to_json()
+
+    formats = {"json": (save_json, load_json), JSON_LINES: None}
+    if default_encoding() == MSGPACK:
+        formats[MSGPACK] = None
+    stats = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, functions in formats.items():
+            path = os.path.join(directory, "ontology." + name)
+            save, load = functions or (
+                lambda o, p, encoding=name: save_ontology(o, p, encoding), load_ontology
+            )
+            save_seconds = median_time(lambda: save(ontology, path), args.repeats)
+            load_seconds = median_time(lambda: load(path), args.repeats)
+            assert load(path).to_json() == expected, f"{name} roundtrip changed the ontology"
+            stats[name] = {"save_seconds": save_seconds, "load_seconds": load_seconds, "bytes": os.path.getsize(path)}
+
+    labels = [entity.label for entity in ontology.entities][:args.lookups]
+    index = OntologyIndex(ontology)
+
+    def scan():
+        for label in labels:
+            ontology.get_entity_with_label(label)
+            [r for r in ontology.relations if label in (r.source.label, r.target.label)]
+
+    def indexed():
+        for label in labels:
+            index.entity(label)
+            index.relations_touching(label)
+
+    index_build = median_time(lambda: OntologyIndex(ontology).entity(""), args.repeats)
+    lookups = {"scan_seconds": median_time(scan, 1), "index_seconds": median_time(indexed, args.repeats), "build_seconds": index_build}
+
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"parts": args.parts, "labels": args.labels, "repeats": args.repeats, "lookups": args.lookups},
+        "entities": len(ontology.entities),
+        "relations": len(ontology.relations),
+        "formats": stats,
+        "lookups": lookups
+    }
+    previous = previous_run(args.output, report["params"])
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as file:
+        file.write(json.dumps(report) + "\n")
+
+    print(f"{report['entities']} entities, {report['relations']} relations")
+    for name, values in stats.items():
+        change = ""
+        if previous is not None and name in previous["formats"]:
+            change = f" | load {values['load_seconds'] / previous['formats'][name]['load_seconds'] - 1:+.1%} vs {previous['commit']}"
+        print(
+            f"{name:>9}: save {values['save_seconds']:7.3f}s | load {values['load_seconds']:7.3f}s "
+            f"({stats['json']['load_seconds'] / values['load_seconds']:5.1f}x json) | "
+            f"{values['bytes'] / 1e6:7.2f} MB{change}"
+        )
+    print(
+        f"{len(labels)} lookups: scan {lookups['scan_seconds']:.3f}s | "
+        f"index {lookups['index_seconds'] * 1000:.2f} ms (built in {lookups['build_seconds'] * 1000:.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
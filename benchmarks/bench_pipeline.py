@@ -0,0 +1,174 @@
+"""
+Benchmark the full OntologyHub.extend_ontology pipeline offline, with a fake model
+and a synthetic corpus. Results are appended to a JSON lines file together with the
+current commit, so runs can be compared across changes.
+
+Usage:
+    python -m benchmarks.bench_pipeline --documents 200 --size 6000 --latency 0.2 --workers 16
+"""
+import os
+import json
+import time
+import random
+import resource
+import argparse
+import subprocess
+from graphrag_sdk.document import Document
+from graphrag_sdk.source import AbstractSource
+from src.ontology.ontology_hub import OntologyHub
+from benchmarks.fake_model import FakeGenerativeModel
+
+class SyntheticSource(AbstractSource):
+    """
+    Source yielding one generated document, made of lines of random words.
+    """
+
+    def __init__(self, path: str, size: int, seed: int = 0) -> None:
+        """
+        Initialize SyntheticSource.
+
+        Args:
+            path (str): Name of the source
+            size (int): Characters in the document
+            seed (int, optional): Random seed. Defaults to 0.
+        """
+        super().__init__(path)
+        self.size = size
+        self.seed = seed
+
+    def load(self):
+        rng = random.Random(f"{self.seed}:{self.path}")
+        lines, length = [], 0
+        while length < self.size:
+            line = " ".join(f"word{rng.randrange(5000)}" for _ in range(rng.randint(5, 30)))
+            lines.append(line)
+            length += len(line) + 1
+        yield Document("\n".join(lines)[:self.size])
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is reported in kilobytes on Linux; children only count once they are joined
+    return {
+        "parent": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    }
+
+
+def run(args) -> dict:
+    """
+    Run one benchmark.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        dict: Report of the run
+    """
+    model = FakeGenerativeModel(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        entities=args.entities,
+        relations=args.relations,
+        labels=args.labels
+    )
+    sources = [SyntheticSource(f"doc{i}", args.size) for i in range(args.documents)]
+
+    hub = OntologyHub(model=model, config={
+        "loading_mode": args.loading_mode,
+        "chunk_tokens": args.chunk_tokens,
+        "document_transport": args.document_transport,
+        "retry_base_delay": 0.01
+    })
+    start = time.perf_counter()
+    ontology = hub.extend_ontology(sources, workers=args.workers)
+    wall = time.perf_counter() - start
+
+    metrics = hub.get_metrics()
+    # Per-unit latency of each stage, recorded by the pipeline metrics
+    stages = {
+        stage: metrics["histograms"][name]
+        for stage, name in (
+            ("loading", "source_load_seconds"),
+            ("llm", "llm_call_seconds"),
+            ("extract", "extraction_seconds"),
+            ("merge", "merge_seconds"),
+            ("fix", "fix_seconds")
+        )
+        if name in metrics["histograms"]
+    }
+
+    return {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "wall_seconds": wall,
+        "docs_per_second": args.documents / wall,
+        "merge_seconds": stages.get("merge", {}).get("sum", 0.0),
+        "stages": stages,
+        "queue_depth_max": {name: gauge["max"] for name, gauge in metrics["gauges"].items()},
+        "peak_rss_mb": peak_rss_mb(),
+        "entities": len(ontology.entities),
+        "relations": len(ontology.relations)
+    }
+
+
+def previous_run(path: str, params: dict) -> dict:
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            report = json.loads(line)
+            if report["params"] == params:
+                previous = report
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--size", type=int, default=6000, help="Characters per document")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean seconds per model call")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--entities", type=int, default=8, help="Entities per model response")
+    parser.add_argument("--relations", type=int, default=8, help="Relations per model response")
+    parser.add_argument("--labels", type=int, default=500, help="Label vocabulary of the fake model")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--loading-mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--chunk-tokens", type=int, default=3000)
+    parser.add_argument("--document-transport", choices=["queue", "spill"], default="queue")
+    parser.add_argument("--output", default="benchmarks/results/pipeline.jsonl")
+    args = parser.parse_args()
+
+    report = run(args)
+    previous = previous_run(args.output, report["params"])
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as file:
+        file.write(json.dumps(report) + "\n")
+
+    print(f"\n{args.documents} documents in {report['wall_seconds']:.2f}s "
+          f"({report['docs_per_second']:.1f} docs/s), merge {report['merge_seconds']:.3f}s, "
+          f"peak RSS {report['peak_rss_mb']['parent']:.0f} MB parent / "
+          f"{report['peak_rss_mb']['children']:.0f} MB children")
+    for stage, stats in sorted(report["stages"].items()):
+        print(f"{stage:>8}: {stats['count']:>6} | p50 {stats['p50'] * 1000:9.2f} ms | "
+              f"p99 {stats['p99'] * 1000:9.2f} ms | total {stats['sum']:8.2f}s")
+    if previous is not None:
+        change = report["docs_per_second"] / previous["docs_per_second"] - 1
+        print(f"Throughput vs {previous['commit']} ({previous['time']}): {change:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
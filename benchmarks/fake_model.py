@@ -0,0 +1,152 @@
+"""
+Deterministic stand-in for a GraphRAG-SDK generative model, used to run the
+pipeline without network access.
+"""
+import json
+import time
+import random
+from graphrag_sdk.models import (
+    GenerativeModel,
+    GenerativeModelChatSession,
+    GenerationResponse,
+    FinishReason
+)
+from graphrag_sdk.models.model import OutputMethod
+from graphrag_sdk.fixtures.prompts import FIX_ONTOLOGY_PROMPT
+from src.utils.hashing import text_digest
+from src.utils.tokens import estimate_tokens
+
+class FakeGenerativeModel(GenerativeModel):
+    """
+    Generative model answering every prompt with a synthetic ontology.
+    Latency, failures and output are derived from a digest of the prompt,
+    so the same corpus gives the same results whatever the thread scheduling.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.1,
+        error_rate: float = 0.0,
+        entities: int = 8,
+        relations: int = 8,
+        attributes: int = 3,
+        labels: int = 500,
+        seed: int = 0,
+        token_latency: float = 0.0,
+        system_instruction: str = None
+    ) -> None:
+        """
+        Initialize FakeGenerativeModel.
+
+        Args:
+            latency (float, optional): Mean seconds per call. Defaults to 0.5.
+            jitter (float, optional): Maximum deviation from the mean latency in seconds. Defaults to 0.1.
+            error_rate (float, optional): Share of prompts that fail with a server error. Defaults to 0.
+            entities (int, optional): Entities per response. Defaults to 8.
+            relations (int, optional): Relations per response. Defaults to 8.
+            attributes (int, optional): Attributes per entity and relation. Defaults to 3.
+            labels (int, optional): Size of the label vocabulary. Defaults to 500.
+            seed (int, optional): Seed mixed into every prompt digest. Defaults to 0.
+            token_latency (float, optional): Extra seconds per 1000 prompt tokens, like the
+                prefill time of a real model. Defaults to 0.
+            system_instruction (str, optional): System instruction. Defaults to None.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.entities = entities
+        self.relations = relations
+        self.attributes = attributes
+        self.labels = labels
+        self.seed = seed
+        self.token_latency = token_latency
+        self.system_instruction = system_instruction
+
+    def with_system_instruction(self, system_instruction: str) -> "FakeGenerativeModel":
+        return FakeGenerativeModel(**{**self._settings(), "system_instruction": system_instruction})
+
+    def start_chat(self, args: dict = None) -> "FakeChatSession":
+        return FakeChatSession(self)
+
+    def to_json(self) -> dict:
+        return {"model_name": "fake", **self._settings()}
+
+    @staticmethod
+    def from_json(json: dict) -> "FakeGenerativeModel":
+        return FakeGenerativeModel(**{k: v for k, v in json.items() if k != "model_name"})
+
+    def respond(self, message: str) -> GenerationResponse:
+        """
+        Produce the response to a prompt.
+
+        Args:
+            message (str): Prompt
+
+        Returns:
+            GenerationResponse: Synthetic ontology as JSON
+
+        Raises:
+            Exception: For the share of prompts selected by error_rate
+        """
+        rng = random.Random(text_digest(str(self.seed), message))
+        prefill = self.token_latency * estimate_tokens(message) / 1000
+        time.sleep(max(0.0, self.latency + prefill + rng.uniform(-self.jitter, self.jitter)))
+
+        if rng.random() < self.error_rate:
+            raise Exception("500 internal server error")
+
+        # The fix-up call returns nothing new, so the merged ontology is kept as is
+        if message.startswith(FIX_ONTOLOGY_PROMPT[:40]):
+            return GenerationResponse(json.dumps({"entities": [], "relations": []}), FinishReason.STOP)
+
+        def attributes():
+            return [
+                {"name": f"attr{rng.randrange(30)}", "type": "string", "unique": False, "required": False}
+                for _ in range(self.attributes)
+            ]
+
+        labels = [f"Entity{rng.randrange(self.labels)}" for _ in range(self.entities)]
+        ontology = {
+            "entities": [{"label": label, "attributes": attributes(), "description": ""} for label in labels],
+            "relations": [
+                {
+                    "label": f"REL{rng.randrange(self.labels)}",
+                    "source": {"label": rng.choice(labels)},
+                    "target": {"label": rng.choice(labels)},
+                    "attributes": attributes()
+                }
+                for _ in range(self.relations)
+            ]
+        }
+        return GenerationResponse(json.dumps(ontology), FinishReason.STOP)
+
+    def _settings(self) -> dict:
+        return {
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "entities": self.entities,
+            "relations": self.relations,
+            "attributes": self.attributes,
+            "labels": self.labels,
+            "seed": self.seed,
+            "token_latency": self.token_latency,
+            "system_instruction": self.system_instruction
+        }
+
+
+class FakeChatSession(GenerativeModelChatSession):
+    """
+    Chat session of FakeGenerativeModel.
+    """
+
+    def __init__(self, model: FakeGenerativeModel) -> None:
+        self._model = model
+        self._history = []
+
+    def send_message(self, message: str, output_method: OutputMethod = OutputMethod.DEFAULT) -> GenerationResponse:
+        response = self._model.respond(message)
+        self._history.append({"role": "user", "content": message})
+        self._history.append({"role": "assistant", "content": response.text})
+        return response
@@ -3,8 +3,10 @@ from dotenv import load_dotenv
 from graphrag_sdk import KnowledgeGraph
 from graphrag_sdk.models.openai import OpenAiGenerativeModel
 from graphrag_sdk.model_config import KnowledgeGraphModelConfig
+from src.cache.blob_cache import BlobCache
 from src.sources.unstructured_source import UnstructuredSource
 from src.ontology.ontology_hub import OntologyHub
+from src.steps.concurrent_extract_data_step import ConcurrentExtractDataStep
 
 def main():
     """
@@ -14,14 +16,28 @@ def main():
     source_dir = './tests/data'
     source_paths = [os.path.join(source_dir, path) 
                    for path in os.listdir(source_dir)]
-    sources = [UnstructuredSource(path=path) for path in source_paths]
+    
+    # Partition results are shared between runs and between the ontology and graph phases
+    partition_cache = BlobCache('./.cache/partitions.sqlite')
+    sources = [UnstructuredSource(path=path, cache=partition_cache) for path in source_paths]
     
     # Initialize model and ontology hub
     model = OpenAiGenerativeModel(model_name='gpt-4o-mini')
     ontology_file = "ontology-output.json"
     
-    # Create and extend ontology
-    ontology_hub = OntologyHub(model=model)
+    # Create and extend ontology, replaying LLM responses cached by earlier runs
+    response_cache = BlobCache('./.cache/responses.sqlite', ttl=30 * 24 * 3600)
+    # Documents that fail for good are listed for OntologyHub.retry_dead_letters
+    ontology_hub = OntologyHub(model=model, config={
+        "response_cache": response_cache,
+        "dead_letter_file": "./logs/dead-letter.jsonl"
+    })
+    
+    # Continue from the saved ontology so only new or changed files are processed.
+    # Without its manifest, the sources it was built from are unknown and would be
+    # extracted into it a second time, so the run starts from an empty ontology instead.
+    if os.path.exists(ontology_file) and os.path.exists(OntologyHub._manifest_path(ontology_file)):
+        ontology_hub.load_json(ontology_file)
     ontology_hub.extend_ontology(sources)
     
     # Save ontology to disk
@@ -34,8 +50,15 @@ def main():
         ontology=ontology_hub.get_ontology(),
     )
     
-    # Process sources
-    kg.process_sources(ontology_hub._sources)
+    # Populate the graph through the same loading and extraction pipeline
+    ConcurrentExtractDataStep(
+        sources=ontology_hub._sources,
+        ontology=kg.ontology,
+        model=KnowledgeGraphModelConfig.with_model(model).extract_data,
+        graph=kg.graph,
+        config={**OntologyHub.default_config, "max_workers": 16, "response_cache": response_cache}
+    ).run()
+    kg.sources.update(ontology_hub._sources)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+import os
+import signal
+import argparse
+from threading import Event
+from dotenv import load_dotenv
+from graphrag_sdk.models.openai import OpenAiGenerativeModel
+from src.cache.blob_cache import BlobCache
+from src.sources.unstructured_source import UnstructuredSource
+from src.ontology.ontology_hub import OntologyHub
+
+def main():
+    """
+    Long-running ingestion service: watches directories and extends the
+    ontology as files are added or changed, until interrupted.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("directories", nargs="+", help="Directories to watch, e.g. a file-drop folder")
+    parser.add_argument("--ontology", default="ontology-output.ontology",
+                        help="Snapshot file of the ontology, compact unless it ends with .json")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--snapshot-interval", type=float, default=300, help="Seconds between snapshots")
+    parser.add_argument("--debounce", type=float, default=5.0, help="Seconds a file must stay unchanged")
+    parser.add_argument("--dead-letters", default="./logs/dead-letter.jsonl", help="File listing documents that failed")
+    args = parser.parse_args()
+
+    # Partition results and LLM responses are shared with batch runs
+    partition_cache = BlobCache('./.cache/partitions.sqlite')
+    response_cache = BlobCache('./.cache/responses.sqlite', ttl=30 * 24 * 3600)
+
+    model = OpenAiGenerativeModel(model_name='gpt-4o-mini')
+    ontology_hub = OntologyHub(model=model, config={
+        "response_cache": response_cache,
+        "snapshot_interval": args.snapshot_interval,
+        "watch_debounce": args.debounce,
+        "dead_letter_file": args.dead_letters
+    })
+
+    # Continue from the last snapshot so files ingested before a restart are skipped
+    if os.path.exists(args.ontology):
+        ontology_hub.load(args.ontology)
+
+    # Submitted files are finished and a last snapshot saved before exiting
+    stop = Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    ontology_hub.watch(
+        args.directories,
+        args.ontology,
+        workers=args.workers,
+        source_factory=lambda path: UnstructuredSource(path=path, cache=partition_cache),
+        stop=stop
+    )
+
+if __name__ == '__main__':
+    load_dotenv()
+    main()
@@ -0,0 +1,173 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Optional
+
+class BlobCache:
+    """
+    Persistent key-value cache for binary blobs backed by SQLite.
+    Values are stored compressed and the least recently used entries
+    are evicted once the total stored size exceeds the configured limit.
+    Entries older than the optional time-to-live are treated as missing.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30, ttl: Optional[float] = None) -> None:
+        """
+        Initialize the BlobCache.
+
+        Args:
+            path (str): Path to the SQLite database file
+            max_bytes (int, optional): Upper bound for the total compressed size. Defaults to 1 GiB.
+            ttl (float, optional): Seconds an entry stays valid after it is stored. Defaults to no expiry.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value from the cache and mark it as recently used.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[bytes]: Stored value or None if the key is missing
+        """
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, key)
+            )
+            conn.commit()
+        return zlib.decompress(row[0])
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store a value in the cache, evicting old entries if needed.
+
+        Args:
+            key (str): Cache key
+            value (bytes): Value to store
+        """
+        blob = zlib.compress(value)
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed, created) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a value from the cache.
+
+        Args:
+            key (str): Cache key
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+    def size(self) -> int:
+        """
+        Get the total compressed size of the stored values.
+
+        Returns:
+            int: Size in bytes
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return row[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return row[0]
+
+    def __getstate__(self) -> dict:
+        # Connections and locks cannot cross process boundaries
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_pid'] = None
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop the least recently used entries until the cache fits again
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def _connection(self) -> sqlite3.Connection:
+        # A forked child must not reuse the connection opened by its parent
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL, created REAL NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+            if "created" not in columns:
+                # Databases written before expiry support count as created at the epoch
+                self._conn.execute("ALTER TABLE entries ADD COLUMN created REAL NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
@@ -0,0 +1,116 @@
+import os
+import json
+from typing import Iterable, Optional, Set
+from graphrag_sdk import Ontology
+
+class RunJournal:
+    """
+    Local journal of an ontology creation run.
+    Stores periodic snapshots of the merged ontology together with the IDs
+    of the document pieces it already contains, so an interrupted run can
+    resume without sending those pieces to the model again.
+    """
+
+    snapshot_file = "ontology.json"
+    completed_file = "completed.log"
+    fixed_file = "fixed.json"
+
+    def __init__(self, directory: str) -> None:
+        """
+        Initialize RunJournal.
+
+        Args:
+            directory (str): Directory holding the journal files
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def load_snapshot(self) -> Optional[Ontology]:
+        """
+        Load the last merged ontology snapshot.
+
+        Returns:
+            Optional[Ontology]: Snapshot, or None if the journal is empty
+        """
+        return self._read_ontology(self.snapshot_file)
+
+    def load_fixed(self) -> Optional[Ontology]:
+        """
+        Load the ontology saved after the final fix-up call.
+
+        Returns:
+            Optional[Ontology]: Fixed ontology, or None if the run never got that far
+        """
+        return self._read_ontology(self.fixed_file)
+
+    def completed_ids(self) -> Set[str]:
+        """
+        Get the IDs of the document pieces contained in the last snapshot.
+
+        Returns:
+            Set[str]: Completed piece IDs
+        """
+        path = os.path.join(self.directory, self.completed_file)
+        if not os.path.exists(path):
+            return set()
+        with open(path, "r", encoding="utf-8") as file:
+            return {line.strip() for line in file if line.strip()}
+
+    def checkpoint(self, ontology: Ontology, ids: Iterable[str]) -> None:
+        """
+        Save a snapshot and mark the pieces merged into it as completed.
+
+        The snapshot is replaced atomically before the IDs are appended, so a
+        crash in between only causes those pieces to be processed again.
+
+        Args:
+            ontology (Ontology): Merged ontology
+            ids (Iterable[str]): IDs of the pieces merged since the last checkpoint
+        """
+        self._write_ontology(self.snapshot_file, ontology)
+        # Any change after the fix-up makes the saved fixed ontology stale
+        self._remove(self.fixed_file)
+
+        ids = list(ids)
+        if ids:
+            with open(os.path.join(self.directory, self.completed_file), "a", encoding="utf-8") as file:
+                file.write("".join(f"{id}\n" for id in ids))
+                file.flush()
+                os.fsync(file.fileno())
+
+    def mark_fixed(self, ontology: Ontology) -> None:
+        """
+        Save the ontology returned by the final fix-up call.
+
+        Args:
+            ontology (Ontology): Fixed ontology
+        """
+        self._write_ontology(self.fixed_file, ontology)
+
+    def clear(self) -> None:
+        """
+        Remove the journal files, leaving anything else in the directory untouched.
+        """
+        for name in (self.snapshot_file, self.completed_file, self.fixed_file):
+            self._remove(name)
+            self._remove(name + ".tmp")
+
+    def _read_ontology(self, name: str) -> Optional[Ontology]:
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as file:
+            return Ontology.from_json(json.loads(file.read()))
+
+    def _write_ontology(self, name: str, ontology: Ontology) -> None:
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            file.write(json.dumps(ontology.to_json()))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _remove(self, name: str) -> None:
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,219 @@
+import threading
+from typing import Iterable, Iterator, List
+from graphrag_sdk.document import Document
+from ..utils.hashing import text_digest
+from ..utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+class DocumentChunk(Document):
+    """
+    Document holding one or more pieces of source text.
+    Every piece carries a stable ID derived from its source path and content,
+    so the same text maps to the same IDs across runs.
+    """
+
+    def __init__(self, content: str, ids: List[str], sources: List[str], instruction: str = None) -> None:
+        """
+        Initialize DocumentChunk.
+
+        Args:
+            content (str): Text of the chunk
+            ids (List[str]): IDs of the pieces packed into the chunk
+            sources (List[str]): Paths of the sources the pieces come from
+            instruction (str, optional): Extraction instruction shared by those sources. Defaults to None.
+        """
+        super().__init__(content)
+        self.ids = ids
+        self.sources = sources
+        self.instruction = instruction
+
+    @property
+    def id(self) -> str:
+        """
+        Get the ID of the chunk.
+
+        Returns:
+            str: Piece ID for single-piece chunks, otherwise a digest of the piece IDs
+        """
+        return self.ids[0] if len(self.ids) == 1 else text_digest(*self.ids)
+
+    @staticmethod
+    def from_document(document: Document, source: str, instruction: str = None) -> 'DocumentChunk':
+        """
+        Wrap a loaded document as a single-piece chunk.
+
+        Args:
+            document (Document): Loaded document
+            source (str): Path of the source the document comes from
+            instruction (str, optional): Extraction instruction of the source. Defaults to None.
+
+        Returns:
+            DocumentChunk: Chunk holding the whole document
+        """
+        return DocumentChunk(document.content, [text_digest(source, document.content)], [source], instruction)
+
+
+class DocumentChunker:
+    """
+    Splits large documents on element boundaries and packs small ones together,
+    so each extraction prompt stays close to a target token budget.
+    """
+
+    # Separator between elements, as produced by UnstructuredLoader
+    element_separator = "\n"
+
+    # Element category starting a new section
+    section_category = "Title"
+
+    # Separator between documents packed into one chunk
+    document_separator = "\n\n"
+
+    def __init__(self, max_tokens: int = 3000, chars_per_token: float = CHARS_PER_TOKEN) -> None:
+        """
+        Initialize DocumentChunker.
+
+        Args:
+            max_tokens (int, optional): Token budget per chunk. Defaults to 3000, which keeps
+                the prompt under the message length the GraphRAG-SDK models accept.
+            chars_per_token (float, optional): Average characters per token. Defaults to 4.
+        """
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self._buffer: List[DocumentChunk] = []
+        self._buffer_tokens = 0
+        self._lock = threading.Lock()
+
+    def split(self, document: Document, source: str, instruction: str = None) -> List[DocumentChunk]:
+        """
+        Split a document into chunks that fit the token budget.
+
+        Args:
+            document (Document): Document to split
+            source (str): Path of the source the document comes from
+            instruction (str, optional): Extraction instruction of the source. Defaults to None.
+
+        Returns:
+            List[DocumentChunk]: Chunks in document order
+        """
+        if self._tokens(document.content) <= self.max_tokens:
+            return [DocumentChunk.from_document(document, source, instruction)]
+
+        separator_tokens = self._tokens(self.element_separator)
+        chunks = []
+        current, current_tokens = [], 0
+        for element, starts_section in self._elements(document):
+            tokens = self._tokens(element) + (separator_tokens if current else 0)
+            # Cut at a section title once the chunk is half full, otherwise only when it is full
+            if current and (
+                current_tokens + tokens > self.max_tokens
+                or (starts_section and current_tokens >= self.max_tokens // 2)
+            ):
+                chunks.append(self._piece(current, source, len(chunks), instruction))
+                current, current_tokens = [], 0
+                tokens = self._tokens(element)
+            current.append(element)
+            current_tokens += tokens
+
+        if current:
+            chunks.append(self._piece(current, source, len(chunks), instruction))
+        return chunks
+
+    def add(self, chunk: DocumentChunk) -> List[DocumentChunk]:
+        """
+        Feed a chunk to the packer.
+
+        Args:
+            chunk (DocumentChunk): Chunk to pack
+
+        Returns:
+            List[DocumentChunk]: Chunks that are ready to be processed
+        """
+        tokens = self._tokens(chunk.content)
+        with self._lock:
+            # Chunks that already fill most of the budget are not worth packing
+            if tokens >= self.max_tokens // 2:
+                return [chunk]
+
+            ready = []
+            # Pieces are only packed with pieces that share their source instruction
+            if self._buffer and (
+                self._buffer_tokens + self._tokens(self.document_separator) + tokens > self.max_tokens
+                or self._buffer[0].instruction != chunk.instruction
+            ):
+                ready.append(self._drain())
+            if self._buffer:
+                tokens += self._tokens(self.document_separator)
+            self._buffer.append(chunk)
+            self._buffer_tokens += tokens
+            return ready
+
+    def flush(self) -> List[DocumentChunk]:
+        """
+        Release the chunks that are still waiting to be packed.
+
+        Returns:
+            List[DocumentChunk]: Remaining packed chunk, if any
+        """
+        with self._lock:
+            return [self._drain()] if self._buffer else []
+
+    def chunk(self, document: Document, source: str) -> List[DocumentChunk]:
+        """
+        Split a document and feed the pieces to the packer.
+
+        Args:
+            document (Document): Document to chunk
+            source (str): Path of the source the document comes from
+
+        Returns:
+            List[DocumentChunk]: Chunks that are ready to be processed
+        """
+        return [ready for piece in self.split(document, source) for ready in self.add(piece)]
+
+    def chunk_all(self, documents: Iterable[tuple]) -> Iterator[DocumentChunk]:
+        """
+        Chunk and pack a stream of documents.
+
+        Args:
+            documents (Iterable[tuple]): Pairs of (document, source path)
+
+        Returns:
+            Iterator[DocumentChunk]: Packed chunks
+        """
+        for document, source in documents:
+            yield from self.chunk(document, source)
+        yield from self.flush()
+
+    def _drain(self) -> DocumentChunk:
+        chunk = DocumentChunk(
+            self.document_separator.join(piece.content for piece in self._buffer),
+            [id for piece in self._buffer for id in piece.ids],
+            list(dict.fromkeys(source for piece in self._buffer for source in piece.sources)),
+            self._buffer[0].instruction
+        )
+        self._buffer, self._buffer_tokens = [], 0
+        return chunk
+
+    def _elements(self, document: Document) -> Iterator[tuple]:
+        max_chars = int(self.max_tokens * self.chars_per_token)
+        elements = document.content.split(self.element_separator)
+        categories = getattr(document, "categories", None) or []
+        # Categories are only usable when they line up with the elements
+        if len(categories) != len(elements):
+            categories = [None] * len(elements)
+
+        for element, category in zip(elements, categories):
+            starts_section = category == self.section_category
+            # A single oversized element is cut at whitespace near the budget
+            while len(element) > max_chars:
+                cut = element.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                yield element[:cut], starts_section
+                element, starts_section = element[cut:].lstrip(), False
+            yield element, starts_section
+
+    def _piece(self, elements: List[str], source: str, index: int, instruction: str) -> DocumentChunk:
+        content = self.element_separator.join(elements)
+        return DocumentChunk(content, [text_digest(source, str(index), content)], [source], instruction)
+
+    def _tokens(self, text: str) -> int:
+        return estimate_tokens(text, self.chars_per_token)
@@ -0,0 +1,109 @@
+import zlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Mersenne prime used as the modulus of the MinHash permutations
+_PRIME = (1 << 61) - 1
+# Shingles hashed per block, to bound the size of the permutation matrix
+_BLOCK = 4096
+
+class NearDuplicateFilter:
+    """
+    Detects near-duplicate documents with MinHash signatures over word shingles,
+    indexed with locality-sensitive hashing so each document is only compared
+    with the few earlier documents sharing a band of its signature.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_words: int = 5, seed: int = 0) -> None:
+        """
+        Initialize NearDuplicateFilter.
+
+        Args:
+            threshold (float, optional): Estimated Jaccard similarity at or above which
+                a document is a duplicate. Defaults to 0.9.
+            num_perm (int, optional): MinHash permutations per signature. Defaults to 128.
+            shingle_words (int, optional): Words per shingle. Defaults to 5.
+            seed (int, optional): Seed of the permutations. Defaults to 0.
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        self.bands, self.rows = self._band_layout(threshold, num_perm)
+        rng = np.random.RandomState(seed)
+        # (a * x + b) stays below 2**64 for 32-bit shingle hashes
+        self._a = rng.randint(1, 1 << 31, size=(num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=(num_perm, 1)).astype(np.uint64)
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Register a document unless it is a near-duplicate of one registered before.
+
+        Args:
+            key (str): ID of the document
+            text (str): Cleaned text of the document
+
+        Returns:
+            Optional[Tuple[str, float]]: ID of the most similar earlier document and the
+                estimated similarity when the document is a duplicate, otherwise None
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        bands = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        with self._lock:
+            candidates = {other for band, buckets in zip(bands, self._buckets) for other in buckets.get(band, ())}
+            best = None
+            for other in candidates:
+                similarity = float(np.mean(self._signatures[other] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (other, similarity)
+            if best is not None:
+                return best
+
+            self._signatures[key] = signature
+            for band, buckets in zip(bands, self._buckets):
+                buckets.setdefault(band, []).append(key)
+        return None
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text (str): Text to sign
+
+        Returns:
+            Optional[np.ndarray]: Signature of num_perm values, or None for a text without words
+        """
+        shingles = self._shingles(text)
+        if shingles.size == 0:
+            return None
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, shingles.size, _BLOCK):
+            block = shingles[start:start + _BLOCK]
+            np.minimum(signature, ((self._a * block + self._b) % _PRIME).min(axis=1), out=signature)
+        return signature
+
+    def _shingles(self, text: str) -> np.ndarray:
+        # Word hashes are combined into a rolling hash of each run of shingle_words words
+        words = text.lower().split()
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+        hashes = np.array([zlib.crc32(word.encode("utf-8")) for word in words], dtype=np.uint64)
+        width = min(self.shingle_words, len(words))
+        count = len(words) - width + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(width):
+            shingles = (shingles * np.uint64(1000003) + hashes[offset:offset + count]) & np.uint64(0xFFFFFFFF)
+        return np.unique(shingles)
+
+    @staticmethod
+    def _band_layout(threshold: float, num_perm: int) -> Tuple[int, int]:
+        # Bands and rows whose S-curve crosses 1/2 closest to the threshold
+        layouts = [(bands, num_perm // bands) for bands in range(1, num_perm + 1)]
+        return min(layouts, key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - threshold))
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import tempfile
+from typing import List
+from ..llm.rate_limiter import is_rate_limit_error
+
+# Kinds of document failures
+PARSE_ERROR = "parse"
+LLM_TIMEOUT = "llm_timeout"
+RATE_LIMIT = "rate_limit"
+MALFORMED_JSON = "malformed_json"
+OTHER_ERROR = "error"
+
+# Failures that may not happen again when the same call is repeated a little later
+TRANSIENT_ERRORS = frozenset({LLM_TIMEOUT, RATE_LIMIT, MALFORMED_JSON})
+
+class MalformedResponseError(Exception):
+    """
+    Raised when a model response cannot be read as an ontology, even after
+    the model was asked to fix its JSON.
+    """
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify an exception raised while extracting a document.
+
+    Args:
+        error (Exception): Exception raised by the extraction
+
+    Returns:
+        str: RATE_LIMIT, LLM_TIMEOUT, MALFORMED_JSON or OTHER_ERROR
+    """
+    if is_rate_limit_error(error):
+        return RATE_LIMIT
+    # Provider clients raise their own timeout types, e.g. APITimeoutError or ReadTimeout
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__ or "timed out" in str(error).lower():
+        return LLM_TIMEOUT
+    if isinstance(error, (MalformedResponseError, json.JSONDecodeError)):
+        return MALFORMED_JSON
+    return OTHER_ERROR
+
+
+class FailedDocument:
+    """
+    Message sent downstream in place of an ontology part whose extraction failed
+    for good, or of the documents of a source that could not be loaded, so its
+    sources count as failed and the failure reaches the dead-letter file.
+    """
+
+    def __init__(self, ids: List[str], sources: List[str], stage: str, kind: str, error: str, attempts: int = 1):
+        """
+        Initialize FailedDocument.
+
+        Args:
+            ids (List[str]): IDs of the failed pieces, empty for a source that could not be loaded
+            sources (List[str]): Paths of the sources the pieces come from
+            stage (str): Stage the failure happened in, "loading" or "extraction"
+            kind (str): Failure kind, e.g. PARSE_ERROR or LLM_TIMEOUT
+            error (str): Error description
+            attempts (int, optional): Attempts made. Defaults to 1.
+        """
+        self.ids = ids
+        self.sources = sources
+        self.stage = stage
+        self.kind = kind
+        self.error = error
+        self.attempts = attempts
+
+    @classmethod
+    def from_exception(cls, ids: List[str], sources: List[str], stage: str, error: Exception, attempts: int = 1) -> 'FailedDocument':
+        """
+        Build the failure of an extraction that raised an exception.
+
+        Args:
+            ids (List[str]): IDs of the failed pieces
+            sources (List[str]): Paths of the sources the pieces come from
+            stage (str): Stage the failure happened in
+            error (Exception): Exception raised
+            attempts (int, optional): Attempts made. Defaults to 1.
+
+        Returns:
+            FailedDocument: Failure classified with classify_error
+        """
+        return cls(ids, sources, stage, classify_error(error), f"{type(error).__name__}: {error}", attempts)
+
+    def to_json(self) -> dict:
+        return {
+            "ids": self.ids,
+            "sources": self.sources,
+            "stage": self.stage,
+            "kind": self.kind,
+            "error": self.error,
+            "attempts": self.attempts
+        }
+
+
+class DeadLetterFile:
+    """
+    JSON lines file of the documents that failed for good, one record per failure.
+    The sources it lists can be run again on their own with OntologyHub.retry_dead_letters.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize DeadLetterFile.
+
+        Args:
+            path (str): File path, created with its directory on the first failure
+        """
+        self.path = path
+
+    def append(self, failure: FailedDocument) -> None:
+        """
+        Record a failure.
+
+        Args:
+            failure (FailedDocument): Failure to record
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **failure.to_json()}
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def records(self) -> List[dict]:
+        """
+        Read the recorded failures.
+
+        Returns:
+            List[dict]: Records in the order they were written, empty if the file does not exist
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    @staticmethod
+    def sources(records: List[dict]) -> List[str]:
+        """
+        List the sources of failure records.
+
+        Args:
+            records (List[dict]): Records read with records()
+
+        Returns:
+            List[str]: Source paths, each once, in the order they first failed
+        """
+        return list(dict.fromkeys(source for record in records for source in record["sources"]))
+
+    def drop(self, count: int) -> None:
+        """
+        Remove the oldest records, e.g. once their sources were run again.
+        Records written meanwhile are kept.
+
+        Args:
+            count (int): Number of records to remove
+        """
+        remaining = self.records()[count:]
+        # Replaced in one step, so a crash leaves either the old or the new file
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.writelines(json.dumps(record) + "\n" for record in remaining)
+        os.replace(temporary, self.path)
@@ -0,0 +1,90 @@
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable
+from ..llm.rate_limiter import backoff_delay
+
+class RetryQueue:
+    """
+    Side queue of work that failed with a transient error. Items wait out a
+    jittered exponential backoff here, without holding a worker thread, and a
+    background thread hands each one back to the submit function once it is due.
+    """
+
+    def __init__(
+        self,
+        submit: Callable[..., None],
+        max_attempts: int = 3,
+        base_delay: float = 5.0,
+        max_delay: float = 120.0
+    ) -> None:
+        """
+        Initialize RetryQueue.
+
+        Args:
+            submit (Callable[..., None]): Called with the arguments of a due item followed by the
+                number of its next attempt. It runs on the queue's thread and may block.
+            max_attempts (int, optional): Attempts allowed per item, the first included. Defaults to 3.
+            base_delay (float, optional): Delay before the first retry in seconds. Defaults to 5.
+            max_delay (float, optional): Upper bound of a delay in seconds. Defaults to 120.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._submit = submit
+        # (due time, insertion order, next attempt, arguments)
+        self._heap = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def schedule(self, attempts: int, *args) -> bool:
+        """
+        Queue an item for another attempt.
+
+        Args:
+            attempts (int): Attempts made so far
+            *args: Arguments passed to submit
+
+        Returns:
+            bool: False, with nothing queued, once the item has had max_attempts attempts
+        """
+        if attempts >= self.max_attempts:
+            return False
+        due = time.monotonic() + backoff_delay(attempts - 1, self.base_delay, self.max_delay)
+        with self._condition:
+            if self._closed:
+                return False
+            heapq.heappush(self._heap, (due, next(self._order), attempts + 1, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return True
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def close(self) -> None:
+        """
+        Stop the background thread. Items still waiting are dropped.
+        """
+        with self._condition:
+            self._closed = True
+            self._heap = []
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._closed:
+                    return
+                _, _, attempt, args = heapq.heappop(self._heap)
+            self._submit(*args, attempt)
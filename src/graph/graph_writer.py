@@ -0,0 +1,75 @@
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# FalkorDB command used to run a Cypher query
+GRAPH_QUERY_CMD = "GRAPH.QUERY"
+
+class GraphBatchWriter:
+    """
+    Buffers graph queries and writes them in batches.
+    On FalkorDB a batch is sent as a single MULTI/EXEC transaction, which
+    replaces one network round trip per query with one per batch. Queries
+    keep their order, so relations still follow the entities they match.
+    """
+
+    def __init__(self, graph, batch_size: int = 100) -> None:
+        """
+        Initialize GraphBatchWriter.
+
+        Args:
+            graph: FalkorDB graph, or any object with a query method
+            batch_size (int, optional): Queries per batch. Defaults to 100.
+        """
+        self.graph = graph
+        self.batch_size = batch_size
+        self.written = 0
+        self.failed = 0
+        self._buffer: List[str] = []
+
+    def add(self, queries: List[str]) -> None:
+        """
+        Queue queries, writing full batches.
+
+        Args:
+            queries (List[str]): Cypher queries in execution order
+        """
+        self._buffer.extend(queries)
+        while len(self._buffer) >= self.batch_size:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            self._write(batch)
+
+    def flush(self) -> None:
+        """
+        Write the queries still buffered.
+        """
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._write(batch)
+
+    def _write(self, batch: List[str]) -> None:
+        # falkordb.Graph.client is the FalkorDB wrapper; the redis client sits behind it
+        connection = getattr(getattr(self.graph, "client", None), "connection", None)
+        if connection is None or not hasattr(connection, "pipeline"):
+            for query in batch:
+                self._run(query)
+            return
+
+        pipe = connection.pipeline(transaction=True)
+        for query in batch:
+            pipe.execute_command(GRAPH_QUERY_CMD, self.graph.name, query, "--compact")
+        for query, result in zip(batch, pipe.execute(raise_on_error=False)):
+            if isinstance(result, Exception):
+                self.failed += 1
+                logger.error(f"Error writing to graph: {result} ({query})")
+            else:
+                self.written += 1
+
+    def _run(self, query: str) -> None:
+        try:
+            self.graph.query(query)
+            self.written += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error writing to graph: {e} ({query})")
@@ -0,0 +1,33 @@
+from typing import List
+
+class LocalGraph:
+    """
+    In-process stand-in for a FalkorDB graph.
+    Records every query it receives instead of running it. Extraction uses it
+    to collect the queries built by the GraphRAG-SDK code, and tests use it
+    to populate a graph without a database.
+    """
+
+    def __init__(self, name: str = "local_graph") -> None:
+        """
+        Initialize LocalGraph.
+
+        Args:
+            name (str, optional): Graph name. Defaults to "local_graph".
+        """
+        self.name = name
+        self.queries: List[str] = []
+
+    def query(self, q: str, params: dict = None, timeout: int = None):
+        """
+        Record a query.
+
+        Args:
+            q (str): Cypher query
+            params (dict, optional): Query parameters, ignored
+            timeout (int, optional): Query timeout, ignored
+
+        Returns:
+            None
+        """
+        self.queries.append(q)
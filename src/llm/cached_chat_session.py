@@ -0,0 +1,90 @@
+import json
+from typing import Callable, List, Optional
+from graphrag_sdk.models import (
+    GenerativeModel,
+    GenerativeModelChatSession,
+    GenerationResponse,
+    FinishReason
+)
+from graphrag_sdk.models.model import OutputMethod
+from ..cache.blob_cache import BlobCache
+from ..utils.hashing import text_digest
+
+class CachedChatSession(GenerativeModelChatSession):
+    """
+    Chat session that answers from a persistent response cache when possible.
+    Entries are keyed on the model configuration and the whole conversation,
+    so follow-up messages such as "continue" only hit for the same history.
+    """
+
+    # Only complete or length-capped responses are worth replaying
+    cacheable = (FinishReason.STOP, FinishReason.MAX_TOKENS)
+
+    # Attributes holding the role/content transcript of the GraphRAG-SDK sessions
+    history_attributes = ("_history", "_chat_history")
+
+    def __init__(
+        self,
+        chat_session: GenerativeModelChatSession,
+        model: GenerativeModel,
+        cache: BlobCache,
+        send: Callable[[str, OutputMethod], GenerationResponse] = None
+    ) -> None:
+        """
+        Initialize CachedChatSession.
+
+        Args:
+            chat_session (GenerativeModelChatSession): Session used on cache misses
+            model (GenerativeModel): Model the session belongs to
+            cache (BlobCache): Persistent response cache
+            send (Callable[[str, OutputMethod], GenerationResponse], optional): Function sending
+                a message on the session, e.g. through a rate limiter. Defaults to chat_session.send_message.
+        """
+        self._chat_session = chat_session
+        self._cache = cache
+        self._send = send or chat_session.send_message
+        self._model_key = json.dumps(model.to_json(), sort_keys=True, default=str)
+        self._history: List[str] = []
+        self._transcript = self._find_transcript(chat_session)
+
+    def send_message(self, message: str, output_method: OutputMethod = OutputMethod.DEFAULT) -> GenerationResponse:
+        """
+        Send a message, or replay the cached response to it.
+
+        Args:
+            message (str): Message to send
+            output_method (OutputMethod, optional): Requested output format. Defaults to DEFAULT.
+
+        Returns:
+            GenerationResponse: Model response
+        """
+        # Without access to its transcript, the session could not continue from cached turns
+        if self._transcript is None:
+            return self._send(message, output_method)
+
+        key = text_digest(self._model_key, str(output_method), *self._history, message)
+        cached = self._cache.get(key)
+
+        if cached is not None:
+            data = json.loads(cached)
+            response = GenerationResponse(data["text"], data["finish_reason"])
+            # The underlying session continues from the cached answer, as if it had given it
+            self._transcript.append({"role": "user", "content": message})
+            self._transcript.append({"role": "assistant", "content": response.text})
+        else:
+            response = self._send(message, output_method)
+            if response.finish_reason in self.cacheable:
+                self._cache.set(key, json.dumps({
+                    "text": response.text,
+                    "finish_reason": response.finish_reason
+                }).encode('utf-8'))
+
+        self._history.extend([message, response.text])
+        return response
+
+    def _find_transcript(self, chat_session: GenerativeModelChatSession) -> Optional[list]:
+        for attribute in self.history_attributes:
+            transcript = getattr(chat_session, attribute, None)
+            if isinstance(transcript, list):
+                return transcript
+        return None
@@ -0,0 +1,223 @@
+import re
+import time
+import random
+import threading
+from typing import Any, Callable, Optional
+from ..utils.tokens import estimate_tokens
+from ..metrics.pipeline_metrics import PipelineMetrics
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate.
+    Reservations may overdraw the bucket; the caller then waits until it refills.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initialize TokenBucket.
+
+        Args:
+            rate (float): Units added per second
+            capacity (float): Maximum number of units held
+            clock (Callable[[], float], optional): Time source. Defaults to time.monotonic.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._level = capacity
+        self._updated = clock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take units from the bucket.
+
+        Args:
+            amount (float): Units to take
+
+        Returns:
+            float: Seconds the caller must wait before using the units
+        """
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+        self._level -= amount
+        return max(0.0, -self._level / self.rate)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter for requests per minute and tokens per minute,
+    shared by every extraction thread of a process.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        """
+        Initialize RateLimiter.
+
+        Args:
+            requests_per_minute (int, optional): Request quota. Defaults to unlimited.
+            tokens_per_minute (int, optional): Token quota. Defaults to unlimited.
+            clock (Callable[[], float], optional): Time source. Defaults to time.monotonic.
+            sleep (Callable[[float], None], optional): Sleep function. Defaults to time.sleep.
+        """
+        self._requests = TokenBucket(requests_per_minute / 60, requests_per_minute, clock) \
+            if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute, clock) \
+            if tokens_per_minute else None
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until a request with the given token count fits the quotas.
+
+        Args:
+            tokens (int, optional): Estimated tokens of the request. Defaults to 0.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        # Sleep outside the lock so other threads can queue their reservations
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Take a request with the given token count from the quotas, without waiting.
+
+        Args:
+            tokens (int, optional): Estimated tokens of the request. Defaults to 0.
+
+        Returns:
+            float: Seconds the caller must wait before sending the request
+        """
+        with self._lock:
+            wait = 0.0
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1))
+            if self._tokens is not None and tokens > 0:
+                wait = max(wait, self._tokens.reserve(tokens))
+        return wait
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose quotas are held by another process, e.g. the channel broker
+    of a run, so every process reserving through it shares one set of quotas.
+    Reservations go to the holder and the wait happens in the calling thread.
+    """
+
+    def __init__(self, holder, sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Initialize SharedRateLimiter.
+
+        Args:
+            holder: RateLimiter, or a proxy of one, whose reserve method is called
+            sleep (Callable[[float], None], optional): Sleep function. Defaults to time.sleep.
+        """
+        self._holder = holder
+        self._sleep = sleep
+
+    def reserve(self, tokens: int = 0) -> float:
+        return self._holder.reserve(tokens)
+
+
+# Rate-limit phrases, or a 429 given as the status of a response, e.g. "Error code: 429";
+# a 429 elsewhere, such as in a document id or a token count, is not a rate limit
+_RATE_LIMIT_MESSAGE = re.compile(
+    r"rate[ _-]?limit|quota exceeded|too many requests|\b(?:status|code|http)\b\W{0,3}(?:code\W{0,3})?429\b",
+    re.IGNORECASE
+)
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Check whether an exception was caused by a provider rate limit.
+
+    Args:
+        error (Exception): Exception raised by a model call
+
+    Returns:
+        bool: True for rate-limit and quota errors
+    """
+    if type(error).__name__ == "RateLimitError" or getattr(error, "status_code", None) == 429:
+        return True
+    return _RATE_LIMIT_MESSAGE.search(str(error)) is not None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, maximum: float = 60.0) -> float:
+    """
+    Compute an exponential backoff delay with full jitter.
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        base (float, optional): Delay of the first attempt in seconds. Defaults to 1.
+        maximum (float, optional): Upper bound in seconds. Defaults to 60.
+
+    Returns:
+        float: Seconds to wait before retrying
+    """
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+def call_with_retry(
+    send: Callable[[], Any],
+    prompt: str,
+    limiter: RateLimiter,
+    config: dict,
+    retries: Optional[int] = None,
+    metrics: Optional[PipelineMetrics] = None
+) -> Any:
+    """
+    Make a model call through a rate limiter, retrying rate-limit errors with jittered backoff.
+
+    Args:
+        send (Callable[[], Any]): Function performing the call
+        prompt (str): Prompt sent by the call, used to estimate its token cost
+        limiter (RateLimiter): Shared rate limiter
+        config (dict): Step configuration (max_retries, retry_base_delay, retry_max_delay)
+        retries (int, optional): Retries allowed. Defaults to the max_retries config value.
+        metrics (PipelineMetrics, optional): Registry receiving call latency, token and wait metrics.
+
+    Returns:
+        Any: Result of the call
+
+    Raises:
+        Exception: If the call fails for another reason or retries are exhausted
+    """
+    retries = retries if retries is not None else config.get("max_retries", 6)
+    attempt = 0
+    tokens = estimate_tokens(prompt)
+    while True:
+        waited = limiter.acquire(tokens)
+        if metrics is not None:
+            metrics.observe("rate_limit_wait_seconds", waited)
+            metrics.increment("llm_calls_total")
+            metrics.increment("llm_prompt_tokens_total", tokens)
+        try:
+            if metrics is None:
+                return send()
+            with metrics.timer("llm_call_seconds"):
+                response = send()
+            metrics.increment("llm_response_tokens_total", estimate_tokens(getattr(response, "text", None) or ""))
+            return response
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= retries:
+                if metrics is not None:
+                    metrics.increment("llm_errors_total")
+                raise
+            if metrics is not None:
+                metrics.increment("llm_retries_total")
+            time.sleep(backoff_delay(
+                attempt,
+                base=config.get("retry_base_delay", 1.0),
+                maximum=config.get("retry_max_delay", 60.0)
+            ))
+            attempt += 1
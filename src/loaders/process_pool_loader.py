@@ -0,0 +1,170 @@
+import os
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Iterator, List, NamedTuple, Optional
+from graphrag_sdk.document import Document
+from graphrag_sdk.source import AbstractSource
+
+class LoadResult(NamedTuple):
+    """
+    Outcome of loading a single source in a worker process.
+    """
+    source: AbstractSource
+    documents: List[Document]
+    error: Optional[str]
+
+
+def _load_worker(conn) -> None:
+    """
+    Worker loop: receive sources, load them and send back the documents.
+
+    Args:
+        conn: Worker side of the pipe connected to the pool
+    """
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        index, source = task
+        try:
+            conn.send((index, list(source.load()), None))
+        except Exception as e:
+            conn.send((index, [], f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """
+    Handle on a single worker process and the task it is running.
+    """
+
+    def __init__(self, context) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_load_worker, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.deadline = None
+
+    def assign(self, index: int, source: AbstractSource, timeout: Optional[float]) -> None:
+        self.task = (index, source)
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.conn.send(self.task)
+
+    def release(self) -> None:
+        self.task = None
+        self.deadline = None
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ProcessPoolLoader:
+    """
+    Loads sources in a pool of worker processes so CPU-bound partitioning
+    scales with cores. Each source runs with an optional timeout, and a worker
+    that hangs or crashes is replaced without affecting the other sources.
+    """
+
+    def __init__(self, workers: int = None, timeout: float = None) -> None:
+        """
+        Initialize the ProcessPoolLoader.
+
+        Args:
+            workers (int, optional): Number of worker processes. Defaults to the CPU count.
+            timeout (float, optional): Seconds allowed per source. Defaults to no limit.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._context = multiprocessing.get_context()
+        self._pool: List[_Worker] = []
+
+    def __enter__(self) -> 'ProcessPoolLoader':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """
+        Start the worker processes if they are not running yet.
+        """
+        while len(self._pool) < self.workers:
+            self._pool.append(_Worker(self._context))
+
+    def close(self) -> None:
+        """
+        Stop all worker processes.
+        """
+        for worker in self._pool:
+            worker.stop()
+        self._pool = []
+
+    def load(self, sources: List[AbstractSource]) -> Iterator[LoadResult]:
+        """
+        Load sources in the worker processes.
+
+        Args:
+            sources (List[AbstractSource]): Sources to load
+
+        Returns:
+            Iterator[LoadResult]: Results in completion order, one per source
+        """
+        self.start()
+        pending = deque(enumerate(sources))
+
+        while pending or any(worker.task is not None for worker in self._pool):
+            for worker in self._pool:
+                if worker.task is None and pending:
+                    worker.assign(*pending.popleft(), self.timeout)
+
+            busy = [worker for worker in self._pool if worker.task is not None]
+            ready = wait(
+                [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                timeout=self._next_timeout(busy)
+            )
+
+            for worker in busy:
+                if worker.conn in ready or worker.process.sentinel in ready:
+                    yield self._collect(worker, sources)
+                elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                    source = worker.task[1]
+                    self._replace(worker)
+                    yield LoadResult(source, [], f"TimeoutError: loading exceeded {self.timeout}s")
+
+    def _collect(self, worker: _Worker, sources: List[AbstractSource]) -> LoadResult:
+        source = worker.task[1]
+        try:
+            index, documents, error = worker.conn.recv()
+            worker.release()
+            if not worker.process.is_alive():
+                self._replace(worker)
+            return LoadResult(sources[index], documents, error)
+        except (EOFError, OSError):
+            # The worker died before sending a result
+            exitcode = worker.process.exitcode
+            self._replace(worker)
+            return LoadResult(source, [], f"WorkerCrashed: exit code {exitcode}")
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        self._pool[self._pool.index(worker)] = _Worker(self._context)
+
+    def _next_timeout(self, busy: List[_Worker]) -> Optional[float]:
+        deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+        if not deadlines:
+            return None
+        return max(0, min(deadlines) - time.monotonic())
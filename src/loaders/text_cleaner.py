@@ -0,0 +1,91 @@
+import re
+from typing import List
+from unstructured.nlp.patterns import (
+    E_BULLET_PATTERN,
+    PARAGRAPH_PATTERN,
+    PARAGRAPH_PATTERN_RE,
+    UNICODE_BULLETS,
+    UNICODE_BULLETS_RE,
+    UNICODE_BULLETS_RE_0W
+)
+
+# Precompiled once, instead of being looked up in the re cache on every call
+_LINE_BREAKS = re.compile(PARAGRAPH_PATTERN)
+_SPACES = re.compile(r"[ ]{2,}")
+_DOTS = re.compile(r"[\.]")
+# Any bullet character, to skip the bullet patterns on text without one
+_ANY_BULLET = re.compile("|".join(UNICODE_BULLETS))
+
+
+def clean_text(text: str) -> str:
+    """
+    Clean an element text with the same output as clean_non_ascii_chars,
+    group_bullet_paragraph, group_broken_paragraphs, clean_extra_whitespace and
+    clean_ordered_bullets applied in turn, skipping the work that cannot change it.
+    The chain raises an IndexError on text that is empty after cleaning; this returns "".
+
+    Args:
+        text (str): Element text
+
+    Returns:
+        str: Cleaned text
+    """
+    # clean_non_ascii_chars, skipped for the common all-ASCII text
+    if not text.isascii():
+        text = text.encode("ascii", "ignore").decode()
+
+    # group_bullet_paragraph: splitting at bullets and joining the parts back is a no-op,
+    # and every line break becomes a space, so the later steps see a single line.
+    # Each pattern only runs when the text holds a character it can match.
+    if text.startswith("e") or "\ne" in text:
+        text = E_BULLET_PATTERN.sub("·", text)
+    text = text.strip()
+    if "\n" in text:
+        text = _LINE_BREAKS.sub(" ", text)
+
+    # group_broken_paragraphs on a single line is a single paragraph
+    stripped = text.strip()
+    if not stripped:
+        return ""
+    if UNICODE_BULLETS_RE.match(stripped) or E_BULLET_PATTERN.match(stripped):
+        parts = [part for part in UNICODE_BULLETS_RE_0W.split(E_BULLET_PATTERN.sub("·", text).strip()) if part]
+    else:
+        lines = PARAGRAPH_PATTERN_RE.split(text) if _ANY_BULLET.search(text) else [text]
+        if all(len(line.strip().split(" ")) < 5 for line in lines):
+            parts = [line for line in lines if line.strip()]
+        else:
+            parts = [text]
+
+    # clean_extra_whitespace: the paragraphs were joined with a line break pair,
+    # which it turns into spaces; the text holds no other line breaks or no-break spaces
+    text = "  ".join(parts)
+    if "  " in text:
+        text = _SPACES.sub(" ", text)
+    text = text.strip()
+
+    # clean_ordered_bullets
+    words = text.split()
+    if not words:
+        return ""
+    if "." not in words[0] or ".." in words[0]:
+        return text
+    bullet = _DOTS.split(words[0])
+    if not bullet[-1]:
+        del bullet[-1]
+    if len(bullet[0]) > 2:
+        return text
+    return " ".join(words[1:])
+
+
+def clean_texts(texts: List[str]) -> List[str]:
+    """
+    Clean a batch of element texts.
+
+    Args:
+        texts (List[str]): Element texts
+
+    Returns:
+        List[str]: Cleaned texts, in the same order
+    """
+    clean = clean_text
+    return [clean(text) for text in texts]
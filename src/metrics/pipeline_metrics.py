@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+class MetricsHook:
+    """
+    Base class for callers that want to observe pipeline metrics as they are recorded,
+    e.g. to drive a profiler. Hooks run in the process and thread doing the work.
+    """
+
+    def on_timer_start(self, name: str) -> None:
+        """
+        Called when a timed section starts.
+
+        Args:
+            name (str): Histogram name
+        """
+
+    def on_timer_end(self, name: str, seconds: float) -> None:
+        """
+        Called when a timed section ends.
+
+        Args:
+            name (str): Histogram name
+            seconds (float): Duration of the section
+        """
+
+    def on_record(self, kind: str, name: str, value: float) -> None:
+        """
+        Called for every recorded value.
+
+        Args:
+            kind (str): "counter", "histogram" or "gauge"
+            name (str): Metric name
+            value (float): Increment, sample or gauge value
+        """
+
+
+class MetricsSnapshot:
+    """
+    Metrics recorded by a stage process, sent to the parent in-band before
+    the stage closes its output queue.
+    """
+
+    def __init__(self, stage: str, counters: dict, histograms: dict, gauges: dict):
+        """
+        Initialize MetricsSnapshot.
+
+        Args:
+            stage (str): Name of the stage that recorded the metrics
+            counters (dict): Counter totals
+            histograms (dict): Histogram samples
+            gauges (dict): Gauge last and maximum values
+        """
+        self.stage = stage
+        self.counters = counters
+        self.histograms = histograms
+        self.gauges = gauges
+
+
+class PipelineMetrics:
+    """
+    Thread-safe registry of counters, histograms and gauges for one pipeline run.
+    Each stage process records into its own child registry and sends it to the
+    parent as a MetricsSnapshot, where the values are aggregated.
+    """
+
+    quantiles = (0.5, 0.9, 0.99)
+
+    def __init__(self, hooks: List[MetricsHook] = None) -> None:
+        """
+        Initialize PipelineMetrics.
+
+        Args:
+            hooks (List[MetricsHook], optional): Observers of recorded values. Defaults to none.
+        """
+        self.hooks = list(hooks or [])
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, List[float]] = {}
+        self._gauges: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def child(self) -> 'PipelineMetrics':
+        """
+        Create an empty registry for a stage process, sharing the hooks.
+
+        Returns:
+            PipelineMetrics: Child registry
+        """
+        return PipelineMetrics(self.hooks)
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        """
+        Attach an observer. Hooks attached before a run starts are inherited by its processes.
+
+        Args:
+            hook (MetricsHook): Observer
+        """
+        self.hooks.append(hook)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Counter name
+            value (float, optional): Increment. Defaults to 1.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        self._notify("counter", name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Add a sample to a histogram.
+
+        Args:
+            name (str): Histogram name
+            value (float): Sample
+        """
+        with self._lock:
+            self._histograms.setdefault(name, []).append(value)
+        self._notify("histogram", name, value)
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge, keeping its maximum.
+
+        Args:
+            name (str): Gauge name
+            value (float): Current value
+        """
+        with self._lock:
+            gauge = self._gauges.setdefault(name, {"last": value, "max": value})
+            gauge["last"] = value
+            gauge["max"] = max(gauge["max"], value)
+        self._notify("gauge", name, value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Time a section into a histogram, in seconds.
+
+        Args:
+            name (str): Histogram name
+        """
+        for hook in self.hooks:
+            hook.on_timer_start(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(name, seconds)
+            for hook in self.hooks:
+                hook.on_timer_end(name, seconds)
+
+    def snapshot(self, stage: str, reset: bool = False) -> MetricsSnapshot:
+        """
+        Copy the recorded values for sending to the parent process.
+
+        Args:
+            stage (str): Name of the recording stage
+            reset (bool, optional): Clear the values once copied, so a long-lived stage can
+                send each value once. Defaults to False.
+
+        Returns:
+            MetricsSnapshot: Recorded values
+        """
+        with self._lock:
+            snapshot = MetricsSnapshot(
+                stage,
+                dict(self._counters),
+                {name: list(samples) for name, samples in self._histograms.items()},
+                {name: dict(gauge) for name, gauge in self._gauges.items()}
+            )
+            if reset:
+                self._counters, self._histograms, self._gauges = {}, {}, {}
+            return snapshot
+
+    def merge(self, snapshot: MetricsSnapshot) -> None:
+        """
+        Aggregate the values recorded by a stage process.
+
+        Args:
+            snapshot (MetricsSnapshot): Values sent by the stage
+        """
+        with self._lock:
+            for name, value in snapshot.counters.items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            for name, samples in snapshot.histograms.items():
+                self._histograms.setdefault(name, []).extend(samples)
+            for name, gauge in snapshot.gauges.items():
+                current = self._gauges.setdefault(name, dict(gauge))
+                current["last"] = gauge["last"]
+                current["max"] = max(current["max"], gauge["max"])
+
+    def report(self) -> dict:
+        """
+        Summarize the recorded values.
+
+        Returns:
+            dict: Counters, histogram statistics (count, sum, max and quantiles), gauges and run time
+        """
+        with self._lock:
+            histograms = {name: self._summary(samples) for name, samples in self._histograms.items()}
+            return {
+                "elapsed_seconds": time.time() - self._started,
+                "counters": dict(self._counters),
+                "histograms": histograms,
+                "gauges": {name: dict(gauge) for name, gauge in self._gauges.items()}
+            }
+
+    def to_prometheus(self, prefix: str = "batch2kg_") -> str:
+        """
+        Render the recorded values in the Prometheus text exposition format.
+        Histograms are exposed as summaries.
+
+        Args:
+            prefix (str, optional): Prefix of every metric name. Defaults to "batch2kg_".
+
+        Returns:
+            str: Exposition text
+        """
+        report = self.report()
+        lines = []
+        for name, value in sorted(report["counters"].items()):
+            lines += [f"# TYPE {prefix}{name} counter", f"{prefix}{name} {value}"]
+        for name, summary in sorted(report["histograms"].items()):
+            lines.append(f"# TYPE {prefix}{name} summary")
+            for q in self.quantiles:
+                lines.append(f'{prefix}{name}{{quantile="{q}"}} {summary[f"p{int(q * 100)}"]}')
+            lines += [f"{prefix}{name}_sum {summary['sum']}", f"{prefix}{name}_count {summary['count']}"]
+        for name, gauge in sorted(report["gauges"].items()):
+            lines += [f"# TYPE {prefix}{name} gauge", f"{prefix}{name} {gauge['last']}"]
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str) -> None:
+        """
+        Write the JSON report.
+
+        Args:
+            path (str): Output file
+        """
+        self._write(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write the Prometheus text, e.g. for the node exporter textfile collector.
+
+        Args:
+            path (str): Output file
+        """
+        self._write(path, self.to_prometheus())
+
+    def _summary(self, samples: List[float]) -> dict:
+        ordered = sorted(samples)
+        summary = {"count": len(ordered), "sum": sum(ordered), "max": ordered[-1] if ordered else 0.0}
+        for q in self.quantiles:
+            index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+            summary[f"p{int(q * 100)}"] = ordered[index] if ordered else 0.0
+        return summary
+
+    def _notify(self, kind: str, name: str, value: float) -> None:
+        for hook in self.hooks:
+            hook.on_record(kind, name, value)
+
+    @staticmethod
+    def _write(path: str, text: str) -> None:
+        # Readers polling the file never see a partial write
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(path + ".tmp", path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class MetricsSampler:
+    """
+    Background thread of the parent process that samples queue depths and
+    refreshes the live metrics file while a run is in progress.
+    """
+
+    def __init__(self, metrics: PipelineMetrics, queues: dict, interval: float = 5.0, path: str = None) -> None:
+        """
+        Initialize MetricsSampler.
+
+        Args:
+            metrics (PipelineMetrics): Registry receiving the gauges
+            queues (dict): Queues to sample, by gauge name
+            interval (float, optional): Seconds between samples. Defaults to 5.
+            path (str, optional): Prometheus text file rewritten on every sample. Defaults to None.
+        """
+        self.metrics = metrics
+        self.queues = queues
+        self.interval = interval
+        self.path = path
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> 'MetricsSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.sample()
+
+    def sample(self) -> None:
+        """
+        Record the current depth of every queue.
+        """
+        for name, queue in self.queues.items():
+            try:
+                self.metrics.set_gauge(name, queue.qsize())
+            except NotImplementedError:
+                # multiprocessing.Queue.qsize is not available on macOS
+                pass
+        if self.path is not None:
+            self.metrics.write_prometheus(self.path)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
@@ -0,0 +1,151 @@
+import copy
+import json
+from typing import Dict, List
+from graphrag_sdk import Ontology
+from graphrag_sdk.relation import Relation
+from graphrag_sdk.fixtures.prompts import FIX_ONTOLOGY_PROMPT
+from .ontology_index import OntologyIndex
+from ..utils.hashing import text_digest
+from ..utils.tokens import CHARS_PER_TOKEN, MESSAGE_CHARS, estimate_tokens
+
+# Separator between two entities or relations in Ontology.__str__
+_SEPARATOR = "\n- "
+
+def fingerprint(ontology: Ontology) -> Dict[tuple, str]:
+    """
+    Digest every entity and relation of an ontology, e.g. once it is fixed,
+    so the parts changed later can be found with changed_parts.
+
+    Args:
+        ontology (Ontology): Ontology to digest
+
+    Returns:
+        Dict[tuple, str]: Digest of each entity by ("entity", label) and of each
+            relation by ("relation", label, source label, target label)
+    """
+    digests = {}
+    for entity in ontology.entities:
+        digests.setdefault(_entity_key(entity), _digest(entity))
+    for relation in ontology.relations:
+        digests.setdefault(_relation_key(relation), _digest(relation))
+    return digests
+
+
+def changed_parts(ontology: Ontology, baseline: Dict[tuple, str], max_tokens: int) -> List[Ontology]:
+    """
+    Split the entities and relations that are new or changed since a fingerprint
+    into small ontologies to fix one by one. Each changed entity, and each endpoint
+    of a changed relation, comes with its neighbourhood: the relations touching it
+    and the entities at their other end, so the fix sees how it is connected.
+    Neighbourhoods are packed in ontology order into parts of at most max_tokens
+    tokens of prompt text, counted as str(part) renders them. A neighbourhood is
+    cut where it would not fit on its own; changed relations come first, and one
+    left out of both its endpoints' neighbourhoods goes with its endpoints alone.
+    Only an entity or relation larger than max_tokens on its own exceeds the bound.
+
+    Args:
+        ontology (Ontology): Current ontology
+        baseline (Dict[tuple, str]): Fingerprint of the previously fixed ontology, empty to fix everything
+        max_tokens (int): Size bound of a part
+
+    Returns:
+        List[Ontology]: Copies of the changed entities and relations with their neighbourhood,
+            empty when nothing changed
+    """
+    index = OntologyIndex(ontology)
+    changed = set()
+    touched = {}
+    for entity in ontology.entities:
+        # Entity labels resolve to their first occurrence, like in Ontology.get_entity_with_label
+        if index.entity(entity.label) is entity and baseline.get(_entity_key(entity)) != _digest(entity):
+            changed.add(id(entity))
+            touched[entity.label] = None
+    for relation in ontology.relations:
+        if baseline.get(_relation_key(relation)) != _digest(relation):
+            changed.add(id(relation))
+            touched[relation.source.label] = touched[relation.target.label] = None
+
+    sizes = {}
+    def size(item) -> int:
+        if id(item) not in sizes:
+            # Ontology.__str__ puts each entity and relation on a line starting with "- "
+            sizes[id(item)] = estimate_tokens(str(item) + _SEPARATOR)
+        return sizes[id(item)]
+
+    units = [_neighbourhood(label, index, changed, size, max_tokens) for label in touched]
+    covered = {id(item) for unit in units for item in unit}
+    for relation in ontology.relations:
+        if id(relation) in changed and id(relation) not in covered:
+            units.append([relation] + [
+                entity for entity in (index.entity(relation.source.label), index.entity(relation.target.label))
+                if entity is not None
+            ])
+
+    parts, entities, relations, tokens = [], {}, {}, 0
+    for unit in units:
+        # Items already in the part cost nothing more
+        cost = sum(size(item) for item in unit if id(item) not in entities and id(item) not in relations)
+        if (entities or relations) and tokens + cost > max_tokens:
+            parts.append(_part(entities, relations))
+            entities, relations, tokens = {}, {}, 0
+            cost = sum(size(item) for item in unit)
+        for item in unit:
+            target = relations if isinstance(item, Relation) else entities
+            target.setdefault(id(item), item)
+        tokens += cost
+    if entities or relations:
+        parts.append(_part(entities, relations))
+    return parts
+
+
+def _neighbourhood(label: str, index: OntologyIndex, changed: set, size, max_tokens: int) -> list:
+    entity = index.entity(label)
+    items = [entity] if entity is not None else []
+    tokens = sum(size(item) for item in items)
+    # Changed relations come first, then unchanged ones while the neighbourhood fits
+    relations = index.relations_touching(label)
+    relations.sort(key=lambda relation: id(relation) not in changed)
+    seen = {id(item) for item in items}
+    for relation in relations:
+        other = index.entity(relation.target.label if relation.source.label == label else relation.source.label)
+        new_items = [relation] + ([other] if other is not None and id(other) not in seen else [])
+        cost = sum(size(item) for item in new_items)
+        if tokens + cost > max_tokens:
+            continue
+        items.extend(new_items)
+        seen.update(id(item) for item in new_items)
+        tokens += cost
+    return items
+
+
+def fix_part_tokens(prompt: str = FIX_ONTOLOGY_PROMPT, message_chars: int = MESSAGE_CHARS) -> int:
+    """
+    Get the largest part changed_parts may pack for a prompt, so the prompt with
+    the part fits the characters the chat session sends of a message.
+
+    Args:
+        prompt (str, optional): Prompt template with an {ontology} field. Defaults to FIX_ONTOLOGY_PROMPT.
+        message_chars (int, optional): Characters of a message that are sent. Defaults to MESSAGE_CHARS.
+
+    Returns:
+        int: Size bound of a part in tokens
+    """
+    # The empty ontology still renders its section headers
+    return (message_chars - len(prompt.format(ontology=Ontology()))) // CHARS_PER_TOKEN
+
+
+def _part(entities: dict, relations: dict) -> Ontology:
+    # Copied, so parts fixed concurrently never share the objects of the ontology
+    return Ontology(copy.deepcopy(list(entities.values())), copy.deepcopy(list(relations.values())))
+
+
+def _entity_key(entity) -> tuple:
+    return ("entity", entity.label)
+
+
+def _relation_key(relation) -> tuple:
+    return ("relation", relation.label, relation.source.label, relation.target.label)
+
+
+def _digest(item) -> str:
+    return text_digest(json.dumps(item.to_json(), sort_keys=True))
@@ -1,9 +1,24 @@
+import os
 import json
-from typing import List
+import time
+import queue
+from threading import Event
+from typing import Callable, List
 from graphrag_sdk import Ontology
 from graphrag_sdk.source import AbstractSource
-from graphrag_sdk.models.openai import OpenAiGenerativeModel
+from graphrag_sdk.models import GenerativeModel
 from ..steps.concurrent_ontology_step import ConcurrentCreateOntologyStep
+from ..steps.ingestion_pipeline import IngestionPipeline, BatchEnd
+from ..steps.pipeline import END_OF_STREAM, StageFailure, SkippedDocument
+from ..sources.unstructured_source import UnstructuredSource
+from ..sources.directory_watcher import DirectoryWatcher
+from ..metrics.pipeline_metrics import MetricsSnapshot
+from ..failures.dead_letter import DeadLetterFile, FailedDocument
+from .ontology_merger import OntologyMerger
+from .ontology_index import OntologyIndex
+from .ontology_store import save_ontology, load_ontology
+from .ontology_diff import fingerprint
+from ..utils.hashing import file_digest
 
 class OntologyHub:
     """
@@ -11,23 +26,106 @@ class OntologyHub:
     extension, saving, and loading.
     """
     
+    # Default configuration passed to ConcurrentCreateOntologyStep
+    default_config = {
+        "max_input_tokens": 500000,
+        "max_output_tokens": 8192,
+        "loading_mode": "thread",
+        "loading_workers": None,
+        "loading_timeout": None,
+        "merge_workers": 1,
+        "documents_queue_size": None,
+        "max_in_flight": None,
+        "chunk_tokens": 3000,
+        "requests_per_minute": None,
+        "tokens_per_minute": None,
+        "max_retries": 6,
+        "retry_base_delay": 1.0,
+        "retry_max_delay": 60.0,
+        "response_cache": None,
+        "journal_dir": None,
+        "resume": False,
+        "checkpoint_parts": 100,
+        "checkpoint_seconds": 60,
+        "metrics_hooks": None,
+        "metrics_report": None,
+        "metrics_file": None,
+        "metrics_interval": 5.0,
+        "dedup_threshold": None,
+        "dedup_num_perm": 128,
+        "document_transport": "queue",
+        "spill_dir": None,
+        "spill_min_bytes": 16384,
+        "channel_transport": "queue",
+        "channel_address": None,
+        "channel_authkey": None,
+        "channel_spool_dir": None,
+        "channel_connect_timeout": 60.0,
+        "remote_stages": None,
+        "ontology_processes": 1,
+        "watch_poll_interval": 2.0,
+        "watch_debounce": 5.0,
+        "snapshot_interval": 300,
+        "retry_queue_attempts": 3,
+        "retry_queue_base_delay": 5.0,
+        "retry_queue_max_delay": 120.0,
+        "fix_mode": "incremental",
+        "fix_part_tokens": None,
+        "fix_workers": None,
+        "dead_letter_file": None
+    }
+    
     def __init__(
         self,
-        ontology: Ontology = Ontology(),
-        model: OpenAiGenerativeModel = OpenAiGenerativeModel(model_name='gpt-4o-mini'),
-        sources: List[AbstractSource] = None
+        ontology: Ontology = None,
+        model: GenerativeModel = None,
+        sources: List[AbstractSource] = None,
+        config: dict = None
     ) -> None:
         """
         Initialize OntologyHub.
 
         Args:
             ontology (Ontology, optional): Base ontology. Defaults to empty Ontology.
-            model (OpenAiGenerativeModel, optional): AI model for processing.
+            model (GenerativeModel, optional): AI model for processing. Defaults to OpenAI gpt-4o-mini.
             sources (List[AbstractSource], optional): List of data sources.
+            config (dict, optional): Overrides for the step configuration, e.g.
+                loading_mode ("thread" or "process"), loading_workers, loading_timeout
+                merge_workers (processes for the tree-reduction merge), documents_queue_size
+                max_in_flight (backpressure limits, default to twice and once the worker count)
+                chunk_tokens (token budget for chunking and packing, None to disable),
+                requests_per_minute and tokens_per_minute (provider quotas, None for unlimited)
+                max_retries, retry_base_delay and retry_max_delay (rate-limit retries)
+                response_cache (BlobCache for LLM responses, None to disable), journal_dir
+                and resume (checkpoint directory and whether to continue the run journaled there)
+                and checkpoint_parts and checkpoint_seconds (checkpoint frequency),
+                metrics_hooks (MetricsHook observers), metrics_report (JSON report path),
+                metrics_file (Prometheus text file, refreshed every metrics_interval seconds),
+                dedup_threshold and dedup_num_perm (MinHash similarity above which a document
+                is skipped as a near-duplicate, None to disable, and signature size),
+                document_transport ("queue", or "spill" to pass large documents through
+                spill files in spill_dir, /dev/shm by default) and spill_min_bytes,
+                watch_poll_interval, watch_debounce and snapshot_interval (see watch),
+                retry_queue_attempts, retry_queue_base_delay and retry_queue_max_delay (extraction
+                attempts per document on LLM timeouts, rate limits and malformed JSON, and their backoff)
+                and dead_letter_file (JSON lines file of the documents that failed for good, None to disable).
         """
-        self._ontology = ontology
+        if model is None:
+            # The OpenAI client is only imported when no model is given
+            from graphrag_sdk.models.openai import OpenAiGenerativeModel
+            model = OpenAiGenerativeModel(model_name='gpt-4o-mini')
+        self._ontology = ontology if ontology is not None else Ontology()
         self._model = model
         self._sources = sources or []
+        self._config = {**self.default_config, **(config or {})}
+        # Ingested sources by path: content hash, boundaries and model that produced the ontology
+        self._manifest = {}
+        # Metrics of the last extension run
+        self._metrics = None
+        # Lookup indexes, rebuilt when the ontology is replaced
+        self._index = None
+        # Fingerprint of the ontology as last fixed by watch
+        self._fixed = None
         
     def extend_ontology(
         self,
@@ -37,31 +135,269 @@ class OntologyHub:
     ) -> Ontology:
         """
         Extend existing ontology with new sources.
+        Sources already ingested with the same content, boundaries and model are skipped.
+        Only sources that were fully extracted are recorded as ingested.
 
         Args:
             sources (List[AbstractSource]): Sources to process
             boundaries (str, optional): Boundaries for ontology creation
-            workers (int, optional): Number of worker threads
+            workers (int, optional): Number of concurrent extraction calls
 
         Returns:
             Ontology: Updated ontology
         """
-        self._ontology = ConcurrentCreateOntologyStep(
-            sources=sources,
+        new_sources, entries = self._pending_sources(sources, boundaries)
+
+        if new_sources:
+            step = ConcurrentCreateOntologyStep(
+                sources=new_sources,
+                ontology=self._ontology,
+                model=self._model,
+                config={
+                    **self._config,
+                    "max_workers": workers
+                }
+            )
+            self._metrics = step.metrics
+            self._ontology = step.run(boundaries=boundaries)
+
+            # Sources that failed to load or extract stay out of the manifest and run again next time
+            for path in step.completed_sources:
+                if entries[path] is not None:
+                    self._manifest[path] = entries[path]
+
+        self._sources.extend(source for source in sources if source not in self._sources)
+        return self._ontology
+    
+    def watch(
+        self,
+        directories: List[str],
+        snapshot_path: str,
+        boundaries: str = None,
+        workers: int = 16,
+        source_factory: Callable[[str], AbstractSource] = UnstructuredSource,
+        stop: Event = None
+    ) -> Ontology:
+        """
+        Ingest files from directories continuously, until stop is set.
+        New and changed files are picked up once they have stayed unchanged for
+        watch_debounce seconds, and fed in batches to one IngestionPipeline whose
+        processes stay up between batches. Ontology parts are merged as they arrive,
+        and the sources of each completed batch are recorded in the manifest.
+        Every snapshot_interval seconds, and when stopping, a changed ontology is
+        fixed and saved to snapshot_path with save, as is the manifest.
+
+        Args:
+            directories (List[str]): Directories to watch
+            snapshot_path (str): File the ontology and manifest are saved to
+            boundaries (str, optional): Boundaries for ontology creation
+            workers (int, optional): Number of concurrent extraction calls
+            source_factory (Callable[[str], AbstractSource], optional): Builds the source of a file.
+                Defaults to UnstructuredSource.
+            stop (Event, optional): Set to stop once the submitted files are done. Defaults to never.
+
+        Returns:
+            Ontology: Ontology when the service stopped
+
+        Raises:
+            Exception: If a stage process fails
+        """
+        stop = stop or Event()
+        watcher = DirectoryWatcher(directories, debounce=self._config["watch_debounce"])
+        step = ConcurrentCreateOntologyStep(
+            sources=[],
             ontology=self._ontology,
             model=self._model,
-            config={
-                "max_workers": workers,
-                "max_input_tokens": 500000,
-                "max_output_tokens": 8192
-            }
-        ).run(boundaries=boundaries)
-        self._sources.extend(sources)
+            config={**self._config, "max_workers": workers}
+        )
+        self._metrics = step.metrics
+        pipeline = IngestionPipeline(step, boundaries, workers)
+        # The ontology is fixed when the service starts, so a fix-up only revisits what the parts change
+        self._fixed = fingerprint(self._ontology)
+        merger = OntologyMerger(self._ontology)
+        dead_letters = DeadLetterFile(self._config["dead_letter_file"]) if self._config["dead_letter_file"] else None
+
+        batches = {}
+        # Batch of each file in flight, and the files that changed again meanwhile
+        in_flight, deferred = {}, set()
+        succeeded, failed = set(), set()
+        next_batch = 0
+        # Merged parts need a fix-up before the next snapshot, finished batches only a save
+        merged = recorded = False
+        last_snapshot = time.monotonic()
+
+        pipeline.start()
+        try:
+            stopping = finished = False
+            while not finished:
+                if not stopping and stop.is_set():
+                    pipeline.stop()
+                    stopping = True
+                if not stopping:
+                    paths = set(watcher.poll()) | {path for path in deferred if path not in in_flight}
+                    deferred = (deferred - paths) | {path for path in paths if path in in_flight}
+                    sources = [source_factory(path) for path in sorted(paths) if path not in in_flight]
+                    sources, entries = self._pending_sources(sources, boundaries)
+                    if sources:
+                        batches[next_batch] = entries
+                        in_flight.update((source.path, next_batch) for source in sources)
+                        pipeline.submit(next_batch, sources)
+                        # A changed file replaces the source it was ingested from
+                        paths = {source.path for source in sources}
+                        self._sources = [source for source in self._sources if source.path not in paths] + sources
+                        next_batch += 1
+
+                # Results are taken until the next poll is due
+                deadline = time.monotonic() + self._config["watch_poll_interval"]
+                while not finished:
+                    try:
+                        item = pipeline.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is END_OF_STREAM:
+                        finished = True
+                    elif isinstance(item, StageFailure):
+                        raise Exception(f"\nIngestion stopped: {item.stage} stage failed\n{item.message}")
+                    elif isinstance(item, MetricsSnapshot):
+                        step.metrics.merge(item)
+                    elif isinstance(item, SkippedDocument):
+                        succeeded.update(item.sources)
+                    elif isinstance(item, FailedDocument):
+                        failed.update(item.sources)
+                        step.metrics.increment("documents_failed_total")
+                        if dead_letters is not None:
+                            dead_letters.append(item)
+                    elif isinstance(item, BatchEnd):
+                        self._finish_batch(item, batches.pop(item.batch_id), succeeded, failed)
+                        recorded = True
+                        in_flight = {path: batch for path, batch in in_flight.items() if batch != item.batch_id}
+                    else:
+                        ids, paths, part = item
+                        succeeded.update(paths)
+                        with step.metrics.timer("merge_seconds"):
+                            merger.add(part)
+                        step.metrics.increment("parts_merged_total")
+                        merged = True
+
+                if (merged or recorded) and time.monotonic() - last_snapshot >= self._config["snapshot_interval"]:
+                    merger = self._snapshot(step, merger, snapshot_path, fix=merged)
+                    merged = recorded = False
+                    last_snapshot = time.monotonic()
+        except BaseException:
+            pipeline.terminate()
+            raise
+
+        pipeline.join()
+        if merged or recorded:
+            self._snapshot(step, merger, snapshot_path, fix=merged)
         return self._ontology
-    
+
+    def retry_dead_letters(
+        self,
+        boundaries: str = None,
+        workers: int = 16,
+        source_factory: Callable[[str], AbstractSource] = UnstructuredSource
+    ) -> Ontology:
+        """
+        Run the sources listed in the dead-letter file again, on their own, with extend_ontology.
+        Their records are removed once the run completes; sources that fail again are recorded anew.
+
+        Args:
+            boundaries (str, optional): Boundaries for ontology creation
+            workers (int, optional): Number of concurrent extraction calls
+            source_factory (Callable[[str], AbstractSource], optional): Builds the source of a path
+                not among the hub's sources. Defaults to UnstructuredSource.
+
+        Returns:
+            Ontology: Updated ontology
+
+        Raises:
+            ValueError: If no dead_letter_file is configured
+        """
+        if not self._config["dead_letter_file"]:
+            raise ValueError("No dead_letter_file is configured")
+        dead_letters = DeadLetterFile(self._config["dead_letter_file"])
+        records = dead_letters.records()
+        if not records:
+            return self._ontology
+
+        # Sources the hub already knows keep their settings, e.g. their cache or instruction
+        known = {source.path: source for source in self._sources}
+        self.extend_ontology(
+            [known.get(path) or source_factory(path) for path in dead_letters.sources(records)],
+            boundaries,
+            workers
+        )
+        # Left in place if the run raised, so nothing is lost
+        dead_letters.drop(len(records))
+        return self._ontology
+
+    def _pending_sources(self, sources: List[AbstractSource], boundaries: str) -> tuple:
+        # Sources that are new or changed since they were ingested, and their manifest entries
+        entries = {source.path: self._manifest_entry(source, boundaries) for source in sources}
+        new_sources = [
+            source for source in sources
+            if entries[source.path] is None or self._manifest.get(source.path) != entries[source.path]
+        ]
+        return new_sources, entries
+
+    def _finish_batch(self, batch_end: BatchEnd, entries: dict, succeeded: set, failed: set) -> None:
+        if batch_end.error is not None:
+            print(f"\nFailed to load batch {batch_end.batch_id}:\n{batch_end.error}")
+        for path, entry in entries.items():
+            # Sources that failed stay out of the manifest and run again when they change
+            if path in succeeded and path not in failed and entry is not None:
+                self._manifest[path] = entry
+            succeeded.discard(path)
+            failed.discard(path)
+
+    def _snapshot(self, step: ConcurrentCreateOntologyStep, merger: OntologyMerger, path: str, fix: bool) -> OntologyMerger:
+        self._ontology = merger.ontology
+        if fix:
+            with step.metrics.timer("fix_seconds"):
+                self._ontology = step._fix_changes(self._ontology, self._fixed)
+            self._fixed = fingerprint(self._ontology)
+        self.save(path)
+        step._export_metrics()
+        print(f"\nSaved ontology snapshot: {path}")
+        # Later parts are merged into the fixed ontology
+        return OntologyMerger(self._ontology)
+
+    def save(self, path: str) -> None:
+        """
+        Save the ontology with save_json when the path ends with .json, otherwise
+        in the compact format of ontology_store, with the manifest of ingested sources next to it.
+
+        Args:
+            path (str): File path for saving
+        """
+        if path.endswith('.json'):
+            self.save_json(path)
+            return
+        save_ontology(self._ontology, path)
+        self._save_manifest(path)
+
+    def load(self, path: str, sources: List[AbstractSource] = []) -> 'OntologyHub':
+        """
+        Load an ontology saved with save, and the manifest of ingested sources if it exists.
+
+        Args:
+            path (str): File path
+            sources (List[AbstractSource], optional): Sources the ontology was built from
+
+        Returns:
+            OntologyHub: Self reference for method chaining
+        """
+        if path.endswith('.json'):
+            return self.load_json(path, sources)
+        self._ontology = load_ontology(path)
+        self._load_manifest(path)
+        self._sources.extend(sources)
+        return self
+
     def save_json(self, path: str) -> None:
         """
-        Save ontology to JSON file.
+        Save ontology to JSON file, with the manifest of ingested sources next to it.
 
         Args:
             path (str): File path for saving
@@ -71,13 +407,15 @@ class OntologyHub:
         
         with open(path, 'w', encoding='utf-8') as file:
             file.write(json.dumps(self._ontology.to_json(), indent=2))
+        self._save_manifest(path)
         
     def load_json(self, path: str, sources: List[AbstractSource] = []) -> 'OntologyHub':
         """
-        Load ontology from JSON file.
+        Load ontology from JSON file, and the manifest of ingested sources if it exists.
 
         Args:
             path (str): Path to JSON file
+            sources (List[AbstractSource], optional): Sources the ontology was built from
 
         Returns:
             OntologyHub: Self reference for method chaining
@@ -87,8 +425,52 @@ class OntologyHub:
         
         with open(path, "r", encoding="utf-8") as file:
             self._ontology = Ontology.from_json(json.loads(file.read()))
+        self._load_manifest(path)
+        
         self._sources.extend(sources)
         return self
+
+    def _save_manifest(self, path: str) -> None:
+        with open(self._manifest_path(path), 'w', encoding='utf-8') as file:
+            file.write(json.dumps(self._manifest, indent=2))
+
+    def _load_manifest(self, path: str) -> None:
+        manifest_path = self._manifest_path(path)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                self._manifest = json.loads(file.read())
+            
+    def get_metrics(self) -> dict:
+        """
+        Get the metrics of the last extension run.
+
+        Returns:
+            dict: Metrics report, or None if no run took place
+        """
+        return self._metrics.report() if self._metrics is not None else None
+    
+    def get_manifest(self) -> dict:
+        """
+        Get the manifest of ingested sources.
+
+        Returns:
+            dict: Content hash, boundaries and model per source path
+        """
+        return self._manifest
+    
+    def _manifest_entry(self, source: AbstractSource, boundaries: str) -> dict:
+        # Sources that are not local files (e.g. URLs) cannot be fingerprinted and always run
+        if not os.path.isfile(source.path):
+            return None
+        return {
+            "hash": file_digest(source.path),
+            "boundaries": boundaries,
+            "model": str(getattr(self._model, "model_name", type(self._model).__name__))
+        }
+    
+    @staticmethod
+    def _manifest_path(path: str) -> str:
+        return os.path.splitext(path)[0] + '.manifest.json'
             
     def get_ontology(self) -> Ontology:
         """
@@ -97,4 +479,16 @@ class OntologyHub:
         Returns:
             Ontology: Current ontology object
         """
-        return self._ontology
\ No newline at end of file
+        return self._ontology
+
+    def get_index(self) -> OntologyIndex:
+        """
+        Get the lookup indexes of the current ontology, e.g.
+        get_index().relations_touching("Person").
+
+        Returns:
+            OntologyIndex: Indexes by entity label, relation label and relation endpoints
+        """
+        if self._index is None or self._index.ontology is not self._ontology:
+            self._index = OntologyIndex(self._ontology)
+        return self._index
@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional
+from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.relation import Relation
+
+class OntologyIndex:
+    """
+    Indexes of an ontology by entity label, relation label and relation endpoints,
+    so lookups take constant time instead of scanning the entity and relation lists.
+    Results match the Ontology lookups: an entity label resolves to its first occurrence
+    and relations come in list order. The ontology may keep growing in place, e.g.
+    under an OntologyMerger; appended entities and relations are indexed on the next lookup.
+    """
+
+    def __init__(self, ontology: Ontology) -> None:
+        """
+        Initialize OntologyIndex.
+
+        Args:
+            ontology (Ontology): Indexed ontology. Entities and relations may be appended but not removed.
+        """
+        self.ontology = ontology
+        self._entities: Dict[str, Entity] = {}
+        self._relations: Dict[str, List[Relation]] = {}
+        self._sources: Dict[str, List[Relation]] = {}
+        self._targets: Dict[str, List[Relation]] = {}
+        self._touching: Dict[str, List[Relation]] = {}
+        # Number of entities and relations indexed so far
+        self._entity_count = 0
+        self._relation_count = 0
+
+    def entity(self, label: str) -> Optional[Entity]:
+        """
+        Get the entity with a label, like Ontology.get_entity_with_label.
+
+        Args:
+            label (str): Entity label
+
+        Returns:
+            Optional[Entity]: First entity with the label, or None
+        """
+        self._refresh()
+        return self._entities.get(label)
+
+    def relations(self, label: str) -> List[Relation]:
+        """
+        Get the relations with a label, like Ontology.get_relations_with_label.
+
+        Args:
+            label (str): Relation label
+
+        Returns:
+            List[Relation]: Relations with the label
+        """
+        self._refresh()
+        return list(self._relations.get(label, ()))
+
+    def relations_from(self, label: str) -> List[Relation]:
+        """
+        Get the relations whose source is an entity label.
+
+        Args:
+            label (str): Entity label
+
+        Returns:
+            List[Relation]: Relations starting at the entity
+        """
+        self._refresh()
+        return list(self._sources.get(label, ()))
+
+    def relations_to(self, label: str) -> List[Relation]:
+        """
+        Get the relations whose target is an entity label.
+
+        Args:
+            label (str): Entity label
+
+        Returns:
+            List[Relation]: Relations ending at the entity
+        """
+        self._refresh()
+        return list(self._targets.get(label, ()))
+
+    def relations_touching(self, label: str) -> List[Relation]:
+        """
+        Get the relations with an entity label at either end, each once.
+
+        Args:
+            label (str): Entity label
+
+        Returns:
+            List[Relation]: Relations starting or ending at the entity
+        """
+        self._refresh()
+        return list(self._touching.get(label, ()))
+
+    def _refresh(self) -> None:
+        entities, relations = self.ontology.entities, self.ontology.relations
+        for entity in entities[self._entity_count:]:
+            self._entities.setdefault(entity.label, entity)
+        for relation in relations[self._relation_count:]:
+            source, target = relation.source.label, relation.target.label
+            self._relations.setdefault(relation.label, []).append(relation)
+            self._sources.setdefault(source, []).append(relation)
+            self._targets.setdefault(target, []).append(relation)
+            self._touching.setdefault(source, []).append(relation)
+            if target != source:
+                self._touching.setdefault(target, []).append(relation)
+        self._entity_count, self._relation_count = len(entities), len(relations)
@@ -0,0 +1,117 @@
+from typing import Dict, List, Set
+from concurrent.futures import ProcessPoolExecutor
+from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.relation import Relation
+
+class OntologyMerger:
+    """
+    Incremental ontology merge engine.
+    Produces the same result as folding with Ontology.merge_with, but keeps
+    label-keyed maps of entities, relations and their attribute names so each
+    insertion costs time proportional to the merged part, not to the whole ontology.
+    """
+
+    def __init__(self, ontology: Ontology = None) -> None:
+        """
+        Initialize the OntologyMerger.
+
+        Args:
+            ontology (Ontology, optional): Base ontology to merge into. Defaults to empty Ontology.
+                It is extended in place, so it must not be modified elsewhere while merging.
+        """
+        self.ontology = ontology if ontology is not None else Ontology()
+        self._entities: Dict[str, Entity] = {}
+        self._relations: Dict[str, Relation] = {}
+        self._attributes: Dict[int, Set[str]] = {}
+
+        # merge_with always resolves a label to its first occurrence
+        for entity in self.ontology.entities:
+            self._index(self._entities, entity)
+        for relation in self.ontology.relations:
+            self._index(self._relations, relation)
+
+    def add(self, ontology: Ontology) -> 'OntologyMerger':
+        """
+        Merge an ontology into the accumulated result.
+
+        Args:
+            ontology (Ontology): Ontology to merge
+
+        Returns:
+            OntologyMerger: Self reference for method chaining
+        """
+        for entity in ontology.entities:
+            self._insert(self._entities, self.ontology.entities, entity)
+        for relation in ontology.relations:
+            self._insert(self._relations, self.ontology.relations, relation)
+        return self
+
+    def add_all(self, ontologies: List[Ontology]) -> 'OntologyMerger':
+        """
+        Merge several ontologies in order.
+
+        Args:
+            ontologies (List[Ontology]): Ontologies to merge
+
+        Returns:
+            OntologyMerger: Self reference for method chaining
+        """
+        for ontology in ontologies:
+            self.add(ontology)
+        return self
+
+    def _index(self, index: dict, item) -> None:
+        if item.label not in index:
+            index[item.label] = item
+            self._attributes[id(item)] = {attr.name for attr in item.attributes}
+
+    def _insert(self, index: dict, items: list, item) -> None:
+        existing = index.get(item.label)
+        if existing is None:
+            items.append(item)
+            self._index(index, item)
+            return
+
+        # Same rule as Entity.merge and Relation.combine: unseen attribute names are appended
+        names = self._attributes[id(existing)]
+        for attr in item.attributes:
+            if attr.name not in names:
+                existing.attributes.append(attr)
+                names.add(attr.name)
+
+
+def _merge_chunk(ontologies: List[Ontology]) -> Ontology:
+    return OntologyMerger().add_all(ontologies).ontology
+
+
+def merge_ontologies(ontologies: List[Ontology], workers: int = 1) -> Ontology:
+    """
+    Merge a list of ontologies, optionally as a tree reduction over worker processes.
+
+    Contiguous runs of ontologies are merged in parallel and the partial results
+    are then merged pairwise, level by level. Order is preserved at every level,
+    so the result equals folding the list into an empty Ontology with Ontology.merge_with.
+
+    Args:
+        ontologies (List[Ontology]): Ontologies to merge, in order
+        workers (int, optional): Number of worker processes. Defaults to 1 (sequential).
+
+    Returns:
+        Ontology: Merged ontology
+    """
+    if len(ontologies) == 0:
+        return Ontology()
+    if workers <= 1 or len(ontologies) < 2 * workers:
+        return _merge_chunk(ontologies)
+
+    size = -(-len(ontologies) // workers)
+    level = [ontologies[i:i + size] for i in range(0, len(ontologies), size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        merged = list(pool.map(_merge_chunk, level))
+        while len(merged) > 1:
+            pairs = [merged[i:i + 2] for i in range(0, len(merged), 2)]
+            merged = list(pool.map(_merge_chunk, pairs))
+
+    return merged[0]
@@ -0,0 +1,169 @@
+import os
+import gzip
+import json
+import tempfile
+from typing import Iterable, Iterator, Union
+from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.attribute import Attribute
+from graphrag_sdk.relation import Relation, _RelationEntity
+
+# Compact ontology file: a header record, then one record per entity and per relation.
+# An entity is ["e", label, description, attributes] and a relation is
+# ["r", label, source label, target label, attributes], with each attribute as
+# [name, type, unique, required]. Records are a msgpack stream when msgpack is
+# installed, otherwise gzip-compressed JSON lines; load tells them apart by their first bytes.
+FORMAT = "batch2kg-ontology"
+VERSION = 1
+MSGPACK = "msgpack"
+JSON_LINES = "jsonl.gz"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+def _msgpack():
+    # Optional dependency, imported on first use
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def default_encoding() -> str:
+    """
+    Get the encoding used by save_ontology when none is given.
+
+    Returns:
+        str: MSGPACK when msgpack is installed, otherwise JSON_LINES
+    """
+    return MSGPACK if _msgpack() is not None else JSON_LINES
+
+
+def save_ontology(ontology: Ontology, path: str, encoding: str = None) -> None:
+    """
+    Write an ontology to a compact file, one record at a time.
+    The file is replaced in one step, so readers never see a partial file.
+
+    Args:
+        ontology (Ontology): Ontology to save
+        path (str): File path
+        encoding (str, optional): MSGPACK or JSON_LINES. Defaults to default_encoding().
+
+    Raises:
+        ImportError: If MSGPACK is requested and msgpack is not installed
+    """
+    encoding = encoding or default_encoding()
+    directory = os.path.dirname(path) or "."
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            if encoding == MSGPACK:
+                msgpack = _msgpack()
+                if msgpack is None:
+                    raise ImportError("msgpack is required for the msgpack ontology encoding")
+                packer = msgpack.Packer()
+                for record in _records(ontology):
+                    file.write(packer.pack(record))
+            elif encoding == JSON_LINES:
+                with gzip.GzipFile(fileobj=file, mode="wb", compresslevel=6) as stream:
+                    for record in _records(ontology):
+                        stream.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            else:
+                raise ValueError(f"Unknown ontology encoding: {encoding}")
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def load_ontology(path: str) -> Ontology:
+    """
+    Read an ontology written by save_ontology.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        Ontology: Loaded ontology
+    """
+    ontology = Ontology()
+    for item in iter_ontology(path):
+        if isinstance(item, Entity):
+            ontology.entities.append(item)
+        else:
+            ontology.relations.append(item)
+    return ontology
+
+
+def iter_ontology(path: str) -> Iterator[Union[Entity, Relation]]:
+    """
+    Stream the entities and relations of a file written by save_ontology, in file order.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        Iterator[Union[Entity, Relation]]: Entities, then relations
+
+    Raises:
+        ValueError: If the file is not a compact ontology file of a supported version
+        ImportError: If the file is msgpack-encoded and msgpack is not installed
+    """
+    with open(path, "rb") as file:
+        if file.peek(2)[:2] == _GZIP_MAGIC:
+            with gzip.GzipFile(fileobj=file, mode="rb") as stream:
+                yield from _objects(json.loads(line) for line in stream)
+        else:
+            msgpack = _msgpack()
+            if msgpack is None:
+                raise ImportError(f"msgpack is required to read {path}")
+            yield from _objects(msgpack.Unpacker(file, use_list=True, raw=False))
+
+
+def _records(ontology: Ontology) -> Iterator[Union[dict, list]]:
+    yield {"format": FORMAT, "version": VERSION}
+    for entity in ontology.entities:
+        yield ["e", entity.label, entity.description, _attribute_records(entity.attributes)]
+    for relation in ontology.relations:
+        yield ["r", relation.label, relation.source.label, relation.target.label, _attribute_records(relation.attributes)]
+
+
+def _attribute_records(attributes: Iterable[Attribute]) -> list:
+    return [[attr.name, attr.type, attr.unique, attr.required] for attr in attributes]
+
+
+def _objects(records: Iterable) -> Iterator[Union[Entity, Relation]]:
+    records = iter(records)
+    header = next(records, None)
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise ValueError("Not a compact ontology file")
+    if header.get("version") != VERSION:
+        raise ValueError(f"Unsupported compact ontology version: {header.get('version')}")
+
+    # Labels and names were normalized by the constructors when the ontology was built,
+    # so objects are restored as they are, without the constructors' regular expressions
+    for record in records:
+        if record[0] == "e":
+            entity = Entity.__new__(Entity)
+            entity.label, entity.description, entity.attributes = record[1], record[2], _attributes(record[3])
+            yield entity
+        else:
+            relation = Relation.__new__(Relation)
+            relation.label, relation.attributes = record[1], _attributes(record[4])
+            relation.source, relation.target = _endpoint(record[2]), _endpoint(record[3])
+            yield relation
+
+
+def _attributes(records: list) -> list:
+    attributes = []
+    for name, attr_type, unique, required in records:
+        attribute = Attribute.__new__(Attribute)
+        attribute.name, attribute.type, attribute.unique, attribute.required = name, attr_type, unique, required
+        attributes.append(attribute)
+    return attributes
+
+
+def _endpoint(label: str) -> _RelationEntity:
+    endpoint = _RelationEntity.__new__(_RelationEntity)
+    endpoint.label = label
+    return endpoint
@@ -0,0 +1,79 @@
+import os
+import time
+from typing import Dict, Iterable, List, Tuple
+
+class DirectoryWatcher:
+    """
+    Polls directories for new and changed files. A file is reported once its
+    size and modification time have stayed the same for the debounce period,
+    so files still being written or copied are not picked up half done.
+    Files dropped into a watched directory should be written under a hidden
+    or temporary name (".name", "name.tmp", "name.part") and renamed when complete.
+    """
+
+    # Names of files that are still being written
+    ignored_prefixes = (".", "~")
+    ignored_suffixes = (".tmp", ".part", ".crdownload", "~")
+
+    def __init__(self, directories: Iterable[str], debounce: float = 5.0, recursive: bool = True) -> None:
+        """
+        Initialize DirectoryWatcher.
+
+        Args:
+            directories (Iterable[str]): Directories to watch
+            debounce (float, optional): Seconds a file must stay unchanged before it is reported. Defaults to 5.
+            recursive (bool, optional): Whether to watch subdirectories. Defaults to True.
+        """
+        self.directories = list(directories)
+        self.debounce = debounce
+        self.recursive = recursive
+        # Files seen changing, with their state and when that state was first seen
+        self._pending: Dict[str, Tuple[tuple, float]] = {}
+        # State of every file already reported
+        self._reported: Dict[str, tuple] = {}
+
+    def poll(self) -> List[str]:
+        """
+        Scan the directories once.
+
+        Returns:
+            List[str]: Paths of the files that are new or changed and have settled, sorted
+        """
+        now = time.monotonic()
+        states = dict(self._scan())
+        ready = []
+
+        for path, state in states.items():
+            if self._reported.get(path) == state:
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != state:
+                self._pending[path] = (state, now)
+            elif now - pending[1] >= self.debounce:
+                ready.append(path)
+                self._reported[path] = state
+                del self._pending[path]
+
+        # A deleted file is reported again if it comes back
+        for known in (self._pending, self._reported):
+            for path in [path for path in known if path not in states]:
+                del known[path]
+        return sorted(ready)
+
+    def _scan(self) -> Iterable[Tuple[str, tuple]]:
+        for directory in self.directories:
+            for root, dirs, files in os.walk(directory):
+                if not self.recursive:
+                    dirs.clear()
+                dirs[:] = [name for name in dirs if not name.startswith(self.ignored_prefixes)]
+                for name in files:
+                    if name.startswith(self.ignored_prefixes) or name.endswith(self.ignored_suffixes):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        # Removed or renamed during the scan
+                        continue
+                    yield path, (stat.st_size, stat.st_mtime_ns)
@@ -1,4 +1,5 @@
 from graphrag_sdk.source import AbstractSource
+from ..cache.blob_cache import BlobCache
 from ..loaders.unstructured_loader import UnstructuredLoader
 
 class UnstructuredSource(AbstractSource):
@@ -7,15 +8,17 @@ class UnstructuredSource(AbstractSource):
     Extends AbstractSource from GraphRAG-SDK.
     """
         
-    def __init__(self, path: str):
+    def __init__(self, path: str, cache: BlobCache = None, section_pages: int = None):
         """
         Initialize UnstructuredSource.
 
         Args:
             path (str): Path to the document file
+            cache (BlobCache, optional): Persistent cache for partition results
+            section_pages (int, optional): Pages per document when streaming large files
         """
         super().__init__(path)
-        self.loader = UnstructuredLoader(self.path)
+        self.loader = UnstructuredLoader(self.path, cache=cache, section_pages=section_pages)
 
     def load(self):
         """
@@ -0,0 +1,288 @@
+import logging
+import traceback
+from uuid import uuid4
+from threading import BoundedSemaphore, Event, Thread
+from multiprocessing import Process, Queue
+from concurrent.futures import ThreadPoolExecutor
+from graphrag_sdk.steps.extract_data_step import ExtractDataStep
+from graphrag_sdk.models import GenerativeModelChatSession
+from graphrag_sdk.models.model import OutputMethod
+from ..graph.local_graph import LocalGraph
+from ..graph.graph_writer import GraphBatchWriter
+from ..llm.rate_limiter import RateLimiter, call_with_retry
+from ..llm.cached_chat_session import CachedChatSession
+from ..metrics.pipeline_metrics import PipelineMetrics, MetricsSnapshot, MetricsSampler
+from ..transport.document_spill import DocumentSpill, SpilledDocument
+from ..failures.dead_letter import DeadLetterFile, FailedDocument
+from .pipeline import END_OF_STREAM, StageFailure, SkippedDocument, loading_process, watch_process, stop_processes
+
+logger = logging.getLogger(__name__)
+
+class ConcurrentExtractDataStep(ExtractDataStep):
+    """
+    Extends ExtractDataStep to populate the knowledge graph with the same
+    multiprocess workflow as ConcurrentCreateOntologyStep: one process loads
+    documents, one sends the extraction calls, and the main process writes
+    the resulting queries to the graph in batches. Documents that fail to
+    load or extract are counted and recorded in the dead-letter file, when
+    dead_letter_file is configured, without stopping the run.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the concurrent data extraction step.
+
+        Args:
+            *args: Variable length argument list for parent class
+            **kwargs: Arbitrary keyword arguments for parent class
+        """
+        super().__init__(*args, **kwargs)
+        # Replaces the fixed 15 calls per minute of ExtractDataStep._call_model
+        self._rate_limiter = RateLimiter(
+            requests_per_minute=self.config.get("requests_per_minute"),
+            tokens_per_minute=self.config.get("tokens_per_minute")
+        )
+        # Aggregated in this process from the snapshots sent by the stage processes
+        self.metrics = PipelineMetrics(self.config.get("metrics_hooks"))
+
+    def run(self, instructions: str = None, workers: int = None):
+        """
+        Run the concurrent graph population process.
+
+        Args:
+            instructions (str, optional): Extra instructions for the extraction prompt. Defaults to None.
+            workers (int, optional): Number of concurrent extraction calls.
+                Defaults to the max_workers config value, or 15.
+
+        Returns:
+            GraphBatchWriter: Writer holding the number of written and failed queries
+
+        Raises:
+            Exception: If a stage fails
+        """
+        thread_per_process = workers or self.config.get("max_workers") or 15
+        # Bounded queue: the loader blocks instead of piling up documents the LLM stage cannot absorb yet
+        documents_queue = Queue(maxsize=self.config.get("documents_queue_size") or 2 * thread_per_process)
+        queries_queue = Queue()
+
+        def extraction_process(documents_queue, queries_queue):
+            """
+            Process for extracting graph queries from loaded documents.
+
+            Args:
+                documents_queue: Queue containing loaded documents
+                queries_queue: Queue for storing the queries of each document, or a FailedDocument
+                    in place of a document that failed, closed with END_OF_STREAM
+            """
+            # Documents are only taken off the queue when an extraction slot is free
+            slots = BoundedSemaphore(self.config.get("max_in_flight") or thread_per_process)
+            failure = None
+            # This process records into its own registry, sent to the parent when the stage ends
+            self.metrics = self.metrics.child()
+
+            def extract_data(doc):
+                task_id = "extract_data_step_" + str(uuid4())
+                ids, sources = doc.ids, doc.sources
+                try:
+                    if isinstance(doc, SpilledDocument):
+                        doc = doc.take()
+                    # The SDK code runs its queries against the collector instead of the database
+                    collector = LocalGraph()
+                    with self.metrics.timer("extraction_seconds"):
+                        self._process_source(
+                            task_id, self._create_chat(), doc, self.ontology, collector, doc.instruction, instructions
+                        )
+                    self.metrics.increment("documents_extracted_total")
+                    queries_queue.put(collector.queries)
+                except Exception as e:
+                    self.metrics.increment("extraction_failures_total")
+                    queries_queue.put(FailedDocument.from_exception(ids, sources, "extraction", e))
+                finally:
+                    self._close_task_log(task_id)
+                    slots.release()
+
+            try:
+                with ThreadPoolExecutor(max_workers=thread_per_process) as pool:
+                    while True:
+                        doc = documents_queue.get()
+                        if doc is END_OF_STREAM:
+                            break
+                        if isinstance(doc, StageFailure):
+                            failure = doc
+                            break
+                        if isinstance(doc, MetricsSnapshot):
+                            queries_queue.put(doc)
+                            continue
+                        if isinstance(doc, SkippedDocument):
+                            # Its entities are extracted from the document it duplicates
+                            continue
+                        if isinstance(doc, FailedDocument):
+                            # A source that failed to load, recorded by the writer
+                            queries_queue.put(doc)
+                            continue
+                        # Spilled documents are never empty
+                        if not isinstance(doc, SpilledDocument) and (doc.content is None or len(doc.content) == 0):
+                            continue
+                        slots.acquire()
+                        pool.submit(extract_data, doc)
+            except Exception:
+                failure = StageFailure("extraction", traceback.format_exc())
+
+            queries_queue.put(self.metrics.snapshot("extraction"))
+            queries_queue.put(failure if failure is not None else END_OF_STREAM)
+
+        def write_process(from_b_queue):
+            """
+            Write extracted queries to the graph in batches.
+
+            Args:
+                from_b_queue: Queue containing the queries of each document, or the documents that failed
+
+            Returns:
+                tuple: Failure reported by an upstream stage or None, and the writer
+            """
+            writer = GraphBatchWriter(self.graph, batch_size=self.config.get("write_batch_size", 100))
+            failure = None
+            dead_letters = DeadLetterFile(self.config["dead_letter_file"]) if self.config.get("dead_letter_file") else None
+
+            while True:
+                queries = from_b_queue.get()
+                if queries is END_OF_STREAM:
+                    break
+                if isinstance(queries, StageFailure):
+                    failure = queries
+                    break
+                if isinstance(queries, MetricsSnapshot):
+                    self.metrics.merge(queries)
+                    continue
+                if isinstance(queries, FailedDocument):
+                    # Recorded so its sources can be run again on their own
+                    self.metrics.increment("documents_failed_total")
+                    logger.warning(
+                        f"{queries.stage.capitalize()} of {', '.join(queries.sources)} failed ({queries.kind}): {queries.error}"
+                    )
+                    if dead_letters is not None:
+                        dead_letters.append(queries)
+                    continue
+                with self.metrics.timer("graph_write_seconds"):
+                    writer.add(queries)
+                self.metrics.increment("queries_received_total", len(queries))
+
+            with self.metrics.timer("graph_write_seconds"):
+                writer.flush()
+            self.metrics.increment("queries_written_total", writer.written)
+            self.metrics.increment("queries_failed_total", writer.failed)
+            return failure, writer
+
+        # Large documents travel through spill files instead of the queue pipe
+        spill = DocumentSpill(self.config.get("spill_dir"), self.config.get("spill_min_bytes", 16384)) \
+            if self.config.get("document_transport", "queue") == "spill" else None
+
+        # Start concurrent processes
+        loading = Process(target=loading_process,
+                         args=(self.sources, documents_queue, self.config, thread_per_process, frozenset(),
+                               self.metrics, spill))
+        loading.start()
+
+        extraction = Process(target=extraction_process,
+                            args=(documents_queue, queries_queue))
+        extraction.start()
+
+        stopping = Event()
+        for process, stage in ((loading, "loading"), (extraction, "extraction")):
+            Thread(target=watch_process, args=(process, stage, queries_queue, stopping), daemon=True).start()
+
+        with MetricsSampler(
+            self.metrics,
+            {"documents_queue_depth": documents_queue, "queries_queue_depth": queries_queue},
+            interval=self.config.get("metrics_interval", 5.0),
+            path=self.config.get("metrics_file")
+        ):
+            failure, writer = write_process(queries_queue)
+        self._export_metrics()
+
+        if failure is not None:
+            stop_processes((loading, extraction), stopping)
+            self._cleanup_spill(spill)
+            raise Exception(f"\nFailed to populate graph: {failure.stage} stage failed\n{failure.message}")
+
+        loading.join()
+        extraction.join()
+        self._cleanup_spill(spill)
+        return writer
+
+    def _create_chat(self):
+        """
+        Start a chat session, served from the response cache when one is configured.
+
+        Returns:
+            GenerativeModelChatSession: Chat session
+        """
+        chat = super()._create_chat()
+        cache = self.config.get("response_cache")
+        if cache is None:
+            return chat
+        # Only cache misses go through the rate limiter
+        send = lambda message, output_method: call_with_retry(
+            lambda: chat.send_message(message, output_method),
+            message,
+            self._rate_limiter,
+            self.config,
+            metrics=self.metrics
+        )
+        return CachedChatSession(chat, self.model, cache, send=send)
+
+    def _call_model(
+        self,
+        chat_session: GenerativeModelChatSession,
+        prompt: str,
+        retry: int = None,
+        output_method: OutputMethod = OutputMethod.DEFAULT
+    ):
+        """
+        Send a prompt through the shared rate limiter, retrying rate-limit errors.
+
+        Args:
+            chat_session (GenerativeModelChatSession): Chat session to use
+            prompt (str): Prompt to send
+            retry (int, optional): Retries left on rate-limit errors. Defaults to the max_retries config value.
+            output_method (OutputMethod, optional): Requested output format. Defaults to DEFAULT.
+
+        Returns:
+            GenerationResponse: Model response
+        """
+        self.metrics.increment("model_requests_total")
+        if isinstance(chat_session, CachedChatSession):
+            # The cached session applies the limiter itself, on cache misses
+            return chat_session.send_message(prompt, output_method)
+
+        return call_with_retry(
+            lambda: chat_session.send_message(prompt, output_method=output_method),
+            prompt,
+            self._rate_limiter,
+            self.config,
+            retries=retry,
+            metrics=self.metrics
+        )
+
+    @staticmethod
+    def _cleanup_spill(spill: DocumentSpill) -> None:
+        # Removes the spill files of documents that were never consumed
+        if spill is not None:
+            spill.cleanup()
+
+    def _export_metrics(self) -> None:
+        # Writes the per-run JSON report and the final Prometheus text, when configured
+        if self.config.get("metrics_report"):
+            self.metrics.write_report(self.config["metrics_report"])
+        if self.config.get("metrics_file"):
+            self.metrics.write_prometheus(self.config["metrics_file"])
+
+    @staticmethod
+    def _close_task_log(task_id: str) -> None:
+        # ExtractDataStep opens a log file per task and never closes it
+        task_logger = logging.getLogger(task_id)
+        for handler in list(task_logger.handlers):
+            handler.close()
+            task_logger.removeHandler(handler)
+        logging.Logger.manager.loggerDict.pop(task_id, None)
@@ -1,8 +1,26 @@
-from multiprocessing import Process, Queue
+import json
+import time
+import traceback
+from threading import Event, Thread
 from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Process
 from graphrag_sdk.steps.create_ontology_step import CreateOntologyStep
 from graphrag_sdk.ontology import Ontology
-from ..sources.unstructured_source import UnstructuredSource
+from graphrag_sdk.document import Document
+from graphrag_sdk.helpers import extract_json
+from graphrag_sdk.fixtures.prompts import CREATE_ONTOLOGY_PROMPT, FIX_JSON_PROMPT, BOUNDARIES_PREFIX
+from graphrag_sdk.models import GenerativeModelChatSession, FinishReason
+from ..checkpoint.run_journal import RunJournal
+from ..llm.rate_limiter import RateLimiter, call_with_retry
+from ..llm.cached_chat_session import CachedChatSession
+from ..ontology.ontology_merger import OntologyMerger, merge_ontologies
+from ..ontology.ontology_diff import fingerprint, changed_parts, fix_part_tokens
+from ..metrics.pipeline_metrics import PipelineMetrics, MetricsSnapshot, MetricsSampler
+from ..transport.document_spill import DocumentSpill
+from ..transport.channels import ChannelTransport, QUEUE
+from ..failures.dead_letter import DeadLetterFile, FailedDocument, MalformedResponseError
+from .extraction_workers import ExtractionWorkers
+from .pipeline import END_OF_STREAM, StageFailure, SkippedDocument, loading_process, watch_process, stop_processes
 
 class ConcurrentCreateOntologyStep(CreateOntologyStep):
     """
@@ -19,127 +37,478 @@ class ConcurrentCreateOntologyStep(CreateOntologyStep):
             **kwargs: Arbitrary keyword arguments for parent class
         """
         super().__init__(*args, **kwargs)
+        # Replaces the fixed 15 calls per minute of CreateOntologyStep._call_model
+        self._rate_limiter = RateLimiter(
+            requests_per_minute=self.config.get("requests_per_minute"),
+            tokens_per_minute=self.config.get("tokens_per_minute")
+        )
+        # Paths of the sources whose pieces were all extracted and merged by the last run
+        self.completed_sources = []
+        # Aggregated in this process from the snapshots sent by the stage processes
+        self.metrics = PipelineMetrics(self.config.get("metrics_hooks"))
     
-    def run(self, boundaries: str = None, workers: int = 15):
+    def run(self, boundaries: str = None, workers: int = None):
         """
         Run the concurrent ontology creation process.
 
         Args:
             boundaries (str, optional): Boundaries for ontology creation. Defaults to None.
-            workers (int, optional): Number of worker threads. Defaults to 15.
+            workers (int, optional): Number of concurrent extraction calls.
+                Defaults to the max_workers config value, or 15.
 
         Returns:
             Ontology: The created/updated ontology
 
         Raises:
-            Exception: If the resulting ontology is empty
+            Exception: If a stage fails or the resulting ontology is empty
         """
-        documents_queue = Queue()
-        ontology_queue = Queue()
-        signal_queue = Queue()
-        thread_per_process = workers
+        thread_per_process = workers or self.config.get("max_workers") or 15
+        # Stages on other nodes reach the channels through the TCP broker or spool directory served here
+        transport = ChannelTransport.from_config(self.config)
+        transport.serve()
+        # Bounded channel: the loader blocks instead of piling up documents the LLM stage cannot absorb yet
+        documents_queue = transport.channel(
+            "documents", self.config.get("documents_queue_size") or 2 * thread_per_process
+        )
+        ontology_queue = transport.channel("ontologies")
+        remote_stages = set(self.config.get("remote_stages") or ())
+        # Ontology processes reading the documents channel, all local or all remote
+        ontology_processes = self.config.get("ontology_processes") or 1
 
-        def loading_process(sources, documents_queue, signal_queue):
-            """
-            Process for loading documents from sources concurrently.
-            
-            Args:
-                sources: List of source objects
-                documents_queue: Queue for storing loaded documents
-                signal_queue: Queue for process communication signals
-            """
-            def load_source(source):
-                for doc in source.load():
-                    documents_queue.put(doc)
-                    signal_queue.put(1)
-                print(f"\nLoaded source: {source.path}")
-
-            with ThreadPoolExecutor(max_workers=thread_per_process) as pool:
-                futures = [pool.submit(load_source, source) for source in sources]
-                for future in futures:
-                    future.result()
+        # The ontology the run extends was fixed by the run that built it, so only what the merge
+        # changes needs another fix-up. Taken first, as parts are merged into it in place.
+        baseline = fingerprint(self.ontology)
 
-            signal_queue.put(0)
-            print('\nAll sources are loaded. Stopping the loading process...')
-
-        def ontology_process(documents_queue, signal_queue, ontology_queue, ontology):
-            """
-            Process for creating ontology parts from loaded documents.
-            
-            Args:
-                documents_queue: Queue containing loaded documents
-                signal_queue: Queue for process communication signals
-                ontology_queue: Queue for storing created ontology parts
-                ontology: Base ontology object
-            """
-            active_tasks = 0
-            loading_completion_signal = False
-
-            def create_ontology(doc):
-                nonlocal active_tasks
-                try:
-                    chat = self._create_chat()
-                    # New ontology is passed because self._process_source also uses merge_with
-                    # If we pass a non-empty ontology, this will significantly increase the number of prompts needed!
-                    new_ontology = self._process_source(chat, doc, Ontology(), boundaries) 
-                    ontology_queue.put(new_ontology)
-                finally:
-                    signal_queue.put(-1)
-
-            with ThreadPoolExecutor(max_workers=thread_per_process) as pool:
-                while not (loading_completion_signal and active_tasks == 0):
-                    try:
-                        doc = documents_queue.get(timeout=1)
-                        pool.submit(create_ontology, doc)
-                    except Exception:
-                        pass
-
-                    while not signal_queue.empty():
-                        signal = signal_queue.get()
-                        if signal == 1:
-                            active_tasks += 1
-                        elif signal == -1:
-                            active_tasks -= 1
-                        elif signal == 0:
-                            loading_completion_signal = True
-
-            ontology_queue.put(None)
-            print('\nOntology generation finished. Stopping the ontology process')
+        # Journal of merged pieces, used to checkpoint the run and to resume it
+        journal = RunJournal(self.config["journal_dir"]) if self.config.get("journal_dir") else None
+        completed = set()
+        if journal is not None:
+            if self.config.get("resume", False):
+                completed = journal.completed_ids()
+                self.ontology = journal.load_snapshot() or self.ontology
+            else:
+                journal.clear()
 
         def merge_process(from_b_queue):
             """
             Process for merging created ontology parts.
             
             Args:
-                from_b_queue: Queue containing ontology parts to be merged
+                from_b_queue: Queue containing (piece IDs, source paths, ontology part) triples to be merged,
+                    with a FailedDocument in place of the parts that failed
+
+            Returns:
+                tuple: Failure reported by an upstream stage or None, and the number of merged parts
             """
-            stopped_threads = 0
-            while True:
-                ontology_part = from_b_queue.get()
-                if ontology_part is None:
-                    stopped_threads += 1
-                else:
-                    self.ontology = self.ontology.merge_with(ontology_part)
+            # Checkpoints need the merged state as it grows, so tree reduction is skipped with a journal
+            merge_workers = self.config.get("merge_workers", 1) if journal is None else 1
+            checkpoint_parts = self.config.get("checkpoint_parts", 100)
+            checkpoint_seconds = self.config.get("checkpoint_seconds", 60)
+            merger = OntologyMerger(self.ontology)
+            parts = []
+            merged = 0
+            unsaved_ids = []
+            succeeded, failed = set(), set()
+            last_checkpoint = time.monotonic()
+            failure = None
+            dead_letters = DeadLetterFile(self.config["dead_letter_file"]) if self.config.get("dead_letter_file") else None
+            # Each ontology process closes the stream once
+            open_streams = ontology_processes
 
-                if stopped_threads > 0 and from_b_queue.empty():
+            while True:
+                item = from_b_queue.get()
+                if item is END_OF_STREAM:
+                    open_streams -= 1
+                    if open_streams == 0:
+                        break
+                    continue
+                if isinstance(item, StageFailure):
+                    failure = item
                     break
+                if isinstance(item, MetricsSnapshot):
+                    self.metrics.merge(item)
+                    continue
+                if isinstance(item, SkippedDocument):
+                    # Covered by the document it duplicates
+                    succeeded.update(item.sources)
+                    continue
+                if isinstance(item, FailedDocument):
+                    # Recorded so its sources can be run again on their own
+                    failed.update(item.sources)
+                    self.metrics.increment("documents_failed_total")
+                    if dead_letters is not None:
+                        dead_letters.append(item)
+                    continue
+                ids, sources, ontology_part = item
+                succeeded.update(sources)
+                merged += 1
+                if merge_workers > 1:
+                    # Tree reduction runs once every part has arrived
+                    parts.append(ontology_part)
+                    continue
+
+                with self.metrics.timer("merge_seconds"):
+                    merger.add(ontology_part)
+                self.metrics.increment("parts_merged_total")
+                unsaved_ids.extend(ids)
+                if journal is not None and (
+                    len(unsaved_ids) >= checkpoint_parts
+                    or time.monotonic() - last_checkpoint >= checkpoint_seconds
+                ):
+                    with self.metrics.timer("checkpoint_seconds"):
+                        journal.checkpoint(merger.ontology, unsaved_ids)
+                    unsaved_ids = []
+                    last_checkpoint = time.monotonic()
+
+            if parts:
+                with self.metrics.timer("merge_seconds"):
+                    merger.add(merge_ontologies(parts, workers=merge_workers))
+                self.metrics.increment("parts_merged_total", len(parts))
+            if journal is not None and unsaved_ids:
+                # Also runs before a failure is raised, so finished work survives it
+                journal.checkpoint(merger.ontology, unsaved_ids)
+            self.ontology = merger.ontology
+            self.completed_sources = [
+                source.path for source in self.sources
+                if source.path in succeeded and source.path not in failed
+            ]
+            return failure, merged
 
-        # Start concurrent processes
-        loading = Process(target=loading_process, 
-                         args=(self.sources, documents_queue, signal_queue))
-        loading.start()
+        # Large documents travel through spill files instead of the queue pipe
+        spill = DocumentSpill(self.config.get("spill_dir"), self.config.get("spill_min_bytes", 16384)) \
+            if self.config.get("document_transport", "queue") == "spill" else None
 
-        creation = Process(target=ontology_process, 
-                          args=(documents_queue, signal_queue, ontology_queue, Ontology()))
-        creation.start()
+        # Start the stages that do not run on other nodes
+        processes = []
+        if "loading" not in remote_stages:
+            processes.append((Process(target=loading_process,
+                                      args=(self.sources, documents_queue, self.config, thread_per_process,
+                                            completed, self.metrics, spill, ontology_processes)), "loading"))
+        if "ontology" not in remote_stages:
+            rate_limiter = self._stage_rate_limiter(transport, ontology_processes)
+            processes.extend(
+                (Process(target=self._ontology_process,
+                         args=(documents_queue, ontology_queue, boundaries, thread_per_process, rate_limiter)),
+                 "ontology")
+                for _ in range(ontology_processes)
+            )
+        for process, _ in processes:
+            process.start()
 
-        merge_process(ontology_queue)
+        stopping = Event()
+        for process, stage in processes:
+            Thread(target=watch_process, args=(process, stage, ontology_queue, stopping), daemon=True).start()
 
-        loading.join()
-        creation.join()
+        with MetricsSampler(
+            self.metrics,
+            {"documents_queue_depth": documents_queue, "ontology_queue_depth": ontology_queue},
+            interval=self.config.get("metrics_interval", 5.0),
+            path=self.config.get("metrics_file")
+        ):
+            failure, merged = merge_process(ontology_queue)
+
+        if failure is not None:
+            stop_processes([process for process, _ in processes], stopping)
+            self._cleanup_spill(spill)
+            transport.close()
+            self._export_metrics()
+            raise Exception(f"\nFailed to create ontology: {failure.stage} stage failed\n{failure.message}")
+
+        for process, _ in processes:
+            process.join()
+        self._cleanup_spill(spill)
+        transport.close()
 
         if len(self.ontology.entities) == 0:
+            self._export_metrics()
             raise Exception("\nFailed to create ontology: Ontology is empty")
 
-        self.ontology = self._fix_ontology(self._create_chat(), self.ontology)
-        return self.ontology
\ No newline at end of file
+        fixed = journal.load_fixed() if journal is not None and merged == 0 else None
+        if fixed is not None:
+            # A resumed run with nothing left to extract only needs the earlier fix-up result
+            self.ontology = fixed
+            self._export_metrics()
+            return self.ontology
+
+        with self.metrics.timer("fix_seconds"):
+            self.ontology = self._fix_changes(self.ontology, baseline)
+        if journal is not None:
+            journal.mark_fixed(self.ontology)
+        self._export_metrics()
+        return self.ontology
+
+    def run_stage(self, stage: str, boundaries: str = None, workers: int = None) -> None:
+        """
+        Run one stage of a run in this process, e.g. on another node, while run() merges
+        elsewhere with the stage listed in remote_stages. The step needs the configuration
+        of that run, its sources for the loading stage and its model for the ontology stage.
+        The channels are reached through the TCP broker or spool directory of the run, and
+        documents travel through them even when document_transport is "spill".
+
+        Args:
+            stage (str): "loading" or "ontology"
+            boundaries (str, optional): Boundaries for ontology creation. Defaults to None.
+            workers (int, optional): Number of loading threads or concurrent extraction calls.
+                Defaults to the max_workers config value, or 15.
+
+        Raises:
+            ValueError: If the stage is unknown or the channels are multiprocessing queues
+        """
+        transport = ChannelTransport.from_config(self.config)
+        if transport.transport == QUEUE:
+            raise ValueError("run_stage needs the tcp or spool channel transport")
+        thread_per_process = workers or self.config.get("max_workers") or 15
+        documents_queue = transport.channel(
+            "documents", self.config.get("documents_queue_size") or 2 * thread_per_process
+        )
+        try:
+            if stage == "loading":
+                # Same pieces as a local loading stage of a resumed run
+                completed = RunJournal(self.config["journal_dir"]).completed_ids() \
+                    if self.config.get("journal_dir") and self.config.get("resume", False) else frozenset()
+                loading_process(self.sources, documents_queue, self.config, thread_per_process, completed,
+                                self.metrics, consumers=self.config.get("ontology_processes") or 1)
+            elif stage == "ontology":
+                rate_limiter = self._stage_rate_limiter(transport, self.config.get("ontology_processes") or 1)
+                self._ontology_process(documents_queue, transport.channel("ontologies"), boundaries,
+                                       thread_per_process, rate_limiter)
+            else:
+                raise ValueError(f"Unknown stage: {stage}")
+        finally:
+            transport.close()
+
+    def _ontology_process(
+        self,
+        documents_queue,
+        ontology_queue,
+        boundaries: str,
+        workers: int,
+        rate_limiter: RateLimiter = None
+    ) -> None:
+        """
+        Process for creating ontology parts from loaded documents.
+
+        Args:
+            documents_queue: Channel containing loaded documents
+            ontology_queue: Channel for storing created ontology parts, closed with END_OF_STREAM
+            boundaries (str): Boundaries for ontology creation
+            workers (int): Number of concurrent extraction calls
+            rate_limiter (RateLimiter, optional): Limiter sharing the quotas with the other ontology
+                processes of the run. Defaults to the step's own limiter.
+        """
+        failure = None
+        # This process records into its own registry, sent to the merging process when the stage ends
+        self.metrics = self.metrics.child()
+        if rate_limiter is not None:
+            self._rate_limiter = rate_limiter
+
+        try:
+            # Documents are only taken off the channel when an extraction slot is free
+            with ExtractionWorkers(
+                self, boundaries, ontology_queue, workers, self.config.get("max_in_flight")
+            ) as extraction:
+                while True:
+                    doc = documents_queue.get()
+                    if doc is END_OF_STREAM:
+                        break
+                    if isinstance(doc, StageFailure):
+                        failure = doc
+                        break
+                    if isinstance(doc, (MetricsSnapshot, SkippedDocument, FailedDocument)):
+                        ontology_queue.put(doc)
+                        continue
+                    extraction.submit(doc)
+        except Exception:
+            failure = StageFailure("ontology", traceback.format_exc())
+
+        ontology_queue.put(self.metrics.snapshot("ontology"))
+        ontology_queue.put(failure if failure is not None else END_OF_STREAM)
+        print('\nOntology generation finished. Stopping the ontology process')
+
+    def _fix_changes(self, ontology: Ontology, baseline: dict) -> Ontology:
+        """
+        Fix up the parts of an ontology that changed since it was last fixed, instead of
+        sending the whole ontology to _fix_ontology in one call. The changed entities and
+        relations, with their neighbourhood, are split into parts of at most fix_part_tokens
+        tokens, by default as large as the fix prompt leaves room for in the characters the
+        chat session sends, fixed with up to fix_workers concurrent calls and merged back in order.
+        With fix_mode "full", the whole ontology goes to _fix_ontology as before.
+
+        Args:
+            ontology (Ontology): Ontology to fix, extended in place
+            baseline (dict): fingerprint of the ontology when it was last fixed, empty if it never was
+
+        Returns:
+            Ontology: Fixed ontology
+        """
+        if self.config.get("fix_mode", "incremental") == "full":
+            self.metrics.increment("fix_calls_total")
+            return self._fix_ontology(self._create_chat(), ontology)
+
+        parts = changed_parts(ontology, baseline, self.config.get("fix_part_tokens") or fix_part_tokens())
+        if not parts:
+            return ontology
+        workers = min(len(parts), self.config.get("fix_workers") or self.config.get("max_workers") or 15)
+        with ThreadPoolExecutor(max_workers=workers) as threads:
+            fixed = list(threads.map(lambda part: self._fix_ontology(self._create_chat(), part), parts))
+        self.metrics.increment("fix_calls_total", len(parts))
+        # Same rule as the merge_with that ends _fix_ontology: additions only, first occurrence wins
+        return OntologyMerger(ontology).add_all(fixed).ontology
+
+    def _stage_rate_limiter(self, transport: ChannelTransport, processes: int) -> RateLimiter:
+        # requests_per_minute and tokens_per_minute are quotas of the whole run, not of each process
+        return transport.rate_limiter(
+            self.config.get("requests_per_minute"),
+            self.config.get("tokens_per_minute"),
+            processes
+        )
+
+    def _create_part(self, doc, boundaries: str = None, attempt: int = 1):
+        """
+        Create the ontology part of one loaded document.
+
+        Args:
+            doc (DocumentChunk): Loaded document
+            boundaries (str, optional): Boundaries for ontology creation. Defaults to None.
+            attempt (int, optional): Number of this attempt at the document. Defaults to 1.
+
+        Returns:
+            tuple or FailedDocument: Piece IDs, source paths and ontology part, or the
+                classified failure, so the merger can tell which sources are incomplete
+        """
+        try:
+            chat = self._create_chat()
+            # New ontology is passed because self._process_source also uses merge_with
+            # If we pass a non-empty ontology, this will significantly increase the number of prompts needed!
+            with self.metrics.timer("extraction_seconds"):
+                new_ontology = self._process_source(chat, doc, Ontology(), boundaries)
+            self.metrics.increment("documents_extracted_total")
+            return doc.ids, doc.sources, new_ontology
+        except Exception as e:
+            failure = FailedDocument.from_exception(doc.ids, doc.sources, "extraction", e, attempt)
+            self.metrics.increment("extraction_failures_total")
+            self.metrics.increment(f"extraction_failures_{failure.kind}_total")
+            print(f"\nFailed to create ontology part ({failure.kind}, attempt {attempt}): {e}")
+            return failure
+
+    def _process_source(
+        self,
+        chat_session: GenerativeModelChatSession,
+        document: Document,
+        o: Ontology,
+        boundaries: str = None
+    ) -> Ontology:
+        """
+        Extract the ontology of one document like CreateOntologyStep._process_source,
+        but raise where the SDK logs an unreadable response and returns the ontology
+        unchanged, so the document is retried instead of counting as extracted.
+
+        Args:
+            chat_session (GenerativeModelChatSession): Chat session to use
+            document (Document): Document to extract
+            o (Ontology): Ontology the extracted one is merged into
+            boundaries (str, optional): Boundaries for ontology creation. Defaults to None.
+
+        Returns:
+            Ontology: Merged ontology
+
+        Raises:
+            MalformedResponseError: If the response is not an ontology, even after asking the model to fix its JSON
+            Exception: If the model stops for another reason than the end of its answer
+        """
+        user_message = CREATE_ONTOLOGY_PROMPT.format(
+            text=document.content[: self.config["max_input_tokens"]],
+            boundaries=BOUNDARIES_PREFIX.format(user_boundaries=boundaries) if boundaries is not None else ""
+        )
+        responses = [self._call_model(chat_session, user_message)]
+        while responses[-1].finish_reason == FinishReason.MAX_TOKENS:
+            responses.append(self._call_model(chat_session, "continue"))
+        if responses[-1].finish_reason != FinishReason.STOP:
+            raise Exception(f"Model stopped unexpectedly: {responses[-1].finish_reason}")
+
+        combined_text = " ".join([response.text for response in responses])
+        try:
+            data = json.loads(extract_json(combined_text))
+        except json.JSONDecodeError as e:
+            fix_response = self._call_model(
+                self._create_chat(),
+                FIX_JSON_PROMPT.format(json=combined_text, error=str(e))
+            )
+            try:
+                data = json.loads(extract_json(fix_response.text))
+            except json.JSONDecodeError as e:
+                raise MalformedResponseError(f"Response is not valid JSON: {e}") from e
+
+        try:
+            new_ontology = Ontology.from_json(data)
+        except Exception as e:
+            raise MalformedResponseError(f"Response is not an ontology: {e}") from e
+        return o.merge_with(new_ontology)
+
+    def _create_chat(self):
+        """
+        Start a chat session, served from the response cache when one is configured.
+
+        Returns:
+            GenerativeModelChatSession: Chat session
+        """
+        chat = super()._create_chat()
+        cache = self.config.get("response_cache")
+        if cache is None:
+            return chat
+        # Only cache misses go through the rate limiter
+        send = lambda message, output_method: call_with_retry(
+            lambda: chat.send_message(message, output_method),
+            message,
+            self._rate_limiter,
+            self.config,
+            metrics=self.metrics
+        )
+        return CachedChatSession(chat, self.model, cache, send=send)
+
+    def _call_model(
+        self,
+        chat_session: GenerativeModelChatSession,
+        prompt: str,
+        retry: int = None
+    ):
+        """
+        Send a prompt through the shared rate limiter, retrying rate-limit errors.
+
+        Args:
+            chat_session (GenerativeModelChatSession): Chat session to use
+            prompt (str): Prompt to send
+            retry (int, optional): Retries left on rate-limit errors. Defaults to the max_retries config value.
+
+        Returns:
+            GenerationResponse: Model response
+
+        Raises:
+            Exception: If the call fails for another reason or retries are exhausted
+        """
+        self.metrics.increment("model_requests_total")
+        if isinstance(chat_session, CachedChatSession):
+            # The cached session applies the limiter itself, on cache misses
+            return chat_session.send_message(prompt)
+
+        return call_with_retry(
+            lambda: chat_session.send_message(prompt),
+            prompt,
+            self._rate_limiter,
+            self.config,
+            retries=retry,
+            metrics=self.metrics
+        )
+
+    @staticmethod
+    def _cleanup_spill(spill: DocumentSpill) -> None:
+        # Removes the spill files of documents that were never consumed
+        if spill is not None:
+            spill.cleanup()
+
+    def _export_metrics(self) -> None:
+        # Writes the per-run JSON report and the final Prometheus text, when configured
+        if self.config.get("metrics_report"):
+            self.metrics.write_report(self.config["metrics_report"])
+        if self.config.get("metrics_file"):
+            self.metrics.write_prometheus(self.config["metrics_file"])
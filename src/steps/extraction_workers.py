@@ -0,0 +1,109 @@
+import threading
+from multiprocessing import Queue
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from ..failures.dead_letter import FailedDocument, TRANSIENT_ERRORS
+from ..failures.retry_queue import RetryQueue
+from ..transport.document_spill import SpilledDocument
+
+class ExtractionWorkers:
+    """
+    Thread pool of the ontology stage, extracting one ontology part per document
+    with ConcurrentCreateOntologyStep._create_part. A document that fails with a
+    transient error (LLM timeout, rate limit, malformed JSON) goes to a RetryQueue
+    and is extracted again after a backoff, without holding a thread or an
+    in-flight slot meanwhile. Once it succeeds or runs out of attempts, its result
+    is put on the results queue: the (piece IDs, source paths, ontology part)
+    triple, or a FailedDocument.
+    """
+
+    def __init__(self, step, boundaries: str, results: Queue, workers: int, max_in_flight: int = None) -> None:
+        """
+        Initialize ExtractionWorkers.
+
+        Args:
+            step (ConcurrentCreateOntologyStep): Step providing the extraction and configuration
+                (retry_queue_attempts, retry_queue_base_delay, retry_queue_max_delay)
+            boundaries (str): Boundaries for ontology creation
+            results (Queue): Queue receiving the result of each document
+            workers (int): Number of extraction threads
+            max_in_flight (int, optional): Documents extracted at once. Defaults to the number of threads.
+        """
+        self.step = step
+        self.boundaries = boundaries
+        self._results = results
+        self._workers = workers
+        self._slots = threading.BoundedSemaphore(max_in_flight or workers)
+        self._retries = RetryQueue(
+            self._resubmit,
+            max_attempts=step.config.get("retry_queue_attempts", 3),
+            base_delay=step.config.get("retry_queue_base_delay", 5.0),
+            max_delay=step.config.get("retry_queue_max_delay", 120.0)
+        )
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def __enter__(self) -> 'ExtractionWorkers':
+        self._pool = ThreadPoolExecutor(max_workers=self._workers)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.wait()
+        self._retries.close()
+        self._pool.shutdown()
+
+    def submit(self, doc) -> Future:
+        """
+        Extract a document, blocking until an in-flight slot is free.
+
+        Args:
+            doc (DocumentChunk or SpilledDocument): Loaded document
+
+        Returns:
+            Future: Resolved once the final result of the document is on the results queue
+        """
+        self._slots.acquire()
+        done = Future()
+        with self._lock:
+            self._pending.add(done)
+        done.add_done_callback(self._discard)
+        self._pool.submit(self._extract, doc, 1, done)
+        return done
+
+    def wait(self) -> None:
+        """
+        Wait until every submitted document has its final result, retries included.
+        """
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+
+    def _resubmit(self, doc, done: Future, attempt: int) -> None:
+        # Runs on the retry queue's thread once the backoff is over
+        self._slots.acquire()
+        self._pool.submit(self._extract, doc, attempt, done)
+
+    def _extract(self, doc, attempt: int, done: Future) -> None:
+        try:
+            try:
+                if isinstance(doc, SpilledDocument):
+                    # Taken once, so retries extract from memory
+                    doc = doc.take()
+            except Exception as e:
+                result = FailedDocument.from_exception(doc.ids, doc.sources, "extraction", e, attempt)
+            else:
+                result = self.step._create_part(doc, self.boundaries, attempt)
+                if isinstance(result, FailedDocument) and result.kind in TRANSIENT_ERRORS \
+                        and self._retries.schedule(attempt, doc, done):
+                    self.step.metrics.increment("extraction_retries_total")
+                    return
+            self._results.put(result)
+            done.set_result(None)
+        except BaseException as e:
+            done.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def _discard(self, done: Future) -> None:
+        with self._lock:
+            self._pending.discard(done)
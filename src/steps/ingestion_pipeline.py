@@ -0,0 +1,189 @@
+import traceback
+from threading import Event, Thread
+from multiprocessing import Process, Queue
+from concurrent.futures import wait
+from typing import List
+from graphrag_sdk.source import AbstractSource
+from ..loaders.process_pool_loader import ProcessPoolLoader
+from ..metrics.pipeline_metrics import MetricsSnapshot
+from ..transport.document_spill import DocumentSpill
+from ..failures.dead_letter import FailedDocument
+from .concurrent_ontology_step import ConcurrentCreateOntologyStep
+from .extraction_workers import ExtractionWorkers
+from .pipeline import END_OF_STREAM, SkippedDocument, load_sources, watch_process, stop_processes
+
+class BatchEnd:
+    """
+    Message following the last result of a batch of sources.
+    """
+
+    def __init__(self, batch_id: int, error: str = None):
+        """
+        Initialize BatchEnd.
+
+        Args:
+            batch_id (int): ID given to the batch when it was submitted
+            error (str, optional): Loading error that cut the batch short. Defaults to None.
+        """
+        self.batch_id = batch_id
+        self.error = error
+
+
+class IngestionPipeline:
+    """
+    Long-lived version of the ConcurrentCreateOntologyStep workflow: the loading
+    and extraction processes, and the loader worker pool, are started once and
+    fed with batches of sources. Results come back one ontology part at a time,
+    in the format of the step's ontology queue, with a BatchEnd after each batch.
+    """
+
+    def __init__(self, step: ConcurrentCreateOntologyStep, boundaries: str = None, workers: int = None) -> None:
+        """
+        Initialize IngestionPipeline.
+
+        Args:
+            step (ConcurrentCreateOntologyStep): Step providing the model, configuration and extraction
+            boundaries (str, optional): Boundaries for ontology creation. Defaults to None.
+            workers (int, optional): Number of concurrent extraction calls.
+                Defaults to the max_workers config value, or 15.
+        """
+        self.step = step
+        self.config = step.config
+        self.boundaries = boundaries
+        self.workers = workers or self.config.get("max_workers") or 15
+        self._processes = []
+        self._stopping = Event()
+        self._spill = None
+
+    def start(self) -> None:
+        """
+        Start the loading and extraction processes.
+        """
+        self._sources_queue = Queue()
+        self._documents_queue = Queue(maxsize=self.config.get("documents_queue_size") or 2 * self.workers)
+        self._results_queue = Queue()
+        if self.config.get("document_transport", "queue") == "spill":
+            self._spill = DocumentSpill(self.config.get("spill_dir"), self.config.get("spill_min_bytes", 16384))
+
+        self._processes = [
+            Process(target=self._loading_loop),
+            Process(target=self._extraction_loop)
+        ]
+        for process, stage in zip(self._processes, ("loading", "ontology")):
+            process.start()
+            Thread(target=watch_process, args=(process, stage, self._results_queue, self._stopping), daemon=True).start()
+
+    def submit(self, batch_id: int, sources: List[AbstractSource]) -> None:
+        """
+        Queue a batch of sources for loading and extraction.
+
+        Args:
+            batch_id (int): ID reported back in the BatchEnd of the batch
+            sources (List[AbstractSource]): Sources to process
+        """
+        self._sources_queue.put((batch_id, sources))
+
+    def get(self, timeout: float = None):
+        """
+        Take the next result.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to waiting until a result arrives.
+
+        Returns:
+            A (piece IDs, source paths, ontology part) triple, SkippedDocument, FailedDocument,
+            MetricsSnapshot, BatchEnd, StageFailure, or END_OF_STREAM once the pipeline has stopped
+
+        Raises:
+            queue.Empty: If no result arrived within the timeout
+        """
+        return self._results_queue.get(timeout=timeout)
+
+    def stop(self) -> None:
+        """
+        Ask the processes to stop once the submitted batches are done.
+        END_OF_STREAM follows the last result; join() may be called after it is taken.
+        """
+        self._sources_queue.put(END_OF_STREAM)
+
+    def join(self) -> None:
+        """
+        Wait for the processes to exit and remove the spill directory.
+        """
+        for process in self._processes:
+            process.join()
+        self._cleanup()
+
+    def terminate(self) -> None:
+        """
+        Stop the processes without waiting for the submitted batches, e.g. after a stage failure.
+        """
+        stop_processes(self._processes, self._stopping)
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        if self._spill is not None:
+            self._spill.cleanup()
+
+    def _loading_loop(self) -> None:
+        # The worker pool of the process loading mode is started once for all batches
+        pool = ProcessPoolLoader(
+            workers=self.config.get("loading_workers"),
+            timeout=self.config.get("loading_timeout")
+        ) if self.config.get("loading_mode", "thread") == "process" else None
+        if pool is not None:
+            pool.start()
+        metrics = self.step.metrics.child()
+
+        try:
+            while True:
+                item = self._sources_queue.get()
+                if item is END_OF_STREAM:
+                    break
+                batch_id, sources = item
+                error = None
+                try:
+                    load_sources(sources, self._documents_queue, self.config, self.workers,
+                                 metrics=metrics, spill=self._spill, pool=pool)
+                except Exception:
+                    # Only this batch is lost; its sources stay out of the manifest
+                    error = traceback.format_exc()
+                self._documents_queue.put(metrics.snapshot("loading", reset=True))
+                self._documents_queue.put(BatchEnd(batch_id, error))
+        finally:
+            if pool is not None:
+                pool.close()
+        self._documents_queue.put(END_OF_STREAM)
+
+    def _extraction_loop(self) -> None:
+        step = self.step
+        step.metrics = step.metrics.child()
+        pending, finishers = [], []
+
+        def finish_batch(futures, batch_end):
+            # Later batches keep flowing while the last documents of this one finish, retries included
+            wait(futures)
+            self._results_queue.put(step.metrics.snapshot("ontology", reset=True))
+            self._results_queue.put(batch_end)
+
+        with ExtractionWorkers(
+            step, self.boundaries, self._results_queue, self.workers, self.config.get("max_in_flight")
+        ) as workers:
+            while True:
+                doc = self._documents_queue.get()
+                if doc is END_OF_STREAM:
+                    break
+                if isinstance(doc, (MetricsSnapshot, SkippedDocument, FailedDocument)):
+                    self._results_queue.put(doc)
+                    continue
+                if isinstance(doc, BatchEnd):
+                    finisher = Thread(target=finish_batch, args=(pending, doc))
+                    finisher.start()
+                    finishers = [f for f in finishers if f.is_alive()] + [finisher]
+                    pending = []
+                    continue
+                pending.append(workers.submit(doc))
+
+        for finisher in finishers:
+            finisher.join()
+        self._results_queue.put(END_OF_STREAM)
@@ -0,0 +1,251 @@
+import traceback
+from contextlib import nullcontext
+from threading import Event
+from multiprocessing import Process, Queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Set
+from graphrag_sdk.source import AbstractSource
+from ..loaders.process_pool_loader import ProcessPoolLoader
+from ..chunking.document_chunker import DocumentChunker, DocumentChunk
+from ..metrics.pipeline_metrics import PipelineMetrics
+from ..failures.dead_letter import FailedDocument, PARSE_ERROR
+from ..transport.document_spill import DocumentSpill
+from ..utils.hashing import text_digest
+
+# Sentinel closing a queue once its producer is done
+END_OF_STREAM = None
+
+class StageFailure:
+    """
+    Message sent downstream in place of END_OF_STREAM when a stage fails.
+    """
+
+    def __init__(self, stage: str, message: str):
+        """
+        Initialize StageFailure.
+
+        Args:
+            stage (str): Name of the failed stage
+            message (str): Error description or traceback
+        """
+        self.stage = stage
+        self.message = message
+
+
+class SkippedDocument:
+    """
+    Message sent downstream in place of a document that duplicates an earlier one,
+    so its source counts as covered once the run completes.
+    """
+
+    def __init__(self, ids: List[str], sources: List[str], duplicate_of: str):
+        """
+        Initialize SkippedDocument.
+
+        Args:
+            ids (List[str]): ID of the skipped document
+            sources (List[str]): Path of the source it comes from
+            duplicate_of (str): ID of the earlier document it duplicates
+        """
+        self.ids = ids
+        self.sources = sources
+        self.duplicate_of = duplicate_of
+
+
+def loading_process(
+    sources: List[AbstractSource],
+    documents_queue: Queue,
+    config: dict,
+    workers: int,
+    completed: Set[str] = frozenset(),
+    metrics: PipelineMetrics = None,
+    spill: DocumentSpill = None,
+    consumers: int = 1
+) -> None:
+    """
+    Process for loading documents from sources concurrently, see load_sources.
+
+    Args:
+        sources (List[AbstractSource]): List of source objects
+        documents_queue (Queue): Queue for storing loaded documents, closed with END_OF_STREAM
+        config (dict): Step configuration, see load_sources
+        workers (int): Default number of loading threads
+        completed (Set[str], optional): IDs of pieces to skip. Defaults to none.
+        metrics (PipelineMetrics, optional): Parent registry; the stage records into a child
+            registry sent downstream as a MetricsSnapshot before the queue is closed.
+        spill (DocumentSpill, optional): Spill directory; large chunks are written there and
+            only a SpilledDocument handle goes through the queue. Defaults to none.
+        consumers (int, optional): Processes reading the queue; each one gets its own END_OF_STREAM.
+            Defaults to 1.
+    """
+    metrics = metrics.child() if metrics is not None else PipelineMetrics()
+
+    try:
+        load_sources(sources, documents_queue, config, workers, completed, metrics, spill)
+    except Exception:
+        documents_queue.put(metrics.snapshot("loading"))
+        documents_queue.put(StageFailure("loading", traceback.format_exc()))
+        # The other consumers stop as well
+        for _ in range(consumers - 1):
+            documents_queue.put(END_OF_STREAM)
+        return
+
+    documents_queue.put(metrics.snapshot("loading"))
+    for _ in range(consumers):
+        documents_queue.put(END_OF_STREAM)
+    print('\nAll sources are loaded. Stopping the loading process...')
+
+
+def load_sources(
+    sources: List[AbstractSource],
+    documents_queue: Queue,
+    config: dict,
+    workers: int,
+    completed: Set[str] = frozenset(),
+    metrics: PipelineMetrics = None,
+    spill: DocumentSpill = None,
+    pool: ProcessPoolLoader = None
+) -> None:
+    """
+    Load documents from sources concurrently and put them on a queue.
+    Documents are chunked and packed when chunk_tokens is configured and
+    always leave as DocumentChunk objects carrying stable piece IDs and the
+    instruction of their source. With dedup_threshold configured, documents
+    nearly identical to an earlier one are replaced by a SkippedDocument.
+    A source that fails to load is reported with a FailedDocument, and the
+    other sources carry on.
+
+    Args:
+        sources (List[AbstractSource]): List of source objects
+        documents_queue (Queue): Queue for storing loaded documents
+        config (dict): Step configuration (loading_mode, loading_workers, loading_timeout, chunk_tokens,
+            dedup_threshold, dedup_num_perm)
+        workers (int): Default number of loading threads
+        completed (Set[str], optional): IDs of pieces to skip. Defaults to none.
+        metrics (PipelineMetrics, optional): Registry to record into. Defaults to a new one.
+        spill (DocumentSpill, optional): Spill directory for large chunks. Defaults to none.
+        pool (ProcessPoolLoader, optional): Running worker pool for the process loading mode.
+            Defaults to a pool started for these sources.
+    """
+    metrics = metrics if metrics is not None else PipelineMetrics()
+
+    # Large documents are split and small ones packed to keep prompts near the token budget
+    chunk_tokens = config.get("chunk_tokens")
+    chunker = DocumentChunker(max_tokens=chunk_tokens) if chunk_tokens else None
+
+    # Near-duplicates would cost an LLM call each for an ontology the merge dedupes anyway
+    threshold = config.get("dedup_threshold")
+    dedup = None
+    if threshold:
+        # numpy is only imported by runs that deduplicate
+        from ..dedup.near_duplicate_filter import NearDuplicateFilter
+        dedup = NearDuplicateFilter(threshold, config.get("dedup_num_perm") or 128)
+    document_sources = {}
+
+    def put_document(doc, source):
+        if dedup is not None and skip_duplicate(doc, source):
+            return
+        instruction = getattr(source, "instruction", None)
+        pieces = chunker.split(doc, source.path, instruction) if chunker is not None \
+            else [DocumentChunk.from_document(doc, source.path, instruction)]
+        for piece in pieces:
+            # Pieces merged by an earlier, interrupted run are already in the snapshot
+            if piece.id in completed:
+                metrics.increment("pieces_skipped_total")
+                continue
+            for chunk in chunker.add(piece) if chunker is not None else [piece]:
+                put_chunk(chunk)
+
+    def skip_duplicate(doc, source):
+        doc_id = text_digest(source.path, doc.content)
+        match = dedup.add(doc_id, doc.content)
+        if match is None:
+            document_sources[doc_id] = source.path
+            return False
+        duplicate_of, similarity = match
+        metrics.increment("duplicates_skipped_total")
+        print(f"\nSkipped near-duplicate document {doc_id} of {source.path}: "
+              f"matches {duplicate_of} of {document_sources[duplicate_of]} (similarity {similarity:.2f})")
+        documents_queue.put(SkippedDocument([doc_id], [source.path], duplicate_of))
+        return True
+
+    def put_chunk(chunk):
+        metrics.increment("chunks_queued_total")
+        if spill is not None:
+            chunk = spill.spill(chunk)
+        # Time spent blocked here is backpressure from the extraction stage
+        with metrics.timer("documents_queue_put_seconds"):
+            documents_queue.put(chunk)
+
+    def fail_source(source, error):
+        # Documents it yielded before failing are still extracted, but the source is not complete
+        metrics.increment("sources_failed_total")
+        print(f"\nFailed to load source: {source.path} ({error})")
+        documents_queue.put(FailedDocument([], [source.path], "loading", PARSE_ERROR, error))
+
+    def load_source(source):
+        try:
+            with metrics.timer("source_load_seconds"):
+                for doc in source.load():
+                    put_document(doc, source)
+        except Exception as e:
+            fail_source(source, f"{type(e).__name__}: {e}")
+            return
+        metrics.increment("sources_loaded_total")
+        print(f"\nLoaded source: {source.path}")
+
+    if config.get("loading_mode", "thread") == "process":
+        # Partitioning is CPU-bound, so spread it over worker processes
+        with nullcontext(pool) if pool is not None else ProcessPoolLoader(
+            workers=config.get("loading_workers"),
+            timeout=config.get("loading_timeout")
+        ) as pool:
+            for result in pool.load(sources):
+                if result.error is not None:
+                    fail_source(result.source, result.error)
+                    continue
+                for doc in result.documents:
+                    put_document(doc, result.source)
+                metrics.increment("sources_loaded_total")
+                print(f"\nLoaded source: {result.source.path}")
+    else:
+        with ThreadPoolExecutor(max_workers=config.get("loading_workers") or workers) as threads:
+            futures = [threads.submit(load_source, source) for source in sources]
+            for future in futures:
+                future.result()
+
+    if chunker is not None:
+        for chunk in chunker.flush():
+            put_chunk(chunk)
+
+
+def watch_process(process: Process, stage: str, queue: Queue, stopping: Event = None) -> None:
+    """
+    Report a stage that exits abnormally so the consumer never waits on a dead producer.
+
+    Args:
+        process (Process): Stage process to watch
+        stage (str): Name of the stage
+        queue (Queue): Queue read by the final consumer
+        stopping (Event, optional): Set once the run stops its stages. Defaults to None.
+    """
+    process.join()
+    # A terminated stage may have died holding the queue's write lock, so nothing is reported then
+    if process.exitcode != 0 and not (stopping is not None and stopping.is_set()):
+        queue.put(StageFailure(stage, f"process exited with code {process.exitcode}"))
+
+
+def stop_processes(processes: Iterable[Process], stopping: Event = None) -> None:
+    """
+    Terminate stage processes that are still running after a failure.
+
+    Args:
+        processes (Iterable[Process]): Stage processes
+        stopping (Event, optional): Event silencing the watchers of those processes. Defaults to None.
+    """
+    if stopping is not None:
+        stopping.set()
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+        process.join()
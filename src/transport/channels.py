@@ -0,0 +1,317 @@
+import os
+import time
+import queue
+import pickle
+import shutil
+import socket
+import tempfile
+import threading
+from multiprocessing import Queue, current_process
+from multiprocessing.managers import BaseManager
+from ..llm.rate_limiter import RateLimiter, SharedRateLimiter
+
+# Channel transports
+QUEUE = "queue"
+TCP = "tcp"
+SPOOL = "spool"
+
+class SpoolChannel:
+    """
+    Channel kept as a directory of pickled messages, e.g. on storage shared by
+    the nodes of a run. A message is written under a temporary name and renamed
+    once complete, and a consumer claims it by renaming it again, so each message
+    is taken exactly once. Messages of one producer are taken in the order they were put.
+    Only processes trusted to write the directory may use it, as messages are unpickled.
+    """
+
+    def __init__(self, directory: str, maxsize: int = 0, poll_interval: float = 0.05) -> None:
+        """
+        Initialize SpoolChannel.
+
+        Args:
+            directory (str): Directory of the channel, created if missing
+            maxsize (int, optional): Messages waiting before put blocks, 0 for no bound. Defaults to 0.
+            poll_interval (float, optional): Seconds between two looks at the directory. Defaults to 0.05.
+        """
+        self.directory = directory
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last = 0
+        self._sequence = 0
+
+    def put(self, item, block: bool = True, timeout: float = None) -> None:
+        """
+        Put a message on the channel.
+
+        Args:
+            item: Picklable message
+            block (bool, optional): Wait while the channel is full. Defaults to True.
+            timeout (float, optional): Seconds to wait. Defaults to waiting until there is room.
+
+        Raises:
+            queue.Full: If the channel stayed full
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.maxsize > 0 and self.qsize() >= self.maxsize:
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise queue.Full
+            time.sleep(self.poll_interval)
+
+        with self._lock:
+            # Never decreasing, so the names of one producer sort in put order even if the clock steps back
+            self._last = max(time.time_ns(), self._last + 1)
+            self._sequence += 1
+            name = f"{self._last:020d}-{socket.gethostname()}-{os.getpid()}-{self._sequence}"
+        temporary = os.path.join(self.directory, name + ".tmp")
+        with open(temporary, "wb") as file:
+            pickle.dump(item, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, os.path.join(self.directory, name + ".msg"))
+
+    def get(self, block: bool = True, timeout: float = None):
+        """
+        Take the oldest message of the channel.
+
+        Args:
+            block (bool, optional): Wait while the channel is empty. Defaults to True.
+            timeout (float, optional): Seconds to wait. Defaults to waiting until a message arrives.
+
+        Returns:
+            Message
+
+        Raises:
+            queue.Empty: If no message arrived
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        claim = f".{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        while True:
+            for name in self._messages():
+                path = os.path.join(self.directory, name)
+                try:
+                    os.rename(path, path + claim)
+                except FileNotFoundError:
+                    # Claimed by another consumer
+                    continue
+                with open(path + claim, "rb") as file:
+                    item = pickle.load(file)
+                os.remove(path + claim)
+                return item
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise queue.Empty
+            time.sleep(self.poll_interval)
+
+    def qsize(self) -> int:
+        """
+        Count the messages waiting.
+
+        Returns:
+            int: Number of messages put and not taken yet
+        """
+        return len(self._messages())
+
+    def _messages(self) -> list:
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".msg"))
+
+
+class ChannelBroker(BaseManager):
+    """
+    TCP server holding the channels of a run in memory. Clients on any node
+    connect with the address and authentication key of the server and get a
+    proxy of each channel, with the put, get and qsize methods of a queue.
+    """
+
+
+_broker_channels = {}
+_broker_lock = threading.Lock()
+
+def _broker_channel(name: str, maxsize: int = 0) -> queue.Queue:
+    # Runs in the broker process; the first request for a name sets its bound
+    with _broker_lock:
+        if name not in _broker_channels:
+            _broker_channels[name] = queue.Queue(maxsize)
+        return _broker_channels[name]
+
+_broker_limiter = []
+
+def _broker_rate_limiter(requests_per_minute: int = None, tokens_per_minute: int = None) -> RateLimiter:
+    # Runs in the broker process; the first request sets the quotas shared by the run
+    with _broker_lock:
+        if not _broker_limiter:
+            _broker_limiter.append(RateLimiter(requests_per_minute, tokens_per_minute))
+        return _broker_limiter[0]
+
+ChannelBroker.register("channel", callable=_broker_channel)
+ChannelBroker.register("rate_limiter", callable=_broker_rate_limiter, exposed=("reserve",))
+
+
+class ChannelTransport:
+    """
+    Opens the named channels the pipeline stages talk through: multiprocessing
+    queues on a single host, or channels of a TCP broker or of a spool directory,
+    so stages can also run on other nodes. Documents, ontology parts and the
+    signals closing a stream (END_OF_STREAM, StageFailure, MetricsSnapshot)
+    travel through the same channels in every transport.
+
+    The process running the merge calls serve(), which starts the TCP broker
+    (or picks the spool directory), before the channels are opened. Stages in
+    processes forked from it may use the opened channels; stages elsewhere open
+    their own with the same configuration.
+    """
+
+    def __init__(
+        self,
+        transport: str = QUEUE,
+        address: str = None,
+        authkey: str = None,
+        spool_dir: str = None,
+        connect_timeout: float = 60.0
+    ) -> None:
+        """
+        Initialize ChannelTransport.
+
+        Args:
+            transport (str, optional): QUEUE, TCP or SPOOL. Defaults to QUEUE.
+            address (str, optional): "host:port" of the TCP broker. serve() listens on it,
+                by default on a free port of 127.0.0.1; other processes connect to it.
+            authkey (str, optional): Key authenticating the TCP broker clients. Required
+                on other nodes; defaults to the key of the current process tree.
+            spool_dir (str, optional): Directory holding the spool channels, shared by the nodes.
+                serve() defaults it to a temporary directory, for a run on a single host.
+            connect_timeout (float, optional): Seconds to wait for the TCP broker to come up. Defaults to 60.
+        """
+        if transport not in (QUEUE, TCP, SPOOL):
+            raise ValueError(f"Unknown channel transport: {transport}")
+        self.transport = transport
+        self.address = _parse_address(address) if address else None
+        self.authkey = authkey.encode("utf-8") if authkey else bytes(current_process().authkey)
+        self.spool_dir = spool_dir
+        self.connect_timeout = connect_timeout
+        self._broker = None
+        self._served = False
+        self._owns_spool_dir = False
+        self._channels = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'ChannelTransport':
+        """
+        Build the transport of a step configuration.
+
+        Args:
+            config (dict): Step configuration (channel_transport, channel_address,
+                channel_authkey, channel_spool_dir, channel_connect_timeout)
+
+        Returns:
+            ChannelTransport: Transport, not served or connected yet
+        """
+        return cls(
+            config.get("channel_transport") or QUEUE,
+            config.get("channel_address"),
+            config.get("channel_authkey"),
+            config.get("channel_spool_dir"),
+            config.get("channel_connect_timeout", 60.0)
+        )
+
+    def serve(self) -> None:
+        """
+        Start the TCP broker, or pick the spool directory, for the stages of one run.
+        """
+        self._served = True
+        if self.transport == TCP:
+            self._broker = ChannelBroker(address=self.address or ("127.0.0.1", 0), authkey=self.authkey)
+            self._broker.start()
+            # The actual port when a free one was picked
+            self.address = self._broker.address
+        elif self.transport == SPOOL and self.spool_dir is None:
+            self.spool_dir = tempfile.mkdtemp(prefix="batch2kg-channels-")
+            self._owns_spool_dir = True
+
+    def channel(self, name: str, maxsize: int = 0):
+        """
+        Open a channel, once per name.
+
+        Args:
+            name (str): Channel name, the same in every process of the run
+            maxsize (int, optional): Messages waiting before put blocks, 0 for no bound. Defaults to 0.
+
+        Returns:
+            multiprocessing.Queue, a broker proxy or SpoolChannel: Channel with put, get and qsize
+
+        Raises:
+            ValueError: If the transport is missing its address or directory
+        """
+        if name in self._channels:
+            return self._channels[name]
+        if self.transport == QUEUE:
+            channel = Queue(maxsize=maxsize)
+        elif self.transport == TCP:
+            if self._broker is None:
+                self._broker = self._connect()
+            channel = self._broker.channel(name, maxsize)
+        else:
+            if self.spool_dir is None:
+                raise ValueError("channel_spool_dir is required to use spool channels outside the serving process")
+            channel = SpoolChannel(os.path.join(self.spool_dir, name), maxsize)
+        self._channels[name] = channel
+        return channel
+
+    def rate_limiter(self, requests_per_minute: int = None, tokens_per_minute: int = None, processes: int = 1) -> RateLimiter:
+        """
+        Get the rate limiter of processes sharing the model quotas, e.g. the ontology
+        processes of a run. With TCP channels, the quotas are held by the broker and
+        shared by every process of the run, wherever it runs. Other transports have no
+        process to hold them, so each process gets an equal share of the quotas.
+
+        Args:
+            requests_per_minute (int, optional): Request quota of the run. Defaults to unlimited.
+            tokens_per_minute (int, optional): Token quota of the run. Defaults to unlimited.
+            processes (int, optional): Processes sharing the quotas. Defaults to 1.
+
+        Returns:
+            RateLimiter: Limiter for one of the processes
+        """
+        if self.transport == TCP:
+            if self._broker is None:
+                self._broker = self._connect()
+            return SharedRateLimiter(self._broker.rate_limiter(requests_per_minute, tokens_per_minute))
+        return RateLimiter(
+            requests_per_minute / processes if requests_per_minute else None,
+            tokens_per_minute / processes if tokens_per_minute else None
+        )
+
+    def close(self) -> None:
+        """
+        Release the channels. In the serving process this also stops the TCP broker,
+        or removes the spool channels with any message left in them.
+        """
+        channels, self._channels = self._channels, {}
+        if not self._served:
+            return
+        if self._broker is not None:
+            self._broker.shutdown()
+            self._broker = None
+        if self.transport == SPOOL and self._owns_spool_dir:
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+        elif self.transport == SPOOL:
+            for channel in channels.values():
+                shutil.rmtree(channel.directory, ignore_errors=True)
+
+    def _connect(self) -> ChannelBroker:
+        if self.address is None:
+            raise ValueError("channel_address is required to use tcp channels outside the serving process")
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            broker = ChannelBroker(address=self.address, authkey=self.authkey)
+            try:
+                broker.connect()
+                return broker
+            except ConnectionRefusedError:
+                # Stages may start before the merging process serves the broker
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.5)
+
+
+def _parse_address(address: str) -> tuple:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
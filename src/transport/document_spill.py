@@ -0,0 +1,105 @@
+import os
+import mmap
+import shutil
+import tempfile
+import itertools
+from typing import List
+from ..chunking.document_chunker import DocumentChunk
+
+# tmpfs, so spilled text stays in shared memory instead of going to disk
+SHARED_MEMORY_DIR = "/dev/shm"
+
+class SpilledDocument:
+    """
+    Small handle sent over a queue in place of a DocumentChunk whose text
+    was written to a spill file.
+    """
+
+    def __init__(self, path: str, size: int, ids: List[str], sources: List[str], instruction: str = None):
+        """
+        Initialize SpilledDocument.
+
+        Args:
+            path (str): Spill file holding the UTF-8 text
+            size (int): Size of the text in bytes, never 0
+            ids (List[str]): IDs of the pieces in the chunk
+            sources (List[str]): Paths of the sources the pieces come from
+            instruction (str, optional): Extraction instruction of those sources. Defaults to None.
+        """
+        self.path = path
+        self.size = size
+        self.ids = ids
+        self.sources = sources
+        self.instruction = instruction
+
+    def take(self) -> DocumentChunk:
+        """
+        Read the chunk back and delete the spill file.
+
+        Returns:
+            DocumentChunk: Chunk with its text
+        """
+        try:
+            with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Decoded straight from the mapping, without an intermediate bytes copy
+                content = str(mapped, "utf-8")
+        finally:
+            self.release()
+        return DocumentChunk(content, self.ids, self.sources, self.instruction)
+
+    def release(self) -> None:
+        """
+        Delete the spill file.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class DocumentSpill:
+    """
+    Directory of spill files owned by one pipeline run. The loading process
+    writes large chunks into it and the consumers delete each file once read;
+    whatever is left after a failure goes with the directory in cleanup().
+    """
+
+    def __init__(self, directory: str = None, min_bytes: int = 16384) -> None:
+        """
+        Initialize DocumentSpill.
+
+        Args:
+            directory (str, optional): Parent of the spill directory. Defaults to
+                /dev/shm when available, otherwise the system temporary directory.
+            min_bytes (int, optional): Smallest text spilled; shorter chunks travel
+                through the queue as they are. Defaults to 16 KiB.
+        """
+        if directory is None and os.path.isdir(SHARED_MEMORY_DIR):
+            directory = SHARED_MEMORY_DIR
+        self.directory = tempfile.mkdtemp(prefix="batch2kg-", dir=directory)
+        self.min_bytes = min_bytes
+        self._names = itertools.count()
+
+    def spill(self, chunk: DocumentChunk):
+        """
+        Write the text of a chunk to a spill file.
+
+        Args:
+            chunk (DocumentChunk): Chunk to send
+
+        Returns:
+            DocumentChunk or SpilledDocument: The chunk itself when it is short, otherwise its handle
+        """
+        data = chunk.content.encode("utf-8")
+        if len(data) < max(self.min_bytes, 1):
+            return chunk
+        path = os.path.join(self.directory, f"{os.getpid()}-{next(self._names)}.txt")
+        with open(path, "wb") as file:
+            file.write(data)
+        return SpilledDocument(path, len(data), chunk.ids, chunk.sources, chunk.instruction)
+
+    def cleanup(self) -> None:
+        """
+        Remove the spill directory and any file not consumed yet.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
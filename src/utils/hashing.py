@@ -0,0 +1,37 @@
+import hashlib
+
+# Read size used while hashing files, large enough to keep syscalls cheap
+CHUNK_SIZE = 1 << 20
+
+def file_digest(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file's content.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def text_digest(*parts: str) -> str:
+    """
+    Compute the SHA-256 digest of one or more strings.
+
+    Args:
+        *parts (str): Strings to hash, in order
+
+    Returns:
+        str: Hex digest of the joined parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        # Separator keeps ("ab", "c") and ("a", "bc") from colliding
+        digest.update(b'\x00')
+    return digest.hexdigest()
@@ -0,0 +1,20 @@
+import math
+
+# Average characters per token for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+# Characters of a message the GraphRAG-SDK OpenAI chat session sends; the rest is cut off
+MESSAGE_CHARS = 14385
+
+def estimate_tokens(text: str, chars_per_token: float = CHARS_PER_TOKEN) -> int:
+    """
+    Estimate the number of tokens in a text without running a tokenizer.
+
+    Args:
+        text (str): Text to measure
+        chars_per_token (float, optional): Average characters per token. Defaults to 4.
+
+    Returns:
+        int: Estimated token count
+    """
+    return math.ceil(len(text) / chars_per_token)
@@ -0,0 +1,19 @@
+from graphrag_sdk.document import Document
+from graphrag_sdk.source import AbstractSource
+
+class StaticSource(AbstractSource):
+    def load(self):
+        yield Document(f"Entity{self.path}")
+
+class TextSource(AbstractSource):
+    def __init__(self, path, text):
+        super().__init__(path)
+        self.text = text
+        
+    def load(self):
+        yield Document(self.text)
+
+class FailingSource(AbstractSource):
+    def load(self):
+        raise ValueError("broken source")
+        yield
@@ -0,0 +1,52 @@
+import pytest
+import pickle
+from src.cache.blob_cache import BlobCache
+
+class TestBlobCache:
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return BlobCache(str(tmp_path / "cache.sqlite"))
+    
+    def test_set_and_get(self, cache):
+        cache.set("key", b"value")
+        assert cache.get("key") == b"value"
+        assert "key" in cache
+        assert len(cache) == 1
+        
+    def test_missing_key(self, cache):
+        assert cache.get("missing") is None
+        assert "missing" not in cache
+        
+    def test_persistence(self, cache):
+        cache.set("key", b"value")
+        reopened = BlobCache(cache.path)
+        assert reopened.get("key") == b"value"
+        
+    def test_lru_eviction(self, tmp_path):
+        cache = BlobCache(str(tmp_path / "cache.sqlite"))
+        cache.set("old", b"a" * 100)
+        cache.set("recent", b"b" * 100)
+        cache.get("old")
+        
+        # Shrink the budget so only one entry fits
+        cache.max_bytes = cache.size() - 1
+        cache.set("new", b"c")
+        
+        assert "old" in cache
+        assert "recent" not in cache
+        assert "new" in cache
+        
+    def test_pickle(self, cache):
+        cache.set("key", b"value")
+        restored = pickle.loads(pickle.dumps(cache))
+        assert restored.get("key") == b"value"
+        
+    def test_ttl_expiry(self, tmp_path):
+        cache = BlobCache(str(tmp_path / "cache.sqlite"), ttl=60)
+        cache.set("key", b"value")
+        assert cache.get("key") == b"value"
+        
+        cache.ttl = -1
+        assert cache.get("key") is None
+        assert "key" not in cache
@@ -0,0 +1,91 @@
+import pytest
+from graphrag_sdk.models import GenerationResponse, FinishReason
+from src.cache.blob_cache import BlobCache
+from src.llm.cached_chat_session import CachedChatSession
+from unittest.mock import MagicMock
+
+class TestCachedChatSession:
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return BlobCache(str(tmp_path / "responses.sqlite"))
+    
+    @pytest.fixture
+    def model(self):
+        model = MagicMock()
+        model.to_json.return_value = {"model_name": "test-model"}
+        return model
+    
+    def make_chat(self, *texts, finish_reason=FinishReason.STOP):
+        chat = MagicMock()
+        chat._history = []
+        chat.send_message.side_effect = [GenerationResponse(text, finish_reason) for text in texts]
+        return chat
+    
+    def test_cache_hit(self, cache, model):
+        first = self.make_chat("answer")
+        CachedChatSession(first, model, cache).send_message("question")
+        
+        second = self.make_chat()
+        response = CachedChatSession(second, model, cache).send_message("question")
+        
+        assert response.text == "answer"
+        assert response.finish_reason == FinishReason.STOP
+        second.send_message.assert_not_called()
+        
+    def test_key_depends_on_model(self, cache, model):
+        CachedChatSession(self.make_chat("answer"), model, cache).send_message("question")
+        
+        other_model = MagicMock()
+        other_model.to_json.return_value = {"model_name": "other-model"}
+        chat = self.make_chat("other answer")
+        response = CachedChatSession(chat, other_model, cache).send_message("question")
+        
+        assert response.text == "other answer"
+        
+    def test_key_depends_on_history(self, cache, model):
+        session = CachedChatSession(self.make_chat("part 1", "part 2"), model, cache)
+        session.send_message("question")
+        assert session.send_message("continue").text == "part 2"
+        
+        chat = self.make_chat("fresh")
+        assert CachedChatSession(chat, model, cache).send_message("continue").text == "fresh"
+        
+    def test_seeds_history_on_partial_hit(self, cache, model):
+        CachedChatSession(self.make_chat("part 1"), model, cache).send_message("question")
+        
+        chat = self.make_chat("part 2")
+        session = CachedChatSession(chat, model, cache)
+        session.send_message("question")
+        response = session.send_message("continue")
+        
+        assert response.text == "part 2"
+        # Only the uncached turn is sent, on top of the cached transcript
+        assert [c.args[0] for c in chat.send_message.call_args_list] == ["continue"]
+        assert chat._history == [
+            {"role": "user", "content": "question"},
+            {"role": "assistant", "content": "part 1"}
+        ]
+        
+    def test_send_used_on_misses_only(self, cache, model):
+        CachedChatSession(self.make_chat("answer"), model, cache).send_message("question")
+        
+        send = MagicMock(return_value=GenerationResponse("other", FinishReason.STOP))
+        session = CachedChatSession(self.make_chat(), model, cache, send=send)
+        session.send_message("question")
+        session.send_message("other question")
+        
+        send.assert_called_once()
+        assert send.call_args.args[0] == "other question"
+        
+    def test_bypassed_without_transcript(self, cache, model):
+        chat = MagicMock(spec=["send_message"])
+        chat.send_message.return_value = GenerationResponse("answer", FinishReason.STOP)
+        CachedChatSession(chat, model, cache).send_message("question")
+        
+        assert len(cache) == 0
+        
+    def test_failed_responses_not_cached(self, cache, model):
+        session = CachedChatSession(self.make_chat("error", finish_reason=FinishReason.OTHER), model, cache)
+        session.send_message("question")
+        assert len(cache) == 0
@@ -0,0 +1,136 @@
+import queue
+import pytest
+from multiprocessing import Process, Queue
+from threading import Thread
+from src.transport.channels import ChannelTransport, SpoolChannel, QUEUE, TCP, SPOOL
+
+def produce(transport, count):
+    # Runs in a forked process, through the channel opened by the parent
+    channel = transport.channel("items")
+    for i in range(count):
+        channel.put(i)
+    channel.put(None)
+
+def reserve(transport, count, results):
+    limiter = transport.rate_limiter(requests_per_minute=60, processes=3)
+    results.put(max(limiter.reserve() for _ in range(count)))
+
+class TestSpoolChannel:
+    
+    def test_messages_in_put_order(self, tmp_path):
+        channel = SpoolChannel(str(tmp_path / "items"))
+        for i in range(20):
+            channel.put({"n": i})
+        
+        assert channel.qsize() == 20
+        assert [channel.get()["n"] for _ in range(20)] == list(range(20))
+        assert channel.qsize() == 0
+        
+    def test_get_times_out(self, tmp_path):
+        channel = SpoolChannel(str(tmp_path / "items"))
+        
+        with pytest.raises(queue.Empty):
+            channel.get(timeout=0.1)
+            
+    def test_put_waits_for_room(self, tmp_path):
+        channel = SpoolChannel(str(tmp_path / "items"), maxsize=2)
+        channel.put(1)
+        channel.put(2)
+        
+        with pytest.raises(queue.Full):
+            channel.put(3, block=False)
+        assert channel.get() == 1
+        channel.put(3, timeout=1)
+        assert [channel.get(), channel.get()] == [2, 3]
+        
+    def test_each_message_taken_once(self, tmp_path):
+        producer = SpoolChannel(str(tmp_path / "items"))
+        for i in range(200):
+            producer.put(i)
+        taken = []
+        
+        def consume():
+            channel = SpoolChannel(str(tmp_path / "items"))
+            while True:
+                try:
+                    taken.append(channel.get(block=False))
+                except queue.Empty:
+                    return
+                    
+        threads = [Thread(target=consume) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+        assert sorted(taken) == list(range(200))
+
+
+class TestChannelTransport:
+    
+    @pytest.mark.parametrize("transport", [QUEUE, TCP, SPOOL])
+    def test_forked_producer(self, transport):
+        server = ChannelTransport(transport)
+        server.serve()
+        try:
+            channel = server.channel("items")
+            producer = Process(target=produce, args=(server, 50))
+            producer.start()
+            
+            items = []
+            while (item := channel.get(timeout=10)) is not None:
+                items.append(item)
+            producer.join()
+            
+            assert items == list(range(50))
+        finally:
+            server.close()
+            
+    def test_tcp_client_with_address(self):
+        server = ChannelTransport(TCP, authkey="secret")
+        server.serve()
+        try:
+            host, port = server.address
+            client = ChannelTransport(TCP, address=f"{host}:{port}", authkey="secret")
+            client.channel("items", maxsize=4).put("hello")
+            
+            assert server.channel("items").get(timeout=5) == "hello"
+            assert server.channel("items").qsize() == 0
+        finally:
+            server.close()
+            
+    def test_spool_close_removes_channels(self, tmp_path):
+        server = ChannelTransport(SPOOL, spool_dir=str(tmp_path))
+        server.serve()
+        ChannelTransport(SPOOL, spool_dir=str(tmp_path)).channel("items").put("left over")
+        server.channel("items")
+        
+        server.close()
+        
+        assert list(tmp_path.iterdir()) == []
+        
+    def test_client_needs_address(self):
+        with pytest.raises(ValueError):
+            ChannelTransport(TCP).channel("items")
+        with pytest.raises(ValueError):
+            ChannelTransport(SPOOL).channel("items")
+        with pytest.raises(ValueError):
+            ChannelTransport("carrier-pigeon")
+            
+    @pytest.mark.parametrize("transport", [QUEUE, TCP])
+    def test_rate_limiter_quota_is_per_run(self, transport):
+        server = ChannelTransport(transport)
+        server.serve()
+        try:
+            results = Queue()
+            processes = [Process(target=reserve, args=(server, 40, results)) for _ in range(3)]
+            for process in processes:
+                process.start()
+            waits = [results.get(timeout=10) for _ in processes]
+            for process in processes:
+                process.join()
+        finally:
+            server.close()
+            
+        # 120 requests against 60 per minute: the last ones are a minute away
+        assert max(waits) >= 59
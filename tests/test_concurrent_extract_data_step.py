@@ -0,0 +1,116 @@
+import json
+import pytest
+from src.steps.concurrent_extract_data_step import ConcurrentExtractDataStep
+from src.graph.local_graph import LocalGraph
+from graphrag_sdk import Ontology
+from unittest.mock import MagicMock, patch
+from tests.sources import StaticSource, FailingSource
+
+class InstructedSource(StaticSource):
+    def __init__(self, path):
+        super().__init__(path)
+        self.instruction = f"Only{path}"
+
+def extract_queries(self, task_id, chat, doc, ontology, graph, source_instructions, instructions):
+    for label in doc.content.split():
+        graph.query(f"MERGE (n:{label})")
+
+def extract_instruction(self, task_id, chat, doc, ontology, graph, source_instructions, instructions):
+    graph.query(f"MERGE (n:{source_instructions})")
+
+def extract_or_fail(self, task_id, chat, doc, ontology, graph, source_instructions, instructions):
+    if doc.content == "Entity0":
+        raise Exception("Model stopped unexpectedly")
+    extract_queries(self, task_id, chat, doc, ontology, graph, source_instructions, instructions)
+
+class TestConcurrentExtractDataStep:
+    
+    @pytest.fixture
+    def extract_step(self, tmp_path, monkeypatch):
+        # ExtractDataStep creates a logs directory in the working directory
+        monkeypatch.chdir(tmp_path)
+        return ConcurrentExtractDataStep(
+            sources=[],
+            ontology=Ontology(),
+            model=MagicMock(),
+            graph=LocalGraph(),
+            config={
+                "max_workers": 4,
+                "max_input_tokens": 1000,
+                "max_output_tokens": 500
+            }
+        )
+    
+    @patch.object(ConcurrentExtractDataStep, "_process_source", extract_queries)
+    def test_run_writes_all_documents(self, extract_step):
+        extract_step.sources = [StaticSource(str(i)) for i in range(30)]
+        extract_step.config["documents_queue_size"] = 2
+        extract_step.config["write_batch_size"] = 7
+        
+        writer = extract_step.run(workers=3)
+        
+        assert writer.written == 30
+        assert sorted(extract_step.graph.queries) == sorted(f"MERGE (n:Entity{i})" for i in range(30))
+        
+    @patch.object(ConcurrentExtractDataStep, "_process_source", extract_queries)
+    def test_run_with_chunking(self, extract_step):
+        extract_step.sources = [StaticSource(str(i)) for i in range(30)]
+        extract_step.config["chunk_tokens"] = 20
+        
+        extract_step.run(workers=3)
+        
+        assert sorted(extract_step.graph.queries) == sorted(f"MERGE (n:Entity{i})" for i in range(30))
+        
+    @patch.object(ConcurrentExtractDataStep, "_process_source", extract_instruction)
+    def test_run_passes_source_instructions(self, extract_step):
+        extract_step.sources = [InstructedSource(str(i)) for i in range(3)]
+        extract_step.config["chunk_tokens"] = 20
+        
+        extract_step.run(workers=2)
+        
+        assert sorted(extract_step.graph.queries) == [f"MERGE (n:Only{i})" for i in range(3)]
+        
+    @patch.object(ConcurrentExtractDataStep, "_process_source", extract_or_fail)
+    def test_run_skips_failed_documents(self, extract_step, tmp_path):
+        dead_letter_file = tmp_path / "dead-letter.jsonl"
+        extract_step.sources = [StaticSource(str(i)) for i in range(3)]
+        extract_step.config["dead_letter_file"] = str(dead_letter_file)
+        
+        extract_step.run(workers=2)
+        
+        assert sorted(extract_step.graph.queries) == ["MERGE (n:Entity1)", "MERGE (n:Entity2)"]
+        assert extract_step.metrics.report()["counters"]["documents_failed_total"] == 1
+        records = [json.loads(line) for line in dead_letter_file.read_text().splitlines()]
+        assert [(r["sources"], r["stage"], r["kind"]) for r in records] == [(["0"], "extraction", "error")]
+        assert "Model stopped unexpectedly" in records[0]["error"]
+        
+    @patch.object(ConcurrentExtractDataStep, "_process_source", extract_queries)
+    def test_run_skips_failed_sources(self, extract_step, tmp_path):
+        dead_letter_file = tmp_path / "dead-letter.jsonl"
+        extract_step.sources = [StaticSource("0"), FailingSource("broken")]
+        extract_step.config["dead_letter_file"] = str(dead_letter_file)
+        
+        extract_step.run(workers=2)
+        
+        assert extract_step.graph.queries == ["MERGE (n:Entity0)"]
+        assert extract_step.metrics.report()["counters"]["sources_failed_total"] == 1
+        assert extract_step.metrics.report()["counters"]["documents_failed_total"] == 1
+        records = [json.loads(line) for line in dead_letter_file.read_text().splitlines()]
+        assert [(r["sources"], r["stage"]) for r in records] == [(["broken"], "loading")]
+            
+    def test_close_task_log(self, extract_step):
+        handler = MagicMock()
+        with patch("logging.getLogger") as get_logger:
+            get_logger.return_value.handlers = [handler]
+            ConcurrentExtractDataStep._close_task_log("extract_data_step_1")
+        
+        handler.close.assert_called_once()
+        get_logger.return_value.removeHandler.assert_called_once_with(handler)
+            
+    def test_call_model_retries_rate_limit(self, extract_step):
+        extract_step.config.update({"retry_base_delay": 0, "retry_max_delay": 0})
+        chat = MagicMock()
+        chat.send_message.side_effect = [Exception("Rate limit reached"), "response"]
+        
+        assert extract_step._call_model(chat, "prompt") == "response"
+        assert chat.send_message.call_count == 2
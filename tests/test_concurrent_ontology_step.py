@@ -1,10 +1,41 @@
 import pytest
-from multiprocessing import Queue
+import os
+import json
+import socket
+from multiprocessing import Process, Queue
 from src.steps.concurrent_ontology_step import ConcurrentCreateOntologyStep
 from graphrag_sdk import Ontology
-from graphrag_sdk.source import AbstractSource
 from src.sources.unstructured_source import UnstructuredSource
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.document import Document
+from graphrag_sdk.models import GenerationResponse, FinishReason
+from src.cache.blob_cache import BlobCache
+from src.failures.dead_letter import MalformedResponseError
+from src.ontology.ontology_diff import fingerprint
 from unittest.mock import MagicMock, patch, call
+from tests.sources import StaticSource, TextSource, FailingSource
+
+def extract_entity(self, chat, doc, ontology, boundaries):
+    return Ontology([Entity(label, []) for label in doc.content.split()], [])
+
+def extract_or_fail(self, chat, doc, ontology, boundaries):
+    if doc.content == "Entity0":
+        raise Exception("Model stopped unexpectedly")
+    return extract_entity(self, chat, doc, ontology, boundaries)
+
+def extract_with_wait(self, chat, doc, ontology, boundaries):
+    # Reserves one request of the process's limiter and reports how long it would have to wait
+    wait = self._rate_limiter.reserve(1)
+    return Ontology([Entity(f"Wait{int(wait)}", [])], [])
+
+timed_out = set()
+
+def extract_or_time_out_once(self, chat, doc, ontology, boundaries):
+    # Each document times out on its first attempt, in the process running the extraction
+    if doc.content not in timed_out:
+        timed_out.add(doc.content)
+        raise TimeoutError("Request timed out")
+    return extract_entity(self, chat, doc, ontology, boundaries)
 
 class TestConcurrentCreateOntologyStep:
     
@@ -42,6 +73,95 @@ class TestConcurrentCreateOntologyStep:
     def test_initialization(self, ontology_step):
         assert isinstance(ontology_step.ontology, Ontology)
         assert isinstance(ontology_step.model, MagicMock)
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_merges_all_documents(self, ontology_step):
+        ontology_step.sources = [StaticSource(str(i)) for i in range(30)]
+        ontology_step.config["documents_queue_size"] = 2
+        
+        result = ontology_step.run(workers=3)
+        
+        assert sorted(entity.label for entity in result.entities) == \
+            sorted(f"Entity{i}" for i in range(30))
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_collects_stage_metrics(self, ontology_step, tmp_path):
+        ontology_step.sources = [StaticSource(str(i)) for i in range(10)]
+        ontology_step.config["metrics_report"] = str(tmp_path / "metrics.json")
+        
+        ontology_step.run(workers=3)
+        
+        report = ontology_step.metrics.report()
+        assert report["counters"]["sources_loaded_total"] == 10
+        assert report["counters"]["documents_extracted_total"] == 10
+        assert report["counters"]["parts_merged_total"] == 10
+        assert report["histograms"]["extraction_seconds"]["count"] == 10
+        assert report["histograms"]["fix_seconds"]["count"] == 1
+        assert "documents_queue_depth" in report["gauges"]
+        assert (tmp_path / "metrics.json").exists()
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_with_chunking(self, ontology_step):
+        ontology_step.sources = [StaticSource(str(i)) for i in range(30)]
+        ontology_step.config["chunk_tokens"] = 20
+        
+        result = ontology_step.run(workers=3)
+        
+        assert sorted(entity.label for entity in result.entities) == \
+            sorted(f"Entity{i}" for i in range(30))
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    def test_run_resumes_from_journal(self, ontology_step, tmp_path):
+        log_path = tmp_path / "processed.log"
+        
+        def extract_logged(self, chat, doc, ontology, boundaries):
+            if doc.content == "Entity3" and not (tmp_path / "healed").exists():
+                raise Exception("model timeout")
+            with open(log_path, "a") as file:
+                file.write(doc.content + "\n")
+            return extract_entity(self, chat, doc, ontology, boundaries)
+        
+        ontology_step.sources = [StaticSource(str(i)) for i in range(5)]
+        ontology_step.config["journal_dir"] = str(tmp_path / "journal")
+        
+        with patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_logged):
+            first = ontology_step.run(workers=2)
+            assert len(first.entities) == 4
+            
+            (tmp_path / "healed").touch()
+            log_path.unlink()
+            ontology_step.config["resume"] = True
+            ontology_step.ontology = Ontology()
+            second = ontology_step.run(workers=2)
+        
+        assert log_path.read_text().split() == ["Entity3"]
+        assert sorted(entity.label for entity in second.entities) == \
+            sorted(f"Entity{i}" for i in range(5))
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_isolates_loading_failure(self, ontology_step, tmp_path):
+        dead_letter_file = tmp_path / "dead-letter.jsonl"
+        ontology_step.sources = [StaticSource("1"), FailingSource("2")]
+        ontology_step.config["dead_letter_file"] = str(dead_letter_file)
+        
+        result = ontology_step.run(workers=2)
+        
+        assert [entity.label for entity in result.entities] == ["Entity1"]
+        assert ontology_step.completed_sources == ["1"]
+        records = [json.loads(line) for line in dead_letter_file.read_text().splitlines()]
+        assert [(r["sources"], r["stage"], r["kind"]) for r in records] == [(["2"], "loading", "parse")]
+        assert "broken source" in records[0]["error"]
+            
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", lambda self, chat, doc, o, b: Ontology())
+    def test_run_empty_ontology(self, ontology_step):
+        ontology_step.sources = [StaticSource("1")]
+        
+        with pytest.raises(Exception, match="Ontology is empty"):
+            ontology_step.run(workers=2)
     
     # @patch("src.steps.concurrent_ontology_step.ConcurrentCreateOntologyStep._create_chat", autospec=True)
     # @patch("src.steps.concurrent_ontology_step.ConcurrentCreateOntologyStep._process_source", autospec=True)
@@ -67,3 +187,256 @@ class TestConcurrentCreateOntologyStep:
     #     assert result == step_ontology
     #     mock_create_chat.assert_called()
     #     mock_fix_ontology.assert_called_once_with(mock_create_chat.return_value, step_ontology)
+
+    def test_call_model_retries_rate_limit(self, ontology_step):
+        ontology_step.config["retry_base_delay"] = 0
+        chat = MagicMock()
+        chat.send_message.side_effect = [Exception("429 rate limit"), Exception("429 rate limit"), "response"]
+        
+        assert ontology_step._call_model(chat, "prompt") == "response"
+        assert chat.send_message.call_count == 3
+        
+    def test_call_model_raises_other_errors(self, ontology_step):
+        chat = MagicMock()
+        chat.send_message.side_effect = ValueError("bad request")
+        
+        with pytest.raises(ValueError):
+            ontology_step._call_model(chat, "prompt")
+        assert chat.send_message.call_count == 1
+        
+    def test_call_model_gives_up(self, ontology_step):
+        ontology_step.config["retry_base_delay"] = 0
+        chat = MagicMock()
+        chat.send_message.side_effect = Exception("Quota exceeded")
+        
+        with pytest.raises(Exception, match="Quota exceeded"):
+            ontology_step._call_model(chat, "prompt", retry=2)
+        assert chat.send_message.call_count == 3
+        
+    def test_cache_hits_skip_rate_limiter(self, ontology_step, tmp_path):
+        ontology_step.model.to_json.return_value = {"model_name": "test-model"}
+        ontology_step.model.start_chat.return_value._history = []
+        ontology_step.model.start_chat.return_value.send_message.return_value = \
+            GenerationResponse("answer", FinishReason.STOP)
+        ontology_step.config["response_cache"] = BlobCache(str(tmp_path / "responses.sqlite"))
+        ontology_step._rate_limiter = MagicMock()
+        
+        ontology_step._call_model(ontology_step._create_chat(), "prompt")
+        ontology_step._call_model(ontology_step._create_chat(), "prompt")
+        
+        ontology_step._rate_limiter.acquire.assert_called_once()
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_or_fail)
+    def test_run_reports_completed_sources(self, ontology_step):
+        ontology_step.sources = [StaticSource(str(i)) for i in range(3)] + [FailingSource("broken")]
+        ontology_step.config["loading_mode"] = "process"
+        
+        ontology_step.run(workers=2)
+        
+        assert ontology_step.completed_sources == ["1", "2"]
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_or_time_out_once)
+    def test_run_retries_transient_failures(self, ontology_step, tmp_path):
+        ontology_step.sources = [StaticSource(str(i)) for i in range(4)]
+        ontology_step.config.update({
+            "retry_queue_base_delay": 0.01,
+            "dead_letter_file": str(tmp_path / "dead-letter.jsonl")
+        })
+        
+        result = ontology_step.run(workers=2)
+        
+        assert sorted(entity.label for entity in result.entities) == [f"Entity{i}" for i in range(4)]
+        counters = ontology_step.metrics.report()["counters"]
+        assert counters["extraction_retries_total"] == 4
+        assert counters["extraction_failures_llm_timeout_total"] == 4
+        assert not (tmp_path / "dead-letter.jsonl").exists()
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_or_fail)
+    def test_run_dead_letters_permanent_failures(self, ontology_step, tmp_path):
+        dead_letter_file = tmp_path / "dead-letter.jsonl"
+        ontology_step.sources = [StaticSource(str(i)) for i in range(3)]
+        ontology_step.config["dead_letter_file"] = str(dead_letter_file)
+        
+        ontology_step.run(workers=2)
+        
+        records = [json.loads(line) for line in dead_letter_file.read_text().splitlines()]
+        # Errors that are not transient are not retried
+        assert [(r["sources"], r["stage"], r["kind"], r["attempts"]) for r in records] == \
+            [(["0"], "extraction", "error", 1)]
+        assert "extraction_retries_total" not in ontology_step.metrics.report()["counters"]
+        
+    def test_process_source_raises_on_malformed_json(self, ontology_step):
+        response = GenerationResponse(text="not an ontology", finish_reason=FinishReason.STOP)
+        ontology_step._call_model = MagicMock(return_value=response)
+        
+        with pytest.raises(MalformedResponseError):
+            ontology_step._process_source(MagicMock(), Document("Some text"), Ontology())
+        # The model was asked once to fix its JSON
+        assert ontology_step._call_model.call_count == 2
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_skips_near_duplicates(self, ontology_step):
+        text = " ".join(f"Entity{i}" for i in range(200))
+        ontology_step.sources = [TextSource("original", text), TextSource("copy", text)]
+        ontology_step.config["dedup_threshold"] = 0.9
+        
+        ontology_step.run(workers=2)
+        
+        counters = ontology_step.metrics.report()["counters"]
+        assert counters["documents_extracted_total"] == 1
+        assert counters["duplicates_skipped_total"] == 1
+        # The skipped copy is covered by the original
+        assert sorted(ontology_step.completed_sources) == ["copy", "original"]
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_with_spill_transport(self, ontology_step, tmp_path):
+        ontology_step.sources = [TextSource(str(i), f"Entity{i} " * 50) for i in range(10)]
+        ontology_step.config.update({"document_transport": "spill", "spill_dir": str(tmp_path), "spill_min_bytes": 1})
+        
+        result = ontology_step.run(workers=3)
+        
+        assert sorted(entity.label for entity in result.entities) == sorted(f"Entity{i}" for i in range(10))
+        # The spill directory is gone once the run ends
+        assert os.listdir(tmp_path) == []
+        
+    @pytest.mark.parametrize("transport", ["tcp", "spool"])
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_channel_transports_match_queues(self, transport, ontology_step):
+        sources = [TextSource(str(i), f"Entity{i} Entity{i + 1}") for i in range(20)]
+        # One loading thread and one extraction call keep the merge order fixed
+        ontology_step.sources = sources
+        ontology_step.config["loading_workers"] = 1
+        expected = ontology_step.run(workers=1).to_json()
+        
+        step = ConcurrentCreateOntologyStep(
+            sources=sources,
+            ontology=Ontology(),
+            model=MagicMock(),
+            config={**ontology_step.config, "channel_transport": transport}
+        )
+        
+        assert step.run(workers=1).to_json() == expected
+        assert sorted(step.completed_sources) == sorted(source.path for source in sources)
+        
+    @pytest.mark.parametrize("transport", ["tcp", "spool"])
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_with_remote_ontology_stage(self, transport, ontology_step, tmp_path):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        ontology_step.sources = [StaticSource(str(i)) for i in range(30)]
+        ontology_step.config.update({
+            "channel_transport": transport,
+            "channel_address": f"127.0.0.1:{port}",
+            "channel_authkey": "test",
+            "channel_spool_dir": str(tmp_path / "channels"),
+            "remote_stages": ["ontology"],
+            "ontology_processes": 2
+        })
+        # Stand-ins for extraction nodes, started before the broker is up
+        remote = [Process(target=ontology_step.run_stage, args=("ontology", None, 3)) for _ in range(2)]
+        for process in remote:
+            process.start()
+            
+        result = ontology_step.run(workers=3)
+        for process in remote:
+            process.join(timeout=10)
+            
+        assert sorted(entity.label for entity in result.entities) == sorted(f"Entity{i}" for i in range(30))
+        assert all(process.exitcode == 0 for process in remote)
+        counters = ontology_step.metrics.report()["counters"]
+        assert counters["documents_extracted_total"] == 30
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_with_several_ontology_processes(self, ontology_step):
+        ontology_step.sources = [StaticSource(str(i)) for i in range(30)]
+        ontology_step.config["ontology_processes"] = 3
+        
+        result = ontology_step.run(workers=2)
+        
+        assert sorted(entity.label for entity in result.entities) == sorted(f"Entity{i}" for i in range(30))
+        assert ontology_step.metrics.report()["counters"]["documents_extracted_total"] == 30
+        
+    @pytest.mark.parametrize("transport", ["queue", "tcp"])
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_with_wait)
+    def test_ontology_processes_share_request_quota(self, transport, ontology_step):
+        ontology_step.sources = [StaticSource(str(i)) for i in range(20)]
+        ontology_step.config.update({
+            "channel_transport": transport,
+            "requests_per_minute": 10,
+            "ontology_processes": 2
+        })
+        
+        result = ontology_step.run(workers=2)
+        
+        # 20 requests against a quota of 10 per minute: the last ones wait about a minute,
+        # whereas a full quota per process would let nearly all of them through at once
+        assert max(int(entity.label[len("Wait"):]) for entity in result.entities) >= 55
+        
+    def test_run_stage_needs_channels(self, ontology_step):
+        with pytest.raises(ValueError):
+            ontology_step.run_stage("ontology")
+        
+    def test_fix_changes_sends_only_changes(self, ontology_step):
+        ontology = Ontology([Entity(f"Entity{i}", []) for i in range(50)], [])
+        baseline = fingerprint(ontology)
+        ontology.add_entity(Entity("Planet", []))
+        sent = []
+        
+        def fix(chat, part):
+            sent.append(sorted(entity.label for entity in part.entities))
+            return part.merge_with(Ontology([Entity("Moon", [])], []))
+        
+        with patch.object(ontology_step, "_fix_ontology", side_effect=fix):
+            fixed = ontology_step._fix_changes(ontology, baseline)
+            
+        assert sent == [["Planet"]]
+        assert [entity.label for entity in fixed.entities[-2:]] == ["Planet", "Moon"]
+        assert ontology_step.metrics.report()["counters"]["fix_calls_total"] == 1
+        
+    def test_fix_changes_in_bounded_parts(self, ontology_step):
+        ontology = Ontology([Entity(f"Entity{i}", []) for i in range(200)], [])
+        ontology_step.config["fix_part_tokens"] = 100
+        
+        with patch.object(ontology_step, "_fix_ontology", side_effect=lambda chat, part: part) as fix:
+            fixed = ontology_step._fix_changes(ontology, {})
+            
+        assert fix.call_count > 1
+        assert sorted(entity.label for call in fix.call_args_list for entity in call.args[1].entities) == \
+            sorted(entity.label for entity in ontology.entities)
+        assert fixed is ontology and len(fixed.entities) == 200
+        
+    def test_fix_changes_full_mode(self, ontology_step):
+        ontology = Ontology([Entity(f"Entity{i}", []) for i in range(10)], [])
+        ontology_step.config["fix_mode"] = "full"
+        
+        with patch.object(ontology_step, "_fix_ontology", side_effect=lambda chat, o: o) as fix:
+            ontology_step._fix_changes(ontology, fingerprint(ontology))
+            
+        fix.assert_called_once()
+        assert fix.call_args.args[1] is ontology
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_entity)
+    def test_run_fixes_what_the_run_added(self, ontology_step):
+        ontology_step.ontology = Ontology([Entity(f"Known{i}", []) for i in range(20)], [])
+        ontology_step.sources = [StaticSource(str(i)) for i in range(5)]
+        sent = []
+        
+        def fix(self, chat, part):
+            sent.extend(entity.label for entity in part.entities)
+            return part
+        
+        with patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", fix):
+            result = ontology_step.run(workers=2)
+            
+        assert sorted(sent) == sorted(f"Entity{i}" for i in range(5))
+        assert len(result.entities) == 25
@@ -0,0 +1,58 @@
+import json
+import pytest
+from src.failures.dead_letter import (
+    DeadLetterFile,
+    FailedDocument,
+    MalformedResponseError,
+    classify_error
+)
+
+class APITimeoutError(Exception):
+    pass
+
+class TestDeadLetter:
+    
+    @pytest.mark.parametrize("error, kind", [
+        (Exception("429 rate limit reached"), "rate_limit"),
+        (TimeoutError(), "llm_timeout"),
+        (APITimeoutError("Request timed out."), "llm_timeout"),
+        (MalformedResponseError("Response is not valid JSON"), "malformed_json"),
+        (json.JSONDecodeError("Expecting value", "x", 0), "malformed_json"),
+        (ValueError("Model stopped unexpectedly"), "error")
+    ])
+    def test_classify_error(self, error, kind):
+        assert classify_error(error) == kind
+        
+    def test_from_exception(self):
+        failure = FailedDocument.from_exception(["id"], ["a.txt"], "extraction", TimeoutError("slow"), attempts=3)
+        
+        assert failure.to_json() == {
+            "ids": ["id"],
+            "sources": ["a.txt"],
+            "stage": "extraction",
+            "kind": "llm_timeout",
+            "error": "TimeoutError: slow",
+            "attempts": 3
+        }
+        
+    def test_append_and_read(self, tmp_path):
+        dead_letters = DeadLetterFile(str(tmp_path / "logs" / "dead-letter.jsonl"))
+        assert dead_letters.records() == []
+        
+        dead_letters.append(FailedDocument([], ["b.pdf"], "loading", "parse", "broken"))
+        dead_letters.append(FailedDocument(["1"], ["a.txt", "b.pdf"], "extraction", "error", "failed"))
+        records = dead_letters.records()
+        
+        assert [record["stage"] for record in records] == ["loading", "extraction"]
+        # Each source once, in the order it first failed
+        assert dead_letters.sources(records) == ["b.pdf", "a.txt"]
+        
+    def test_drop_keeps_newer_records(self, tmp_path):
+        dead_letters = DeadLetterFile(str(tmp_path / "dead-letter.jsonl"))
+        for name in ("a", "b", "c"):
+            dead_letters.append(FailedDocument([], [name], "loading", "parse", "broken"))
+            
+        dead_letters.drop(2)
+        
+        assert dead_letters.sources(dead_letters.records()) == ["c"]
+        assert [path.name for path in tmp_path.iterdir()] == ["dead-letter.jsonl"]
@@ -0,0 +1,44 @@
+import os
+from src.sources.directory_watcher import DirectoryWatcher
+
+class TestDirectoryWatcher:
+    
+    def test_reports_settled_files(self, tmp_path):
+        watcher = DirectoryWatcher([str(tmp_path)], debounce=0)
+        path = tmp_path / "doc.txt"
+        path.write_text("first")
+        
+        # Seen once, then reported when unchanged on the next poll
+        assert watcher.poll() == []
+        assert watcher.poll() == [str(path)]
+        assert watcher.poll() == []
+        
+    def test_waits_for_debounce(self, tmp_path):
+        watcher = DirectoryWatcher([str(tmp_path)], debounce=60)
+        (tmp_path / "doc.txt").write_text("content")
+        
+        assert watcher.poll() == []
+        assert watcher.poll() == []
+        
+    def test_reports_changed_files_again(self, tmp_path):
+        watcher = DirectoryWatcher([str(tmp_path)], debounce=0)
+        path = tmp_path / "doc.txt"
+        path.write_text("first")
+        watcher.poll()
+        watcher.poll()
+        
+        path.write_text("second version")
+        
+        assert watcher.poll() == []
+        assert watcher.poll() == [str(path)]
+        
+    def test_ignores_partial_files(self, tmp_path):
+        watcher = DirectoryWatcher([str(tmp_path)], debounce=0)
+        (tmp_path / "upload.part").write_text("partial")
+        (tmp_path / ".hidden").write_text("hidden")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "nested.txt").write_text("nested")
+        
+        watcher.poll()
+        
+        assert watcher.poll() == [os.path.join(str(tmp_path), "sub", "nested.txt")]
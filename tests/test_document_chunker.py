@@ -0,0 +1,82 @@
+import pytest
+from graphrag_sdk.document import Document
+from src.chunking.document_chunker import DocumentChunker, DocumentChunk
+from src.loaders.unstructured_loader import ElementDocument
+
+class TestDocumentChunker:
+    
+    @pytest.fixture
+    def chunker(self):
+        return DocumentChunker(max_tokens=10, chars_per_token=1)
+    
+    def test_small_document_kept_whole(self, chunker):
+        chunks = chunker.split(Document("short"), "a.pdf")
+        assert len(chunks) == 1
+        assert chunks[0].content == "short"
+        assert chunks[0].sources == ["a.pdf"]
+        
+    def test_split_on_element_boundaries(self, chunker):
+        document = Document("first\nsecond\nthird\nfourth")
+        chunks = chunker.split(document, "a.pdf")
+        
+        assert [chunk.content for chunk in chunks] == ["first", "second", "third", "fourth"]
+        assert len({chunk.id for chunk in chunks}) == 4
+        
+    def test_split_at_section_titles(self):
+        chunker = DocumentChunker(max_tokens=20, chars_per_token=1)
+        document = ElementDocument(
+            "Intro\nabcdefgh\nMethods\nijkl\nmnop",
+            ["Title", "NarrativeText", "Title", "NarrativeText", "NarrativeText"]
+        )
+        chunks = chunker.split(document, "a.pdf")
+        
+        assert [chunk.content for chunk in chunks] == ["Intro\nabcdefgh", "Methods\nijkl\nmnop"]
+        
+    def test_split_counts_separators(self, chunker):
+        chunks = chunker.split(Document("abcde\nfghij"), "a.pdf")
+        assert [chunk.content for chunk in chunks] == ["abcde", "fghij"]
+        
+    def test_oversized_element_cut_at_whitespace(self, chunker):
+        chunks = chunker.split(Document("aaaa bbbb cccc dddd"), "a.pdf")
+        assert all(len(chunk.content) <= 10 for chunk in chunks)
+        assert " ".join(chunk.content for chunk in chunks) == "aaaa bbbb cccc dddd"
+        
+    def test_pack_small_documents(self, chunker):
+        ready = chunker.chunk(Document("ab"), "a.txt")
+        ready += chunker.chunk(Document("cd"), "b.txt")
+        assert ready == []
+        
+        ready += chunker.chunk(Document("efgh"), "c.txt")
+        ready += chunker.chunk(Document("ijkl"), "d.txt")
+        ready += chunker.flush()
+        
+        # Separators count toward the budget
+        assert [chunk.content for chunk in ready] == ["ab\n\ncd", "efgh\n\nijkl"]
+        assert all(len(chunk.content) <= 10 for chunk in ready)
+        assert ready[0].sources == ["a.txt", "b.txt"]
+        assert len(ready[0].ids) == 2
+        
+    def test_pack_only_same_instruction(self, chunker):
+        ready = chunker.add(DocumentChunk.from_document(Document("ab"), "a.txt", "people"))
+        ready += chunker.add(DocumentChunk.from_document(Document("cd"), "b.txt", "people"))
+        ready += chunker.add(DocumentChunk.from_document(Document("ef"), "c.txt", "places"))
+        ready += chunker.flush()
+        
+        assert [chunk.content for chunk in ready] == ["ab\n\ncd", "ef"]
+        assert [chunk.instruction for chunk in ready] == ["people", "places"]
+        
+    def test_large_chunks_not_packed(self, chunker):
+        ready = chunker.chunk(Document("abcdefgh"), "a.txt")
+        assert [chunk.content for chunk in ready] == ["abcdefgh"]
+        
+    def test_ids_are_stable(self):
+        document = Document("first\nsecond\nthird")
+        first = DocumentChunker(max_tokens=2).split(document, "a.pdf")
+        second = DocumentChunker(max_tokens=2).split(document, "a.pdf")
+        assert [chunk.id for chunk in first] == [chunk.id for chunk in second]
+        
+    def test_chunk_all(self, chunker):
+        documents = [(Document("ab"), "a.txt"), (Document("cd"), "b.txt")]
+        chunks = list(chunker.chunk_all(documents))
+        assert len(chunks) == 1
+        assert isinstance(chunks[0], DocumentChunk)
@@ -0,0 +1,36 @@
+import os
+import pickle
+from src.chunking.document_chunker import DocumentChunk
+from src.transport.document_spill import DocumentSpill, SpilledDocument
+
+class TestDocumentSpill:
+    
+    def test_spill_and_take(self, tmp_path):
+        spill = DocumentSpill(str(tmp_path), min_bytes=10)
+        chunk = DocumentChunk("Große Dokumente " * 100, ["id"], ["source"], "instruction")
+        
+        handle = spill.spill(chunk)
+        # Only the handle goes through the queue
+        handle = pickle.loads(pickle.dumps(handle))
+        restored = handle.take()
+        
+        assert isinstance(handle, SpilledDocument)
+        assert len(pickle.dumps(handle)) < len(chunk.content)
+        assert restored.content == chunk.content
+        assert (restored.ids, restored.sources, restored.instruction) == (["id"], ["source"], "instruction")
+        assert os.listdir(spill.directory) == []
+        
+    def test_short_chunks_not_spilled(self, tmp_path):
+        spill = DocumentSpill(str(tmp_path), min_bytes=1000)
+        chunk = DocumentChunk("short", ["id"], ["source"])
+        
+        assert spill.spill(chunk) is chunk
+        assert os.listdir(spill.directory) == []
+        
+    def test_cleanup_removes_unconsumed_files(self, tmp_path):
+        spill = DocumentSpill(str(tmp_path), min_bytes=1)
+        spill.spill(DocumentChunk("never read", ["id"], ["source"]))
+        
+        spill.cleanup()
+        
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,46 @@
+from src.graph.graph_writer import GraphBatchWriter, GRAPH_QUERY_CMD
+from src.graph.local_graph import LocalGraph
+from unittest.mock import MagicMock
+from falkordb import FalkorDB, Graph
+from redis import Redis
+
+class TestGraphBatchWriter:
+    
+    def test_writes_full_batches_in_order(self):
+        graph = LocalGraph()
+        writer = GraphBatchWriter(graph, batch_size=2)
+        
+        writer.add(["q1", "q2", "q3"])
+        assert graph.queries == ["q1", "q2"]
+        
+        writer.flush()
+        assert graph.queries == ["q1", "q2", "q3"]
+        assert writer.written == 3
+        
+    def test_counts_failed_queries(self):
+        graph = MagicMock(spec=["query"])
+        graph.query.side_effect = [None, Exception("syntax error")]
+        writer = GraphBatchWriter(graph, batch_size=10)
+        
+        writer.add(["q1", "q2"])
+        writer.flush()
+        
+        assert writer.written == 1
+        assert writer.failed == 1
+        
+    def test_uses_connection_pipeline(self):
+        db = MagicMock(spec=FalkorDB)
+        db.connection = MagicMock(spec=Redis)
+        db.execute_command = db.connection.execute_command
+        graph = Graph(db, "knowledge_graph")
+        pipe = db.connection.pipeline.return_value
+        pipe.execute.return_value = ["ok", Exception("syntax error")]
+        writer = GraphBatchWriter(graph, batch_size=2)
+        
+        writer.add(["q1", "q2"])
+        
+        db.connection.pipeline.assert_called_once_with(transaction=True)
+        pipe.execute_command.assert_any_call(GRAPH_QUERY_CMD, "knowledge_graph", "q1", "--compact")
+        db.execute_command.assert_not_called()
+        assert writer.written == 1
+        assert writer.failed == 1
@@ -0,0 +1,45 @@
+import random
+from src.dedup.near_duplicate_filter import NearDuplicateFilter
+
+def words(seed, count=500):
+    rng = random.Random(seed)
+    return [f"word{rng.randrange(5000)}" for _ in range(count)]
+
+class TestNearDuplicateFilter:
+    
+    def test_detects_near_duplicate(self):
+        dedup = NearDuplicateFilter(threshold=0.8)
+        original = words(0)
+        revision = list(original)
+        revision[100] = "changed"
+        
+        assert dedup.add("original", " ".join(original)) is None
+        match, similarity = dedup.add("revision", " ".join(revision))
+        
+        assert match == "original"
+        assert similarity >= 0.8
+        
+    def test_keeps_distinct_documents(self):
+        dedup = NearDuplicateFilter(threshold=0.8)
+        
+        assert dedup.add("first", " ".join(words(0))) is None
+        assert dedup.add("second", " ".join(words(1))) is None
+        
+    def test_threshold(self):
+        original = words(0)
+        # Half of the text rewritten
+        rewritten = original[:250] + words(1, 250)
+        
+        strict = NearDuplicateFilter(threshold=0.9)
+        strict.add("original", " ".join(original))
+        loose = NearDuplicateFilter(threshold=0.2)
+        loose.add("original", " ".join(original))
+        
+        assert strict.add("rewritten", " ".join(rewritten)) is None
+        assert loose.add("rewritten", " ".join(rewritten))[0] == "original"
+        
+    def test_ignores_empty_text(self):
+        dedup = NearDuplicateFilter()
+        
+        assert dedup.add("empty", "") is None
+        assert dedup.add("blank", "  \n ") is None
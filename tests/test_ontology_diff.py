@@ -0,0 +1,84 @@
+import random
+from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.relation import Relation
+from graphrag_sdk.attribute import Attribute, AttributeType
+from graphrag_sdk.fixtures.prompts import FIX_ONTOLOGY_PROMPT
+from src.ontology.ontology_diff import fingerprint, changed_parts, fix_part_tokens
+from src.ontology.ontology_merger import OntologyMerger
+from src.utils.tokens import MESSAGE_CHARS
+from tests.test_ontology_merger import random_ontology
+
+def labels(parts):
+    entities = {entity.label for part in parts for entity in part.entities}
+    relations = {relation.label for part in parts for relation in part.relations}
+    return entities, relations
+
+def chain(size):
+    # Entity0 -NEXT0-> Entity1 -NEXT1-> Entity2 ...
+    return Ontology(
+        [Entity(f"Entity{i}", []) for i in range(size)],
+        [Relation(f"NEXT{i}", f"Entity{i}", f"Entity{i + 1}", []) for i in range(size - 1)]
+    )
+
+class TestOntologyDiff:
+    
+    def test_unchanged_ontology_has_no_parts(self):
+        ontology = OntologyMerger().add_all([random_ontology(random.Random(i)) for i in range(20)]).ontology
+        
+        assert changed_parts(ontology, fingerprint(ontology), 8000) == []
+        
+    def test_empty_baseline_covers_everything(self):
+        ontology = OntologyMerger().add_all([random_ontology(random.Random(i)) for i in range(20)]).ontology
+        
+        entities, relations = labels(changed_parts(ontology, {}, 200))
+        
+        assert entities == {entity.label for entity in ontology.entities}
+        assert relations == {relation.label for relation in ontology.relations}
+        
+    def test_changed_entity_comes_with_neighbourhood(self):
+        ontology = chain(10)
+        baseline = fingerprint(ontology)
+        ontology.entities[5].attributes.append(Attribute("name", AttributeType.STRING, True, True))
+        
+        parts = changed_parts(ontology, baseline, 8000)
+        
+        assert len(parts) == 1
+        assert labels(parts) == ({"Entity4", "Entity5", "Entity6"}, {"NEXT4", "NEXT5"})
+        
+    def test_new_relation_comes_with_both_endpoints(self):
+        ontology = chain(10)
+        baseline = fingerprint(ontology)
+        ontology.add_relation(Relation("SKIPS", "Entity0", "Entity9", []))
+        
+        entities, relations = labels(changed_parts(ontology, baseline, 8000))
+        
+        assert {"Entity0", "Entity9", "Entity1", "Entity8"} <= entities
+        assert "SKIPS" in relations and "NEXT4" not in relations
+        
+    def test_parts_are_bounded_copies(self):
+        ontology = chain(200)
+        
+        parts = changed_parts(ontology, {}, 300)
+        
+        assert len(parts) > 1
+        assert all(len(str(part)) <= 4 * 300 * 2 for part in parts)
+        assert parts[0].entities[0] is not ontology.entities[0]
+        assert parts[0].entities[0].label == ontology.entities[0].label
+        
+    def test_default_parts_fit_the_message_cap(self):
+        ontology = chain(300)
+        for entity in ontology.entities:
+            entity.attributes.extend(Attribute(f"name{i}", AttributeType.STRING, False, False) for i in range(5))
+        # A hub touched by more relations than one part holds
+        ontology.add_entity(Entity("Hub", []))
+        for entity in ontology.entities[:300]:
+            ontology.add_relation(Relation(f"LINKS_{entity.label.upper()}", "Hub", entity.label, [
+                Attribute(f"weight{i}", AttributeType.NUMBER, False, False) for i in range(5)
+            ]))
+        
+        parts = changed_parts(ontology, {}, fix_part_tokens())
+        
+        assert len(parts) > 1
+        assert all(len(FIX_ONTOLOGY_PROMPT.format(ontology=part)) <= MESSAGE_CHARS for part in parts)
+        assert labels(parts)[1] == {relation.label for relation in ontology.relations}
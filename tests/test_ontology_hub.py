@@ -1,10 +1,42 @@
 import pytest
 import json
+import time
+from threading import Event, Thread
 from src.ontology.ontology_hub import OntologyHub
+from src.steps.concurrent_ontology_step import ConcurrentCreateOntologyStep
 from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.document import Document
+from graphrag_sdk.source import AbstractSource
 from src.sources.unstructured_source import UnstructuredSource
+from src.failures.dead_letter import DeadLetterFile, FailedDocument
 from unittest.mock import MagicMock, patch, call
 
+class TextFileSource(AbstractSource):
+    def load(self):
+        with open(self.path, "r", encoding="utf-8") as file:
+            yield Document(file.read())
+
+def extract_labels(self, chat, doc, ontology, boundaries):
+    return Ontology([Entity(label, []) for label in doc.content.split()], [])
+
+def wait_until(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.05)
+
+def completing_step(ontology_hub, failed=()):
+    """
+    Builds a step mock whose run completes every source except the failed ones.
+    """
+    def create(sources, **kwargs):
+        step = MagicMock()
+        step.run.side_effect = lambda boundaries: ontology_hub._ontology
+        step.completed_sources = [source.path for source in sources if source.path not in failed]
+        return step
+    return create
+
 class TestOntologyHub:
     
     @pytest.fixture
@@ -53,4 +85,116 @@ class TestOntologyHub:
         updated_ontology = ontology_hub.extend_ontology([source], workers=1)
         assert updated_ontology == ontology_hub._ontology
         assert isinstance(updated_ontology, Ontology)
-        assert source in ontology_hub._sources
\ No newline at end of file
+        assert source in ontology_hub._sources
+        
+    @patch('src.ontology.ontology_hub.ConcurrentCreateOntologyStep')
+    def test_extend_skips_ingested_sources(self, mock_step, ontology_hub, tmp_path):
+        mock_step.side_effect = completing_step(ontology_hub)
+        paths = [tmp_path / "a.txt", tmp_path / "b.txt"]
+        for path in paths:
+            path.write_text(f"content of {path.name}")
+        sources = [UnstructuredSource(str(path)) for path in paths]
+        
+        ontology_hub.extend_ontology(sources)
+        ontology_hub.extend_ontology(sources)
+        assert mock_step.call_count == 1
+        
+        paths[1].write_text("changed content")
+        ontology_hub.extend_ontology(sources)
+        assert mock_step.call_count == 2
+        assert mock_step.call_args.kwargs["sources"] == [sources[1]]
+        
+        ontology_hub.extend_ontology(sources, boundaries="only people")
+        assert mock_step.call_args.kwargs["sources"] == sources
+        assert len(ontology_hub._sources) == 2
+        
+    @patch('src.ontology.ontology_hub.ConcurrentCreateOntologyStep')
+    def test_failed_sources_retried(self, mock_step, ontology_hub, tmp_path):
+        paths = [tmp_path / "a.txt", tmp_path / "b.txt"]
+        for path in paths:
+            path.write_text(f"content of {path.name}")
+        sources = [UnstructuredSource(str(path)) for path in paths]
+        
+        mock_step.side_effect = completing_step(ontology_hub, failed={str(paths[1])})
+        ontology_hub.extend_ontology(sources)
+        assert list(ontology_hub.get_manifest()) == [str(paths[0])]
+        
+        mock_step.side_effect = completing_step(ontology_hub)
+        ontology_hub.extend_ontology(sources)
+        assert mock_step.call_args.kwargs["sources"] == [sources[1]]
+        
+    @patch('src.ontology.ontology_hub.ConcurrentCreateOntologyStep')
+    def test_retry_dead_letters(self, mock_step, tmp_path):
+        dead_letter_file = tmp_path / "dead-letter.jsonl"
+        ontology_hub = OntologyHub(ontology=Ontology(), model=MagicMock(), config={"dead_letter_file": str(dead_letter_file)})
+        paths = [tmp_path / "a.txt", tmp_path / "b.txt"]
+        for path in paths:
+            path.write_text(f"content of {path.name}")
+        DeadLetterFile(str(dead_letter_file)).append(
+            FailedDocument(["1"], [str(path) for path in paths], "extraction", "llm_timeout", "timed out", 3)
+        )
+        
+        mock_step.side_effect = completing_step(ontology_hub)
+        ontology_hub.retry_dead_letters(source_factory=TextFileSource)
+        
+        assert [source.path for source in mock_step.call_args.kwargs["sources"]] == [str(path) for path in paths]
+        assert sorted(ontology_hub.get_manifest()) == sorted(str(path) for path in paths)
+        assert dead_letter_file.read_text() == ""
+        
+    @patch('src.ontology.ontology_hub.ConcurrentCreateOntologyStep')
+    def test_manifest_saved_with_ontology(self, mock_step, ontology_hub, sample_source, tmp_path):
+        mock_step.side_effect = completing_step(ontology_hub)
+        ontology_hub.extend_ontology([sample_source])
+        
+        save_path = tmp_path / "ontology.json"
+        ontology_hub.save_json(str(save_path))
+        assert (tmp_path / "ontology.manifest.json").exists()
+        
+        loaded_hub = OntologyHub(model=MagicMock()).load_json(str(save_path))
+        assert loaded_hub.get_manifest() == ontology_hub.get_manifest()
+        assert sample_source.path in loaded_hub.get_manifest()
+        
+    @patch('src.ontology.ontology_hub.ConcurrentCreateOntologyStep')
+    def test_save_and_load_compact(self, mock_step, ontology_hub, sample_source, tmp_path):
+        mock_step.side_effect = completing_step(ontology_hub)
+        ontology_hub.extend_ontology([sample_source])
+        ontology_hub.get_ontology().add_entity(Entity("Person", []))
+        
+        save_path = tmp_path / "ontology.ontology"
+        ontology_hub.save(str(save_path))
+        assert (tmp_path / "ontology.manifest.json").exists()
+        
+        loaded_hub = OntologyHub(model=MagicMock()).load(str(save_path))
+        assert loaded_hub.get_ontology().to_json() == ontology_hub.get_ontology().to_json()
+        assert loaded_hub.get_manifest() == ontology_hub.get_manifest()
+        assert loaded_hub.get_index().entity("Person").label == "Person"
+        
+    @patch.object(ConcurrentCreateOntologyStep, "_fix_ontology", lambda self, chat, o: o)
+    @patch.object(ConcurrentCreateOntologyStep, "_process_source", extract_labels)
+    def test_watch_ingests_new_files(self, ontology_hub, tmp_path):
+        inbox = tmp_path / "inbox"
+        inbox.mkdir()
+        (inbox / "first.txt").write_text("Person")
+        snapshot = tmp_path / "ontology.json"
+        ontology_hub._config.update({"watch_poll_interval": 0.05, "watch_debounce": 0, "snapshot_interval": 0})
+        stop = Event()
+        
+        service = Thread(
+            target=ontology_hub.watch,
+            args=([str(inbox)], str(snapshot)),
+            kwargs={"workers": 2, "source_factory": TextFileSource, "stop": stop}
+        )
+        service.start()
+        try:
+            wait_until(lambda: str(inbox / "first.txt") in ontology_hub.get_manifest())
+            # Picked up by the running pipeline, without a restart
+            (inbox / "second.txt").write_text("Company")
+            wait_until(lambda: str(inbox / "second.txt") in ontology_hub.get_manifest())
+        finally:
+            stop.set()
+            service.join(timeout=30)
+        
+        assert not service.is_alive()
+        assert sorted(entity.label for entity in ontology_hub.get_ontology().entities) == ["Company", "Person"]
+        saved = json.loads(snapshot.read_text())
+        assert sorted(entity["label"] for entity in saved["entities"]) == ["Company", "Person"]
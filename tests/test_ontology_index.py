@@ -0,0 +1,46 @@
+import random
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.relation import Relation
+from src.ontology.ontology_index import OntologyIndex
+from src.ontology.ontology_merger import OntologyMerger
+from tests.test_ontology_merger import random_ontology
+
+class TestOntologyIndex:
+    
+    def ontology(self):
+        rng = random.Random(3)
+        return OntologyMerger().add_all([random_ontology(rng) for _ in range(30)]).ontology
+    
+    def test_lookups_match_scans(self):
+        ontology = self.ontology()
+        index = OntologyIndex(ontology)
+        
+        for entity in ontology.entities:
+            label = entity.label
+            assert index.entity(label) is ontology.get_entity_with_label(label)
+            assert index.relations_from(label) == [r for r in ontology.relations if r.source.label == label]
+            assert index.relations_to(label) == [r for r in ontology.relations if r.target.label == label]
+            assert index.relations_touching(label) == [
+                r for r in ontology.relations if label in (r.source.label, r.target.label)
+            ]
+        for relation in ontology.relations:
+            assert index.relations(relation.label) == ontology.get_relations_with_label(relation.label)
+            
+    def test_unknown_labels(self):
+        index = OntologyIndex(self.ontology())
+        
+        assert index.entity("Missing") is None
+        assert index.relations("MISSING") == []
+        assert index.relations_touching("Missing") == []
+        
+    def test_follows_appends(self):
+        ontology = self.ontology()
+        index = OntologyIndex(ontology)
+        assert index.entity("Planet") is None
+        
+        ontology.add_entity(Entity("Planet", []))
+        ontology.add_relation(Relation("ORBITS", "Planet", "Planet", []))
+        
+        assert index.entity("Planet").label == "Planet"
+        assert [r.label for r in index.relations_touching("Planet")] == ["ORBITS"]
+        assert [r.label for r in index.relations("ORBITS")] == ["ORBITS"]
@@ -0,0 +1,55 @@
+import copy
+import random
+import pytest
+from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from graphrag_sdk.relation import Relation
+from graphrag_sdk.attribute import Attribute, AttributeType
+from src.ontology.ontology_merger import OntologyMerger, merge_ontologies
+
+def random_ontology(rng: random.Random) -> Ontology:
+    def attributes():
+        return [
+            Attribute(f"attr{rng.randint(0, 5)}", AttributeType.STRING, False, False)
+            for _ in range(rng.randint(0, 3))
+        ]
+    
+    labels = [f"Entity{rng.randint(0, 20)}" for _ in range(rng.randint(1, 6))]
+    return Ontology(
+        [Entity(label, attributes()) for label in labels],
+        [
+            Relation(f"REL{rng.randint(0, 10)}", rng.choice(labels), rng.choice(labels), attributes())
+            for _ in range(rng.randint(0, 4))
+        ]
+    )
+
+class TestOntologyMerger:
+    
+    @pytest.fixture
+    def parts(self):
+        rng = random.Random(42)
+        return [random_ontology(rng) for _ in range(60)]
+    
+    def fold(self, parts, base=None):
+        ontology = copy.deepcopy(base) if base is not None else Ontology()
+        for part in copy.deepcopy(parts):
+            ontology = ontology.merge_with(part)
+        return ontology.to_json()
+    
+    def test_equals_sequential_fold(self, parts):
+        merged = OntologyMerger().add_all(copy.deepcopy(parts)).ontology
+        assert merged.to_json() == self.fold(parts)
+        
+    def test_base_ontology(self, parts):
+        base = copy.deepcopy(parts[0])
+        merged = OntologyMerger(base).add_all(copy.deepcopy(parts[1:])).ontology
+        assert merged is base
+        assert merged.to_json() == self.fold(parts[1:], base=parts[0])
+        
+    def test_tree_reduction_equals_fold(self, parts):
+        merged = merge_ontologies(copy.deepcopy(parts), workers=4)
+        assert merged.to_json() == self.fold(parts)
+        
+    def test_merge_empty_list(self):
+        merged = merge_ontologies([])
+        assert merged.entities == [] and merged.relations == []
@@ -0,0 +1,62 @@
+import gzip
+import json
+import random
+import pytest
+from src.ontology.ontology_store import (
+    JSON_LINES,
+    MSGPACK,
+    iter_ontology,
+    load_ontology,
+    save_ontology
+)
+from tests.test_ontology_merger import random_ontology
+from src.ontology.ontology_merger import OntologyMerger
+
+class TestOntologyStore:
+    
+    @pytest.fixture
+    def ontology(self):
+        rng = random.Random(7)
+        return OntologyMerger().add_all([random_ontology(rng) for _ in range(40)]).ontology
+    
+    def test_json_lines_roundtrip(self, ontology, tmp_path):
+        path = str(tmp_path / "ontology.ontology")
+        save_ontology(ontology, path, encoding=JSON_LINES)
+        
+        assert load_ontology(path).to_json() == ontology.to_json()
+        
+    def test_msgpack_roundtrip(self, ontology, tmp_path):
+        pytest.importorskip("msgpack")
+        path = str(tmp_path / "ontology.ontology")
+        save_ontology(ontology, path, encoding=MSGPACK)
+        
+        assert load_ontology(path).to_json() == ontology.to_json()
+        
+    def test_iter_streams_entities_then_relations(self, ontology, tmp_path):
+        path = str(tmp_path / "ontology.ontology")
+        save_ontology(ontology, path, encoding=JSON_LINES)
+        
+        labels = [item.label for item in iter_ontology(path)]
+        assert labels == [e.label for e in ontology.entities] + [r.label for r in ontology.relations]
+        
+    def test_save_replaces_file(self, ontology, tmp_path):
+        path = tmp_path / "ontology.ontology"
+        path.write_bytes(b"old")
+        save_ontology(ontology, str(path), encoding=JSON_LINES)
+        
+        assert load_ontology(str(path)).to_json() == ontology.to_json()
+        assert list(tmp_path.iterdir()) == [path]
+        
+    def test_unknown_encoding_leaves_no_file(self, ontology, tmp_path):
+        with pytest.raises(ValueError):
+            save_ontology(ontology, str(tmp_path / "ontology.ontology"), encoding="xml")
+        assert list(tmp_path.iterdir()) == []
+        
+    @pytest.mark.parametrize("header", [{"format": "other", "version": 1}, {"format": "batch2kg-ontology", "version": 99}])
+    def test_rejects_foreign_file(self, header, tmp_path):
+        path = tmp_path / "ontology.ontology"
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            file.write(json.dumps(header) + "\n")
+        
+        with pytest.raises(ValueError):
+            load_ontology(str(path))
@@ -0,0 +1,85 @@
+import json
+import pickle
+import pytest
+from src.metrics.pipeline_metrics import PipelineMetrics, MetricsHook, MetricsSampler
+from unittest.mock import MagicMock
+
+class RecordingHook(MetricsHook):
+    def __init__(self):
+        self.events = []
+        
+    def on_timer_start(self, name):
+        self.events.append(("start", name))
+        
+    def on_timer_end(self, name, seconds):
+        self.events.append(("end", name))
+
+class TestPipelineMetrics:
+    
+    @pytest.fixture
+    def metrics(self):
+        return PipelineMetrics()
+    
+    def test_counters_histograms_gauges(self, metrics):
+        metrics.increment("calls_total")
+        metrics.increment("calls_total", 2)
+        for value in range(1, 101):
+            metrics.observe("latency_seconds", value)
+        metrics.set_gauge("queue_depth", 5)
+        metrics.set_gauge("queue_depth", 2)
+        
+        report = metrics.report()
+        assert report["counters"] == {"calls_total": 3}
+        assert report["histograms"]["latency_seconds"]["count"] == 100
+        assert report["histograms"]["latency_seconds"]["p50"] == 50
+        assert report["histograms"]["latency_seconds"]["p99"] == 99
+        assert report["gauges"]["queue_depth"] == {"last": 2, "max": 5}
+        
+    def test_merge_child_snapshot(self, metrics):
+        metrics.increment("calls_total")
+        child = metrics.child()
+        child.increment("calls_total", 4)
+        child.observe("latency_seconds", 0.5)
+        
+        # Snapshots travel through multiprocessing queues
+        snapshot = pickle.loads(pickle.dumps(child.snapshot("ontology")))
+        metrics.merge(snapshot)
+        
+        report = metrics.report()
+        assert report["counters"]["calls_total"] == 5
+        assert report["histograms"]["latency_seconds"]["count"] == 1
+        
+    def test_timer_calls_hooks(self):
+        hook = RecordingHook()
+        metrics = PipelineMetrics([hook])
+        with metrics.child().timer("merge_seconds"):
+            pass
+        
+        assert hook.events == [("start", "merge_seconds"), ("end", "merge_seconds")]
+        
+    def test_prometheus_text(self, metrics):
+        metrics.increment("calls_total", 3)
+        metrics.observe("latency_seconds", 0.25)
+        metrics.set_gauge("queue_depth", 7)
+        
+        text = metrics.to_prometheus()
+        assert "# TYPE batch2kg_calls_total counter\nbatch2kg_calls_total 3\n" in text
+        assert 'batch2kg_latency_seconds{quantile="0.99"} 0.25' in text
+        assert "batch2kg_latency_seconds_count 1" in text
+        assert "batch2kg_queue_depth 7" in text
+        
+    def test_write_report(self, metrics, tmp_path):
+        metrics.increment("calls_total")
+        metrics.write_report(str(tmp_path / "metrics.json"))
+        
+        with open(tmp_path / "metrics.json") as file:
+            assert json.load(file)["counters"] == {"calls_total": 1}
+            
+    def test_sampler_records_queue_depth(self, metrics, tmp_path):
+        queue = MagicMock()
+        queue.qsize.return_value = 3
+        with MetricsSampler(metrics, {"documents_queue_depth": queue}, interval=60, path=str(tmp_path / "live.prom")):
+            pass
+        
+        assert metrics.report()["gauges"]["documents_queue_depth"]["last"] == 3
+        assert "batch2kg_documents_queue_depth 3" in (tmp_path / "live.prom").read_text()
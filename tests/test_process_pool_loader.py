@@ -0,0 +1,55 @@
+import os
+import time
+import pytest
+from graphrag_sdk.document import Document
+from graphrag_sdk.source import AbstractSource
+from src.loaders.process_pool_loader import ProcessPoolLoader
+from tests.sources import StaticSource, FailingSource
+
+class HangingSource(AbstractSource):
+    def load(self):
+        time.sleep(60)
+        yield Document("never")
+
+class CrashingSource(AbstractSource):
+    def load(self):
+        os._exit(1)
+
+class TestProcessPoolLoader:
+    
+    def test_load_sources(self):
+        sources = [StaticSource(f"doc-{i}") for i in range(5)]
+        
+        with ProcessPoolLoader(workers=2) as pool:
+            results = list(pool.load(sources))
+        
+        assert len(results) == 5
+        assert all(result.error is None for result in results)
+        assert sorted(result.documents[0].content for result in results) == \
+            sorted(f"Entitydoc-{i}" for i in range(5))
+        
+    def test_timeout_isolated(self):
+        sources = [HangingSource("slow"), StaticSource("fast")]
+        
+        with ProcessPoolLoader(workers=1, timeout=1) as pool:
+            results = {result.source.path: result for result in pool.load(sources)}
+        
+        assert results["slow"].error.startswith("TimeoutError")
+        assert results["fast"].error is None
+        assert results["fast"].documents[0].content == "Entityfast"
+        
+    def test_crash_isolated(self):
+        sources = [CrashingSource("broken"), StaticSource("healthy")]
+        
+        with ProcessPoolLoader(workers=1) as pool:
+            results = {result.source.path: result for result in pool.load(sources)}
+        
+        assert results["broken"].error.startswith("WorkerCrashed")
+        assert results["healthy"].documents[0].content == "Entityhealthy"
+        
+    def test_exception_reported(self):
+        with ProcessPoolLoader(workers=1) as pool:
+            results = list(pool.load([FailingSource("bad")]))
+        
+        assert results[0].documents == []
+        assert "broken source" in results[0].error
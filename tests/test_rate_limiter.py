@@ -0,0 +1,65 @@
+import pytest
+from src.llm.rate_limiter import RateLimiter, TokenBucket, is_rate_limit_error, backoff_delay
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+class RateLimitError(Exception):
+    pass
+
+class TestRateLimiter:
+    
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+    
+    def test_bucket_reserve(self, clock):
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+        assert bucket.reserve(1) == 0
+        assert bucket.reserve(1) == 0
+        assert bucket.reserve(1) == pytest.approx(1)
+        
+    def test_requests_per_minute(self, clock):
+        limiter = RateLimiter(requests_per_minute=60, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            limiter.acquire()
+        assert clock.now == 0
+        
+        limiter.acquire()
+        assert clock.now == pytest.approx(1)
+        
+    def test_tokens_per_minute(self, clock):
+        limiter = RateLimiter(tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+        limiter.acquire(600)
+        limiter.acquire(300)
+        assert clock.now == pytest.approx(30)
+        
+    def test_unlimited(self, clock):
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        for _ in range(1000):
+            limiter.acquire(10000)
+        assert clock.now == 0
+        
+    def test_is_rate_limit_error(self):
+        assert is_rate_limit_error(RateLimitError("slow down"))
+        assert is_rate_limit_error(Exception("Quota exceeded for requests"))
+        assert not is_rate_limit_error(ValueError("bad input"))
+        
+    def test_is_rate_limit_error_anchors_429(self):
+        assert is_rate_limit_error(Exception("Error code: 429 - {'error': {'message': 'slow down'}}"))
+        assert is_rate_limit_error(Exception("HTTP 429"))
+        assert is_rate_limit_error(Exception("429 Too Many Requests"))
+        assert is_rate_limit_error(Exception("Rate_limit_exceeded"))
+        assert not is_rate_limit_error(ValueError("Document page-429.txt could not be parsed"))
+        assert not is_rate_limit_error(ValueError("Context length is 14290, got 24291 tokens"))
+        assert not is_rate_limit_error(Exception("Error code: 4290"))
+        
+    def test_backoff_delay_bounded(self):
+        assert all(0 <= backoff_delay(attempt, base=1, maximum=5) <= 5 for attempt in range(20))
@@ -0,0 +1,43 @@
+import time
+import threading
+from src.failures.retry_queue import RetryQueue
+
+class TestRetryQueue:
+    
+    def test_resubmits_after_backoff(self):
+        submitted = []
+        done = threading.Event()
+        
+        def submit(item, attempt):
+            submitted.append((item, attempt))
+            done.set()
+            
+        retries = RetryQueue(submit, max_attempts=3, base_delay=0.01, max_delay=0.05)
+        assert retries.schedule(1, "doc")
+        
+        assert done.wait(5)
+        assert submitted == [("doc", 2)]
+        assert len(retries) == 0
+        retries.close()
+        
+    def test_stops_after_max_attempts(self):
+        retries = RetryQueue(lambda item, attempt: None, max_attempts=2)
+        
+        assert retries.schedule(1, "doc")
+        assert not retries.schedule(2, "doc")
+        assert len(retries) == 1
+        retries.close()
+        
+    def test_close_drops_waiting_items(self):
+        submitted = []
+        retries = RetryQueue(lambda item, attempt: submitted.append(item), base_delay=60, max_delay=60)
+        # Full jitter may pick a short delay, so several items are queued
+        for item in range(20):
+            retries.schedule(1, item)
+            
+        retries.close()
+        time.sleep(0.05)
+        
+        assert len(retries) == 0
+        assert not retries.schedule(1, "late")
+        assert len(submitted) < 20
@@ -0,0 +1,49 @@
+import pytest
+from graphrag_sdk import Ontology
+from graphrag_sdk.entity import Entity
+from src.checkpoint.run_journal import RunJournal
+
+class TestRunJournal:
+    
+    @pytest.fixture
+    def journal(self, tmp_path):
+        return RunJournal(str(tmp_path / "journal"))
+    
+    @pytest.fixture
+    def ontology(self):
+        return Ontology([Entity("Person", [])], [])
+    
+    def test_empty_journal(self, journal):
+        assert journal.load_snapshot() is None
+        assert journal.load_fixed() is None
+        assert journal.completed_ids() == set()
+        
+    def test_checkpoint(self, journal, ontology):
+        journal.checkpoint(ontology, ["a", "b"])
+        journal.checkpoint(ontology, ["c"])
+        
+        reopened = RunJournal(journal.directory)
+        assert reopened.completed_ids() == {"a", "b", "c"}
+        assert reopened.load_snapshot().to_json() == ontology.to_json()
+        
+    def test_checkpoint_invalidates_fixed(self, journal, ontology):
+        journal.mark_fixed(ontology)
+        assert journal.load_fixed() is not None
+        
+        journal.checkpoint(ontology, ["a"])
+        assert journal.load_fixed() is None
+        
+    def test_clear(self, journal, ontology):
+        journal.checkpoint(ontology, ["a"])
+        journal.clear()
+        assert journal.completed_ids() == set()
+        assert journal.load_snapshot() is None
+        
+    def test_clear_keeps_other_files(self, tmp_path, ontology):
+        (tmp_path / "notes.txt").write_text("unrelated")
+        journal = RunJournal(str(tmp_path))
+        journal.checkpoint(ontology, ["a"])
+        journal.mark_fixed(ontology)
+        journal.clear()
+        
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["notes.txt"]
@@ -0,0 +1,72 @@
+import os
+import json
+import random
+import pytest
+from unittest.mock import patch
+from unstructured.cleaners import core
+from unstructured.documents.elements import NarrativeText
+from src.loaders.text_cleaner import clean_text, clean_texts
+from src.loaders.unstructured_loader import UnstructuredLoader
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden", "text_cleaning.json")
+
+def clean_with_chain(text):
+    for name in UnstructuredLoader.default_cleaners:
+        text = getattr(core, name)(text)
+        if isinstance(text, list):
+            text = ''.join(text)
+    return text
+
+class TestTextCleaner:
+    
+    def test_golden_corpus(self):
+        with open(GOLDEN, "r", encoding="utf-8") as file:
+            golden = json.load(file)
+        
+        assert clean_texts([case["input"] for case in golden]) == [case["output"] for case in golden]
+        
+    def test_matches_cleaner_chain(self):
+        rng = random.Random(0)
+        alphabet = list("ab e.1-*\n \t\xa0é•·") + ["e ", "1.1 ", "a.b ", "word ", "\n\n", "- ", "..."]
+        
+        for _ in range(5000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 30)))
+            try:
+                expected = clean_with_chain(text)
+            except IndexError:
+                # The chain fails on text that is empty once cleaned
+                assert clean_text(text) == ""
+                continue
+            assert clean_text(text) == expected, repr(text)
+        
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_custom_cleaners_use_chain(self, mock_partition, tmp_path):
+        mock_partition.return_value = [NarrativeText("Some   Text")]
+        
+        loader = UnstructuredLoader(str(tmp_path / "test.pdf"))
+        loader.cleaners = [str.lower]
+        
+        assert next(loader.load()).content == "some   text"
+        
+    @patch('src.loaders.unstructured_loader.clean_texts', side_effect=clean_texts)
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_default_cleaners_as_functions_use_fused_cleaner(self, mock_partition, mock_clean_texts, tmp_path):
+        mock_partition.return_value = [NarrativeText("Some   Text")]
+        
+        loader = UnstructuredLoader(str(tmp_path / "test.pdf"))
+        loader.cleaners = [getattr(core, name) for name in UnstructuredLoader.default_cleaners]
+        
+        assert next(loader.load()).content == "Some Text"
+        mock_clean_texts.assert_called_once()
+        
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_custom_cleaner_named_like_default(self, mock_partition, tmp_path):
+        mock_partition.return_value = [NarrativeText("Some   Text")]
+        names = list(UnstructuredLoader.default_cleaners)
+        clean_ordered_bullets = lambda text: text.upper()
+        clean_ordered_bullets.__name__ = clean_ordered_bullets.__qualname__ = names[-1]
+        
+        loader = UnstructuredLoader(str(tmp_path / "test.pdf"))
+        loader.cleaners = names[:-1] + [clean_ordered_bullets]
+        
+        assert next(loader.load()).content == "SOME TEXT"
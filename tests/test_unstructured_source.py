@@ -1,9 +1,11 @@
 import pytest
 import os
+from src.cache.blob_cache import BlobCache
 from src.sources.unstructured_source import UnstructuredSource
 from graphrag_sdk.document import Document
-from unstructured.documents.elements import NarrativeText
-from unstructured.partition.auto import partition
+from pypdf import PdfWriter
+from unstructured.documents.elements import ElementMetadata, NarrativeText, Title
+from src.loaders.unstructured_loader import partition
 from unittest.mock import patch, MagicMock
 
 class TestUnstructuredSource:
@@ -27,4 +29,104 @@ class TestUnstructuredSource:
         documents = list(source.load())
         
         assert len(documents) == 1
-        assert documents[0].content == "PDF content"
\ No newline at end of file
+        assert documents[0].content == "PDF content"
+        
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_load_keeps_element_categories(self, mock_loader, tmp_path):
+        mock_loader.return_value = [Title("Introduction"), NarrativeText("Body text")]
+        
+        source = UnstructuredSource(str(tmp_path / "test.pdf"))
+        documents = list(source.load())
+        
+        assert documents[0].content == "Introduction\nBody text"
+        assert documents[0].categories == ["Title", "NarrativeText"]
+        
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_load_with_persistent_cache(self, mock_partition, tmp_path):
+        mock_partition.return_value = [NarrativeText("Cached content")]
+        cache = BlobCache(str(tmp_path / "cache.sqlite"))
+        
+        file_path = tmp_path / "test.pdf"
+        file_path.write_bytes(b"%PDF-1.4 fake")
+        
+        first = list(UnstructuredSource(str(file_path), cache=cache).load())
+        second = list(UnstructuredSource(str(file_path), cache=cache).load())
+        
+        assert mock_partition.call_count == 1
+        assert first[0].content == second[0].content == "Cached content"
+        assert second[0].categories == ["NarrativeText"]
+        
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_cache_invalidated_on_change(self, mock_partition, tmp_path):
+        mock_partition.return_value = [NarrativeText("Some content")]
+        cache = BlobCache(str(tmp_path / "cache.sqlite"))
+        
+        file_path = tmp_path / "test.pdf"
+        file_path.write_bytes(b"%PDF-1.4 first")
+        list(UnstructuredSource(str(file_path), cache=cache).load())
+        
+        file_path.write_bytes(b"%PDF-1.4 second")
+        list(UnstructuredSource(str(file_path), cache=cache).load())
+        
+        assert mock_partition.call_count == 2
+        
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_streaming_partitions_page_ranges(self, mock_partition, tmp_path):
+        mock_partition.side_effect = lambda **kwargs: [
+            NarrativeText(f"Pages from {kwargs['starting_page_number']}")
+        ]
+        
+        writer = PdfWriter()
+        for name in ("biography-page1.pdf", "biography-page2.pdf", "biography-page3.pdf"):
+            writer.append(os.path.join(os.path.dirname(__file__), "data", name))
+        file_path = tmp_path / "biography.pdf"
+        with open(file_path, "wb") as file:
+            writer.write(file)
+        
+        documents = UnstructuredSource(str(file_path), section_pages=2).load()
+        first = next(documents)
+        
+        # The first section is yielded before the rest of the file is partitioned
+        assert mock_partition.call_count == 1
+        assert first.content == "Pages from 1"
+        assert [doc.content for doc in documents] == ["Pages from 3"]
+        assert "file" in mock_partition.call_args.kwargs
+        
+    @patch('src.loaders.unstructured_loader.partition')
+    def test_streaming_splits_on_page_numbers(self, mock_partition, tmp_path):
+        elements = [
+            Title("One", metadata=ElementMetadata(page_number=1)),
+            NarrativeText("Two", metadata=ElementMetadata(page_number=2)),
+            NarrativeText("Three", metadata=ElementMetadata(page_number=3))
+        ]
+        mock_partition.return_value = elements
+        cache = BlobCache(str(tmp_path / "cache.sqlite"))
+        
+        file_path = tmp_path / "test.docx"
+        file_path.write_bytes(b"fake docx")
+        
+        first = list(UnstructuredSource(str(file_path), cache=cache, section_pages=2).load())
+        second = list(UnstructuredSource(str(file_path), cache=cache, section_pages=2).load())
+        
+        assert mock_partition.call_count == 1
+        assert [doc.content for doc in first] == [doc.content for doc in second] == ["One\nTwo", "Three"]
+        assert second[0].categories == ["Title", "NarrativeText"]
+        
+    @patch('unstructured.partition.text.partition_text')
+    def test_partition_picks_backend_by_extension(self, mock_partition_text, tmp_path):
+        mock_partition_text.return_value = [NarrativeText("Text content")]
+        
+        elements = partition(filename=str(tmp_path / "notes.TXT"), strategy="fast")
+        
+        assert elements[0].text == "Text content"
+        # Plain text partitioning has no strategy
+        assert "strategy" not in mock_partition_text.call_args.kwargs
+        
+    @patch('unstructured.partition.auto.partition')
+    def test_partition_detects_unknown_extensions(self, mock_partition_auto, tmp_path):
+        mock_partition_auto.return_value = [NarrativeText("Detected content")]
+        
+        elements = partition(filename=str(tmp_path / "notes.unknown"), strategy="fast")
+        
+        assert elements[0].text == "Detected content"
+        assert mock_partition_auto.call_args.kwargs["strategy"] == "fast"